@@ -4,5 +4,7 @@ set -o errexit
 
 pip install -r requirements.txt
 
+python manage.py build_assets
 python manage.py collectstatic --no-input
 python manage.py migrate
+python manage.py build_static_site
@@ -0,0 +1,119 @@
+"""
+Gunicorn settings for production (start.sh runs gunicorn -c gunicorn.conf.py).
+
+- Workers are sized from the CPUs and the memory limit of the container,
+  and each sync worker runs a few threads.
+- preload_app imports Django once in the master, which also compiles the
+  URLconf and templates (portfolio.warmup.warm_process). Forked workers
+  share those pages copy-on-write and start in milliseconds.
+- Each worker serves max_requests (with jitter) and is then replaced,
+  which caps slow leaks.
+- A new worker warms the caches (portfolio.warmup.warm_worker) before
+  it takes a request.
+- SQLITE_TUNING defaults to on, for the workers sharing a SQLite file.
+
+Every value can be overridden with a GUNICORN_* variable, or with
+gunicorn's own GUNICORN_CMD_ARGS. python manage.py bench_boot measures
+boot time and first request latency with and without this file.
+"""
+import os
+
+# Resident memory one worker needs, with its threads and caches
+WORKER_MEMORY_MB = int(os.environ.get('GUNICORN_WORKER_MEMORY_MB', '150'))
+
+
+def cpu_count():
+    """CPUs this process may use, honouring a cgroup v2 quota"""
+    count = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count() or 1
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            count = min(count, max(1, int(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return count
+
+
+def memory_mb():
+    """Memory limit of the container (cgroup v2 or v1), else the machine's RAM"""
+    for path in ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes'):
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+        except OSError:
+            continue
+        # cgroup v1 reports "no limit" as a huge number
+        if value != 'max' and int(value) < 1 << 60:
+            return int(value) // (1024 * 1024)
+    return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') // (1024 * 1024)
+
+
+def default_workers():
+    # The usual 2 x CPUs + 1, but never more than fit in memory
+    return max(1, min(2 * cpu_count() + 1, memory_mb() // WORKER_MEMORY_MB))
+
+
+ASGI = os.environ.get('SERVE_ASGI') == '1'
+
+# Several workers with threads share the SQLite file when DATABASE_URL is
+# unset: without WAL and a busy timeout their writes fail with "database
+# is locked" (see portfolio/sqlite.py). Set before Django reads its
+# settings; SQLITE_TUNING=0 still turns it off, and other engines ignore it.
+os.environ.setdefault('SQLITE_TUNING', '1')
+
+wsgi_app = 'nischit_portfolio.asgi:application' if ASGI else 'nischit_portfolio.wsgi:application'
+workers = int(os.environ.get('GUNICORN_WORKERS', default_workers()))
+if ASGI:
+    # One event loop per worker; threads would be unused
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    # Threads overlap the waits on the database, cache files and SMTP
+    threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+    worker_class = 'gthread' if threads > 1 else 'sync'
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '1000'))
+# Spread out the restarts, so the workers are not all replaced at once
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', '100'))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = 30
+# Render's proxy reuses connections
+keepalive = 5
+# bind is left to gunicorn, which listens on $PORT when it is set
+
+
+def when_ready(server):
+    if preload_app:
+        from portfolio.warmup import warm_process
+        server.log.info("Warmed URLconf and templates in %.0f ms", warm_process() * 1000)
+
+
+def pre_fork(server, worker):
+    # Nothing opened in the master may be shared with a child
+    if preload_app:
+        from django.db import connections
+        connections.close_all()
+
+
+def post_worker_init(worker):
+    # After the app is loaded (in the master with preload_app, here
+    # otherwise) and before the first request
+    from portfolio.warmup import warm_process, warm_worker
+    try:
+        if not preload_app:
+            warm_process()
+        worker.log.info("Worker %s warmed in %.0f ms", worker.pid, warm_worker() * 1000)
+    except Exception:
+        # A cold worker still serves; a crashing one would take the site down
+        worker.log.exception("Worker %s warmup failed", worker.pid)
+
+
+def worker_exit(server, worker):
+    # A last copy of the worker's metrics, which the next /metrics scrape
+    # folds into the retired workers' total
+    from portfolio.metrics import flush
+    try:
+        flush(force=True)
+    except Exception:
+        worker.log.exception("Worker %s metrics flush failed", worker.pid)
@@ -1,6 +1,8 @@
+import hashlib
 import os
 from pathlib import Path
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -55,13 +57,17 @@ INSTALLED_APPS = [
 # ======================
 
 MIDDLEWARE = [
+    # First, so its timings cover everything below
+    'portfolio.metrics.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    # WhiteNoise's own, able to run async too (see portfolio/storage.py)
+    'portfolio.storage.WhiteNoiseMiddleware',
 
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'portfolio.routers.PrimaryPinMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -74,6 +80,10 @@ MIDDLEWARE = [
 ROOT_URLCONF = 'nischit_portfolio.urls'
 
 WSGI_APPLICATION = 'nischit_portfolio.wsgi.application'
+ASGI_APPLICATION = 'nischit_portfolio.asgi.application'
+
+# Serve the home page from the async view (set by start.sh under uvicorn workers)
+ASYNC_VIEWS = os.environ.get('SERVE_ASGI') == '1'
 
 
 # ======================
@@ -110,6 +120,33 @@ DATABASES = {
     )
 }
 
+# Tuning for gunicorn workers sharing one SQLite file (see portfolio/sqlite.py):
+# WAL, and writes that wait up to SQLITE_BUSY_TIMEOUT seconds for the lock
+# instead of failing with "database is locked"
+SQLITE_TUNING = os.environ.get('SQLITE_TUNING') == '1'
+SQLITE_BUSY_TIMEOUT = int(os.environ.get('SQLITE_BUSY_TIMEOUT', '20'))
+if SQLITE_TUNING and DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    DATABASES['default']['OPTIONS'] = {
+        'transaction_mode': 'IMMEDIATE',
+        'timeout': SQLITE_BUSY_TIMEOUT,
+    }
+
+# Read replicas, as space or comma separated URLs. Public page and API reads
+# go to them (see portfolio/routers.py); everything else uses default.
+REPLICA_DATABASES = []
+for i, url in enumerate(os.environ.get('DATABASE_REPLICA_URLS', '').replace(',', ' ').split()):
+    DATABASES[f'replica_{i}'] = dj_database_url.parse(url, conn_max_age=600)
+    # Tests run everything against the test copy of default
+    DATABASES[f'replica_{i}']['TEST'] = {'MIRROR': 'default'}
+    REPLICA_DATABASES.append(f'replica_{i}')
+
+DATABASE_ROUTERS = ['portfolio.routers.PrimaryReplicaRouter']
+
+# How far replicas may trail the primary. For this long after an admin
+# save that editor reads from the primary, and so does every page render
+# after a content change, so stale rows are never cached.
+DATABASE_REPLICA_LAG_SECONDS = int(os.environ.get('DATABASE_REPLICA_LAG_SECONDS', '10'))
+
 
 # ======================
 # AUTH / I18N
@@ -122,6 +159,10 @@ TIME_ZONE = 'UTC'
 USE_I18N = True
 USE_TZ = True
 
+# IANA zone for the clock on the home page, e.g. 'Asia/Kathmandu';
+# empty shows each visitor their own local time
+CLOCK_TIME_ZONE = os.environ.get('CLOCK_TIME_ZONE', '')
+
 
 # ======================
 # STATIC FILES
@@ -135,7 +176,34 @@ STATICFILES_DIRS = [
 
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    # Hashed, compressed copies that WhiteNoise serves with far-future,
+    # immutable cache headers
+    'staticfiles': {
+        'BACKEND': 'portfolio.storage.ManifestStaticFilesStorage',
+    },
+}
+
+# Hash files missing from the manifest on the fly instead of raising
+WHITENOISE_MANIFEST_STRICT = False
+
+# Built by python manage.py build_assets into the first STATICFILES_DIRS
+# entry, before collectstatic hashes them
+ASSET_BUNDLES = {
+    'dist/site.min.css': ['css/style.css'],
+    'dist/site.min.js': ['js/scripts.js'],
+}
+
+# Selectors (fnmatch patterns) of the first screen, inlined as critical CSS
+CRITICAL_CSS_SELECTORS = [
+    'header', 'nav', '.container', '.header-container', '.center-nav', '.nav-toggle',
+    '.logo*', '.visually-hidden', '.theme-*', '.lang-*', '.switch-thumb',
+    '.hero*', '.name-title', '.date-*', '.hire-btn', '.profile-*', '.slider-*',
+    '#tech-background', '#scroll-progress', '.fade-in',
+]
 
 
 # ======================
@@ -145,6 +213,38 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Resized WebP/JPEG copies of uploaded images, made in a process pool.
+# Set the worker count to 0 to resize in the calling thread instead.
+IMAGE_DERIVATIVE_WIDTHS = (160, 320, 640, 1280)
+IMAGE_DERIVATIVE_FORMATS = ('webp', 'jpeg')
+IMAGE_DERIVATIVE_WORKERS = 1
+
+
+# ======================
+# STATIC SITE
+# ======================
+
+# python manage.py build_static_site renders the public page here
+STATIC_SITE_ROOT = os.environ.get('STATIC_SITE_ROOT', os.path.join(BASE_DIR, 'site'))
+
+# Rebuild in the background after every admin save
+STATIC_SITE_AUTO_REBUILD = os.environ.get('STATIC_SITE_AUTO_REBUILD') == '1'
+
+# Let WhiteNoise answer / from the pre-rendered copy, with no Django view in
+# the path. WhiteNoise indexes files at startup, so a rebuild is only seen
+# after the workers restart; with auto rebuilds visitors would get the old
+# index.html or 404s for newly hashed assets, so the two can't be combined
+# (serve auto-rebuilt copies from an external static host instead).
+if os.environ.get('STATIC_SITE_SERVE') == '1':
+    if STATIC_SITE_AUTO_REBUILD:
+        raise ImproperlyConfigured(
+            "STATIC_SITE_SERVE=1 can't be combined with STATIC_SITE_AUTO_REBUILD=1: "
+            "WhiteNoise would keep serving the files indexed at startup"
+        )
+    WHITENOISE_ROOT = STATIC_SITE_ROOT
+    WHITENOISE_INDEX_FILE = True
+    WHITENOISE_IMMUTABLE_FILE_TEST = r'\.[0-9a-f]{12}\.\w+$'
+
 
 # ======================
 # DEFAULTS
@@ -154,6 +254,10 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 DEFAULT_THEME = 'dark'
 
+# Projects and testimonials rendered with the page; the rest load a page
+# at a time as the visitor scrolls (/sections/<name>/?after=<cursor>)
+SECTION_PAGE_SIZE = int(os.environ.get('SECTION_PAGE_SIZE', '12'))
+
 
 # ======================
 # EMAIL (SAFE DEFAULT)
@@ -162,3 +266,94 @@ DEFAULT_THEME = 'dark'
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'localhost'
 EMAIL_PORT = 25
+
+# Contact notifications are sent on a bounded background thread pool
+CONTACT_NOTIFY_WORKERS = 2
+CONTACT_NOTIFY_QUEUE_SIZE = 100
+
+# Outbox delivery (python manage.py send_outbox --loop)
+OUTBOX_BATCH_SIZE = 50
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_BASE_SECONDS = 60
+
+# Contact form token buckets: scope -> (burst, seconds to refill one token)
+CONTACT_RATE_LIMITS = {
+    'ip': (5, 60),
+    'email': (3, 300),
+}
+# Proxies in front of the app that append to X-Forwarded-For (Render: 1)
+RATE_LIMIT_TRUSTED_PROXIES = int(os.environ.get('RATE_LIMIT_TRUSTED_PROXIES', '1'))
+
+# Contact inbox retention (python manage.py archive_messages)
+CONTACT_RETENTION_DAYS = int(os.environ.get('CONTACT_RETENTION_DAYS', '365'))
+CONTACT_ARCHIVE_REPLIED_ONLY = os.environ.get('CONTACT_ARCHIVE_REPLIED_ONLY') == '1'
+CONTACT_ARCHIVE_DIR = os.environ.get('CONTACT_ARCHIVE_DIR', os.path.join(BASE_DIR, 'archive'))
+CONTACT_ARCHIVE_BATCH_SIZE = 1000
+
+
+# ======================
+# CACHE
+# ======================
+
+CACHE_DIR = os.environ.get('CACHE_DIR', os.path.join(BASE_DIR, '.cache'))
+
+
+def build_id():
+    """
+    Identifies the release: the commit Render deploys, else a hash of the
+    templates and the staticfiles manifest that cached pages are built from
+    """
+    release = os.environ.get('RELEASE_ID') or os.environ.get('RENDER_GIT_COMMIT')
+    if release:
+        return release[:12]
+    digest = hashlib.sha256()
+    paths = sorted(Path(BASE_DIR, 'portfolio', 'templates').rglob('*.html'))
+    for path in paths + [Path(STATIC_ROOT, 'staticfiles.json')]:
+        try:
+            digest.update(path.read_bytes())
+        except OSError:
+            pass
+    return digest.hexdigest()[:12]
+
+
+BUILD_ID = build_id()
+
+# File based so every gunicorn worker on the host shares the rendered page
+# and sees the same content version. Keys are prefixed with the build, so
+# a cache directory that survives a deploy never serves the old release's
+# HTML (and its old asset names). Past MAX_ENTRIES files every set()
+# deletes a random 1/CULL_FREQUENCY of them.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': CACHE_DIR,
+        'KEY_PREFIX': BUILD_ID,
+        'OPTIONS': {'MAX_ENTRIES': 2000, 'CULL_FREQUENCY': 10},
+    },
+    # Rate limit buckets: one file per client IP and email, so they are
+    # kept apart where their churn can't cull pages
+    'counters': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(CACHE_DIR, 'counters'),
+        'OPTIONS': {'MAX_ENTRIES': 10000, 'CULL_FREQUENCY': 4},
+    },
+    # Metrics totals: a few keys per live worker that must never be culled,
+    # or the summed counters would drop
+    'metrics': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(CACHE_DIR, 'metrics'),
+        'OPTIONS': {'MAX_ENTRIES': 1_000_000},
+    },
+}
+
+
+# ======================
+# METRICS
+# ======================
+
+# Request timings: Server-Timing headers for staff, totals at /metrics
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+# How often each worker copies its totals to the shared cache
+METRICS_FLUSH_SECONDS = 10
+# Scrapers send "Authorization: Bearer <token>"; without one only staff can read /metrics
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
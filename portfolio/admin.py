@@ -1,9 +1,15 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ORDER_VAR, ChangeList
+from django.utils import timezone
 from django.utils.html import format_html
 from .models import (
-    Profile, ProfileImage, Education, Experience, Skill, Project, 
-    Testimonial, ContactMessage, SiteSettings
+    Profile, ProfileImage, Education, Experience, Skill, Project, Technology,
+    Testimonial, ContactMessage, OutboxEmail, ImageDerivative, SiteSettings
 )
+from .derivatives import derivative_map
+from .export import export_response
+from .search import search_messages
+from .templatetags.portfolio_tags import image_thumbnail
 
 # Customize admin site header
 admin.site.site_header = "N:PORTFOLIO Admin"
@@ -124,6 +130,16 @@ class SkillAdmin(admin.ModelAdmin):
     proficiency_bar.short_description = 'Proficiency'
 
 
+class ProjectChangeList(ChangeList):
+    """Looks up thumbnails for the whole page of results in one query"""
+
+    def get_results(self, request):
+        super().get_results(request)
+        derivatives = derivative_map([obj.image.name for obj in self.result_list])
+        for obj in self.result_list:
+            obj.image_derivatives = derivatives
+
+
 @admin.register(Project)
 class ProjectAdmin(admin.ModelAdmin):
     list_display = ['title', 'status', 'featured', 'project_thumbnail', 'order', 'created_at']
@@ -147,17 +163,31 @@ class ProjectAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_changelist(self, request, **kwargs):
+        return ProjectChangeList
+
     def project_thumbnail(self, obj):
         """Display project image thumbnail"""
         if obj.image:
             return format_html(
                 '<img src="{}" style="width:50px; height:50px; object-fit:cover; border-radius:5px;" />',
-                obj.image.url
+                image_thumbnail(getattr(obj, 'image_derivatives', {}), obj.image)
             )
         return format_html('<span style="color:#999;">No image</span>')
     project_thumbnail.short_description = 'Image'
 
 
+@admin.register(Technology)
+class TechnologyAdmin(admin.ModelAdmin):
+    list_display = ['name', 'slug', 'project_count']
+    search_fields = ['name', 'slug']
+    readonly_fields = ['slug', 'project_count']
+
+    def has_add_permission(self, request):
+        # Technologies come from the projects' technologies field
+        return False
+
+
 @admin.register(Testimonial)
 class TestimonialAdmin(admin.ModelAdmin):
     list_display = ['name', 'position', 'company', 'rating_stars', 'is_active', 'order']
@@ -186,6 +216,16 @@ class TestimonialAdmin(admin.ModelAdmin):
     rating_stars.short_description = 'Rating'
 
 
+class ContactMessageChangeList(ChangeList):
+    """Lists full-text search results best match first"""
+
+    def get_ordering(self, request, queryset):
+        # Clicking a column header still sorts by that column
+        if 'search_rank' in queryset.query.extra_select and not self.params.get(ORDER_VAR):
+            return ['search_rank', '-created_at', '-pk']
+        return super().get_ordering(request, queryset)
+
+
 @admin.register(ContactMessage)
 class ContactMessageAdmin(admin.ModelAdmin):
     list_display = ['name', 'email', 'subject_preview', 'status_badge', 'created_at']
@@ -203,6 +243,16 @@ class ContactMessageAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_search_results(self, request, queryset, search_term):
+        # Full-text index instead of LIKE '%term%' over every message
+        results = search_messages(queryset, search_term)
+        if results is None:
+            return super().get_search_results(request, queryset, search_term)
+        return results, False
+
+    def get_changelist(self, request, **kwargs):
+        return ContactMessageChangeList
+
     def subject_preview(self, obj):
         """Show subject or first 50 chars of message"""
         if obj.subject:
@@ -231,6 +281,56 @@ class ContactMessageAdmin(admin.ModelAdmin):
         return False
 
 
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'recipients', 'status_badge', 'attempts', 'next_attempt_at', 'sent_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['subject', 'recipients']
+    readonly_fields = [
+        'contact_message', 'subject', 'body', 'from_email', 'recipients',
+        'status', 'attempts', 'next_attempt_at', 'last_error', 'created_at', 'sent_at',
+    ]
+    ordering = ['-created_at']
+
+    fieldsets = (
+        ('Email', {
+            'fields': ('contact_message', 'subject', 'from_email', 'recipients', 'body')
+        }),
+        ('Delivery', {
+            'fields': ('status', 'attempts', 'next_attempt_at', 'sent_at', 'last_error')
+        }),
+    )
+
+    def status_badge(self, obj):
+        """Display delivery status with colored badges"""
+        colors = {
+            OutboxEmail.STATUS_SENT: '#4CAF50',
+            OutboxEmail.STATUS_PENDING: '#FFC107',
+            OutboxEmail.STATUS_DEAD: '#F44336',
+        }
+        return format_html(
+            '<span style="background:{}; color:white; padding:3px 8px; border-radius:3px; font-size:11px;">{}</span>',
+            colors.get(obj.status, '#999'), obj.get_status_display()
+        )
+    status_badge.short_description = 'Status'
+
+    def has_add_permission(self, request):
+        # Outbox rows are only created by the contact form
+        return False
+
+
+@admin.register(ImageDerivative)
+class ImageDerivativeAdmin(admin.ModelAdmin):
+    list_display = ['source', 'format', 'width', 'height', 'created_at']
+    list_filter = ['format', 'width']
+    search_fields = ['source']
+    readonly_fields = ['source', 'source_hash', 'format', 'width', 'height', 'file', 'created_at']
+
+    def has_add_permission(self, request):
+        # Derivatives are generated from uploads, never added by hand
+        return False
+
+
 @admin.register(SiteSettings)
 class SiteSettingsAdmin(admin.ModelAdmin):
     fieldsets = (
@@ -267,4 +367,21 @@ def mark_as_read(modeladmin, request, queryset):
 def mark_as_replied(modeladmin, request, queryset):
     queryset.update(is_replied=True, is_read=True)
 
-ContactMessageAdmin.actions = [mark_as_read, mark_as_replied]
+@admin.action(description='Export selected messages as CSV')
+def export_csv(modeladmin, request, queryset):
+    return export_response(queryset, 'csv')
+
+@admin.action(description='Export selected messages as JSONL')
+def export_jsonl(modeladmin, request, queryset):
+    return export_response(queryset, 'jsonl')
+
+ContactMessageAdmin.actions = [mark_as_read, mark_as_replied, export_csv, export_jsonl]
+
+
+@admin.action(description='Retry selected emails')
+def retry_emails(modeladmin, request, queryset):
+    queryset.exclude(status=OutboxEmail.STATUS_SENT).update(
+        status=OutboxEmail.STATUS_PENDING, attempts=0, next_attempt_at=timezone.now()
+    )
+
+OutboxEmailAdmin.actions = [retry_emails]
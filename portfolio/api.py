@@ -0,0 +1,162 @@
+"""
+JSON snapshot of the portfolio content for /api/portfolio/.
+
+The body is built from the same snapshot as the page and cached against
+the content version, so repeat reads cost a cache lookup and conditional
+ones a 304. Only the full body is cached; other selections are cut from
+it, so no run of ?fields= combinations can fill the cache.
+
+?fields= picks what to return: whole sections ("profile,projects") or
+single fields of a section ("projects.title,projects.github_url").
+
+/projects/ lists the technologies with their project counts, and
+/projects/?tech=<slug> the public projects using one, in page order.
+"""
+import hashlib
+import json
+
+from django.db.models.fields.files import FieldFile
+
+from .models import Project, Technology
+from .snapshot import load_portfolio_snapshot
+
+API_VERSION = 1
+
+# Public fields of each section, in output order. Profile.phone is left out
+# on purpose: the page never shows it either.
+SECTIONS = {
+    'profile': [
+        'name', 'tagline', 'description', 'email', 'location', 'github_url', 'linkedin_url',
+        'twitter_url', 'profile_image', 'resume_file', 'images',
+    ],
+    'education': [
+        'institution', 'degree', 'field_of_study', 'start_date', 'end_date', 'is_current',
+        'description',
+    ],
+    'experiences': ['title', 'company', 'description', 'start_date', 'end_date', 'is_current'],
+    'skills': ['category', 'name', 'description', 'proficiency', 'icon'],
+    'projects': [
+        'title', 'description', 'image', 'project_url', 'github_url', 'technologies', 'status',
+        'featured', 'start_date', 'end_date',
+    ],
+    'testimonials': ['name', 'position', 'company', 'testimonial', 'avatar', 'rating'],
+}
+
+
+def parse_fields(value):
+    """{section: [fields]} for a ?fields= value; raises ValueError on unknown names"""
+    if not value:
+        return {section: list(fields) for section, fields in SECTIONS.items()}
+    selection = {}
+    for item in value.split(','):
+        section, _, field = item.strip().partition('.')
+        if section not in SECTIONS or (field and field not in SECTIONS[section]):
+            raise ValueError(f"Unknown field: {item.strip()}")
+        if not field:
+            selection[section] = list(SECTIONS[section])
+        elif selection.get(section) != SECTIONS[section]:
+            selection.setdefault(section, []).append(field)
+    # Same order whatever order the fields were asked for in
+    return {
+        section: [field for field in fields if field in selection[section]]
+        for section, fields in SECTIONS.items() if section in selection
+    }
+
+
+# Everything, as returned without ?fields=
+FULL_SELECTION = parse_fields('')
+
+
+def technology_key(slug):
+    """Cache key part for a /projects/ query; slugs come from the visitor"""
+    return 'tech-' + hashlib.md5(slug.encode()).hexdigest()[:12]
+
+
+def fields_key(selection):
+    """Short, stable name for a selection, used in cache keys and ETags"""
+    canonical = ';'.join(f"{section}:{','.join(fields)}" for section, fields in selection.items())
+    return hashlib.md5(canonical.encode()).hexdigest()[:12]
+
+
+def serialize_value(obj, field):
+    value = getattr(obj, field)
+    if isinstance(value, FieldFile):
+        # The URL, or None when nothing is uploaded
+        return value.url if value else None
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def serialize(obj, fields):
+    return {field: serialize_value(obj, field) for field in fields}
+
+
+def serialize_profile(snapshot, fields):
+    if snapshot.profile is None:
+        return None
+    data = serialize(snapshot.profile, [field for field in fields if field != 'images'])
+    if 'images' in fields:
+        # Slider images come from the snapshot, already in slider order
+        data['images'] = [image.image.url for image in snapshot.profile_images]
+    return data
+
+
+def dump(data):
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+def build_api_body(selection, version):
+    """Compact JSON bytes for the selected fields"""
+    snapshot = load_portfolio_snapshot()
+    data = {'version': API_VERSION, 'content_version': str(version)}
+    for section, fields in selection.items():
+        if section == 'profile':
+            data[section] = serialize_profile(snapshot, fields)
+        else:
+            data[section] = [serialize(obj, fields) for obj in getattr(snapshot, section)]
+    return dump(data)
+
+
+def select_fields(body, selection):
+    """The selected fields of a full body, as the same compact JSON build_api_body() makes"""
+    full = json.loads(body)
+    data = {'version': full['version'], 'content_version': full['content_version']}
+    for section, fields in selection.items():
+        value = full[section]
+        if isinstance(value, list):
+            data[section] = [{field: item[field] for field in fields} for item in value]
+        elif value is not None:
+            data[section] = {field: value[field] for field in fields}
+        else:
+            data[section] = None
+    return dump(data)
+
+
+def build_projects_body(slug, version):
+    """
+    Compact JSON for /projects/: the public projects using technology
+    slug, or every technology in use when slug is empty. None when no
+    technology has that slug.
+    """
+    data = {'version': API_VERSION, 'content_version': str(version)}
+    if not slug:
+        technologies = Technology.objects.filter(project_count__gt=0)
+        data['technologies'] = [
+            {'name': tech.name, 'slug': tech.slug, 'project_count': tech.project_count}
+            for tech in technologies
+        ]
+        return dump(data)
+
+    technology = Technology.objects.filter(slug=slug).first()
+    if technology is None:
+        return None
+    # The link table's technology index finds the rows; only the matches are sorted
+    projects = technology.projects.filter(status__in=Project.PUBLIC_STATUSES).order_by(
+        'order', '-created_at', '-id'
+    )
+    data['technology'] = {
+        'name': technology.name, 'slug': technology.slug, 'project_count': technology.project_count,
+    }
+    data['projects'] = [serialize(project, SECTIONS['projects']) for project in projects]
+    return dump(data)
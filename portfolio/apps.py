@@ -4,3 +4,16 @@ from django.apps import AppConfig
 class PortfolioConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'portfolio'
+
+    def ready(self):
+        # Connect cache invalidation handlers
+        from . import signals  # noqa: F401
+
+        # Time every query for the request metrics
+        from django.db.backends.signals import connection_created
+        from .metrics import install_query_timer
+        connection_created.connect(install_query_timer)
+
+        # WAL and friends when SQLITE_TUNING is on
+        from .sqlite import tune_sqlite
+        connection_created.connect(tune_sqlite)
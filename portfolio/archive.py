@@ -0,0 +1,125 @@
+"""
+Retention for the contact inbox.
+
+archive_messages() moves messages older than the retention period into
+gzipped JSONL files under CONTACT_ARCHIVE_DIR, one batch at a time: a
+batch is read by primary key (keyset, never OFFSET), appended to the
+archive as its own gzip member and synced to disk, and only then deleted
+in a short transaction of its own. Memory use is bounded by the batch
+size, and a crash loses nothing: the file stays readable up to the last
+complete batch, and restore_messages() skips rows that still exist.
+"""
+import gzip
+import json
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import ContactMessage
+
+# Stored for every archived message, in this order
+RECORD_FIELDS = ['id', 'name', 'email', 'subject', 'message', 'is_read', 'is_replied', 'created_at']
+
+
+def message_record(values):
+    """JSON-ready dict for a message, from .values(*RECORD_FIELDS) output"""
+    record = dict(values)
+    record['created_at'] = record['created_at'].isoformat()
+    return record
+
+
+def archive_queryset(older_than_days=None, replied_only=None):
+    """Messages due for archiving under the retention policy"""
+    if older_than_days is None:
+        older_than_days = settings.CONTACT_RETENTION_DAYS
+    if replied_only is None:
+        replied_only = settings.CONTACT_ARCHIVE_REPLIED_ONLY
+    queryset = ContactMessage.objects.filter(
+        created_at__lt=timezone.now() - timedelta(days=older_than_days)
+    )
+    if replied_only:
+        queryset = queryset.filter(is_replied=True)
+    return queryset
+
+
+def archive_path(output_dir=None):
+    output_dir = output_dir or settings.CONTACT_ARCHIVE_DIR
+    os.makedirs(output_dir, exist_ok=True)
+    stamp = timezone.now().strftime('%Y%m%dT%H%M%S')
+    return os.path.join(output_dir, f'contact-messages-{stamp}.jsonl.gz')
+
+
+def archive_messages(older_than_days=None, replied_only=None, batch_size=None, output_dir=None):
+    """Move due messages into a new archive; returns (messages archived, path or None)"""
+    batch_size = batch_size or settings.CONTACT_ARCHIVE_BATCH_SIZE
+    queryset = archive_queryset(older_than_days, replied_only).order_by('pk')
+    path = None
+    archived = 0
+    last_pk = 0
+
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk).values(*RECORD_FIELDS)[:batch_size])
+        if not batch:
+            break
+        if path is None:
+            path = archive_path(output_dir)
+
+        # Each batch is a complete gzip member, so the file is readable
+        # up to the last batch even if a later one never finishes
+        with open(path, 'ab') as f:
+            with gzip.GzipFile(fileobj=f, mode='wb') as gz:
+                for values in batch:
+                    gz.write(json.dumps(message_record(values), ensure_ascii=False).encode() + b'\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+        pks = [values['id'] for values in batch]
+        with transaction.atomic():
+            # Detaches their outbox emails too (SET_NULL)
+            ContactMessage.objects.filter(pk__in=pks).delete()
+        archived += len(pks)
+        last_pk = pks[-1]
+
+    return archived, path
+
+
+def read_archive(path):
+    """Yield the records of an archive file one at a time"""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def restore_batch(records):
+    existing = set(
+        ContactMessage.objects.filter(pk__in=[r['id'] for r in records]).values_list('pk', flat=True)
+    )
+    messages = [ContactMessage(**r) for r in records if r['id'] not in existing]
+    created_at = {message.pk: parse_datetime(message.created_at) for message in messages}
+    with transaction.atomic():
+        ContactMessage.objects.bulk_create(messages)
+        # bulk_create() stamps auto_now_add fields with the current time
+        for message in messages:
+            message.created_at = created_at[message.pk]
+        ContactMessage.objects.bulk_update(messages, ['created_at'])
+    return len(messages)
+
+
+def restore_messages(path, batch_size=None):
+    """Put an archive's messages back; returns how many were restored"""
+    batch_size = batch_size or settings.CONTACT_ARCHIVE_BATCH_SIZE
+    restored = 0
+    batch = []
+    for record in read_archive(path):
+        batch.append(record)
+        if len(batch) >= batch_size:
+            restored += restore_batch(batch)
+            batch = []
+    if batch:
+        restored += restore_batch(batch)
+    return restored
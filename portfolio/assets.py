@@ -0,0 +1,172 @@
+"""
+Front-end asset build: bundling, minification and critical CSS.
+
+build_assets() concatenates and minifies the sources listed in
+ASSET_BUNDLES into the first STATICFILES_DIRS entry, and extracts the
+rules needed for the first screen into CRITICAL_CSS for inlining. Run it
+before collectstatic, which then gives the bundles their hashed,
+immutable names.
+"""
+import os
+import re
+from fnmatch import fnmatch
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+
+CRITICAL_CSS = 'dist/critical.css'
+
+COMMENT_RE = re.compile(r'/\*.*?\*/', re.S)
+SIMPLE_SELECTOR_RE = re.compile(r'[.#]?[\w-]+|\*')
+GLOBAL_COMPOUND_RE = re.compile(r'(html|body|\*)([.#][\w-]+)*')
+ANIMATION_NAME_RE = re.compile(r'animation(?:-name)?\s*:\s*([^;}]+)')
+
+
+def read_asset(name):
+    """Contents of a static file from the finders or the collected files, or None"""
+    path = finders.find(name)
+    if path is None:
+        if not staticfiles_storage.exists(name):
+            return None
+        path = staticfiles_storage.path(name)
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+def minify_css(css):
+    css = COMMENT_RE.sub('', css)
+    css = re.sub(r'\s+', ' ', css)
+    # Spaces before ':' are significant in selectors ("a :hover"), so only trim after it
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    css = css.replace(';}', '}')
+    return css.strip()
+
+
+def minify_js(js):
+    """
+    Conservative JS minification: drop comment-only lines, indentation and
+    blank lines. Line breaks are kept so automatic semicolon insertion is
+    unaffected and strings or regexes are never touched.
+    """
+    lines = []
+    in_block_comment = False
+    for line in js.splitlines():
+        stripped = line.strip()
+        if in_block_comment:
+            in_block_comment = '*/' not in stripped
+            continue
+        if stripped.startswith('/*'):
+            in_block_comment = '*/' not in stripped
+            continue
+        if not stripped or stripped.startswith('//'):
+            continue
+        lines.append(stripped)
+    return '\n'.join(lines)
+
+
+def split_blocks(css):
+    """Top-level (prelude, body) pairs of a comment-free stylesheet"""
+    blocks = []
+    position = 0
+    while True:
+        start = css.find('{', position)
+        if start == -1:
+            break
+        depth = 1
+        end = start + 1
+        while depth and end < len(css):
+            if css[end] == '{':
+                depth += 1
+            elif css[end] == '}':
+                depth -= 1
+            end += 1
+        blocks.append((css[position:start].strip(), css[start + 1:end - 1]))
+        position = end
+    return blocks
+
+
+def is_critical_selector(selector, patterns):
+    # Pseudo-classes, pseudo-elements and attribute selectors never decide it
+    bare = re.sub(r'::?[\w-]+(\([^)]*\))?|\[[^\]]*\]', '', selector).strip()
+    compounds = [compound for compound in re.split(r'[\s>+~]+', bare) if compound]
+    if not compounds:
+        # :root and friends
+        return True
+    if len(compounds) == 1 and GLOBAL_COMPOUND_RE.fullmatch(compounds[0]):
+        return True
+    return any(
+        fnmatch(token, pattern)
+        for compound in compounds
+        for token in SIMPLE_SELECTOR_RE.findall(compound)
+        if token not in ('html', 'body', '*')
+        for pattern in patterns
+    )
+
+
+def extract_critical_css(css, patterns):
+    """Rules whose selectors touch the first screen, plus the keyframes and fonts they use"""
+    css = COMMENT_RE.sub('', css)
+    critical = []
+    keyframes = {}
+    animations = set()
+
+    for prelude, body in split_blocks(css):
+        if prelude.startswith('@media') or prelude.startswith('@supports'):
+            inner = extract_critical_css(body, patterns)
+            if inner:
+                critical.append(f'{prelude}{{{inner}}}')
+        elif prelude.startswith('@keyframes'):
+            keyframes[prelude.split()[-1]] = f'{prelude}{{{body}}}'
+        elif prelude.startswith('@font-face'):
+            critical.append(f'{prelude}{{{body}}}')
+        elif any(is_critical_selector(selector, patterns) for selector in prelude.split(',')):
+            critical.append(f'{prelude}{{{body}}}')
+            for value in ANIMATION_NAME_RE.findall(body):
+                animations.update(value.replace(',', ' ').split())
+
+    critical.extend(rule for name, rule in keyframes.items() if name in animations)
+    return minify_css('\n'.join(critical))
+
+
+def write_asset(output_dir, name, content):
+    path = os.path.join(output_dir, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return path
+
+
+def build_assets(output_dir=None):
+    """Write every bundle and the critical CSS; returns {name: size in bytes}"""
+    output_dir = output_dir or settings.STATICFILES_DIRS[0]
+    sizes = {}
+    css_sources = []
+    for name, sources in settings.ASSET_BUNDLES.items():
+        contents = []
+        for source in sources:
+            content = read_asset(source)
+            if content is None:
+                raise FileNotFoundError(f"Asset bundle {name}: {source} not found")
+            contents.append(content)
+
+        if name.endswith('.css'):
+            css_sources.extend(contents)
+            bundle = minify_css('\n'.join(contents))
+        else:
+            bundle = ';\n'.join(minify_js(content) for content in contents)
+        write_asset(output_dir, name, bundle)
+        sizes[name] = len(bundle.encode())
+
+    critical = extract_critical_css('\n'.join(css_sources), settings.CRITICAL_CSS_SELECTORS)
+    write_asset(output_dir, CRITICAL_CSS, critical)
+    sizes[CRITICAL_CSS] = len(critical.encode())
+    return sizes
+
+
+def bundle_sources(name):
+    """Static names to load for a bundle: the build output, or its sources if not built"""
+    if finders.find(name) or staticfiles_storage.exists(name):
+        return [name]
+    return list(settings.ASSET_BUNDLES[name])
@@ -0,0 +1,243 @@
+"""
+Caching helpers for the public portfolio page.
+
+Every cached value is stamped with a version kept in the shared cache.
+Bumping a version (see signals.py) makes every copy built from the old
+content unreachable at once, in every worker that shares the cache
+backend. There is one version for the whole page ("content") and one per
+model, keyed by the model's label. Sections of the page are also cached
+on their own, against the versions of just the models they show.
+
+Versions are nanosecond timestamps of the last change, so the content
+version doubles as the page's Last-Modified time.
+"""
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache, caches
+from django.db import connection
+from django.utils.connection import ConnectionProxy
+from django.utils.dateparse import parse_datetime
+
+from .models import (
+    Profile, ProfileImage, Education, Experience, Skill, Project, Testimonial, SiteSettings,
+    ImageDerivative,
+)
+from .routers import fresh_content_reads
+
+VERSION_KEY = 'portfolio:version:{name}'
+CONTENT_VERSION = 'content'
+HOME_PAGE_KEY = 'portfolio:home:{version}'
+HOME_PAGE_TIMEOUT = 60 * 60 * 24
+API_BODY_KEY = 'portfolio:api:{version}:{fields}'
+FRAGMENT_KEY = 'portfolio:fragment:{section}:{versions}'
+
+# Sections of index.html cached on their own, and the models each one shows.
+# Names match the PortfolioSnapshot fields they render, "hero" being the
+# profile with its slider images.
+FRAGMENT_SECTIONS = {
+    'hero': [Profile, ProfileImage, ImageDerivative],
+    'education': [Education],
+    'experiences': [Experience],
+    'skills': [Skill],
+    'projects': [Project, ImageDerivative],
+    'testimonials': [Testimonial, SiteSettings, ImageDerivative],
+}
+
+# Rendered into cached HTML in place of the CSRF token and swapped for the
+# visitor's own token on every response, so no token is shared between users.
+CSRF_PLACEHOLDER = '__portfolio_csrf_token__'
+
+# Rate limit buckets live in their own cache, so their churn never culls
+# the pages and version stamps kept in the default one
+counters = ConnectionProxy(caches, 'counters')
+# Metrics totals, in a cache nothing else writes to, so they are never culled
+metrics_cache = ConnectionProxy(caches, 'metrics')
+
+# Process-local copies of singleton rows: name -> (versions, instance)
+_singletons = {}
+
+
+def get_versions(*names):
+    """Current version of each name, created on first use"""
+    keys = [VERSION_KEY.format(name=name) for name in names]
+    found = cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        # Another worker may win the race; whatever it stored is used
+        for key in missing:
+            cache.add(key, time.time_ns(), None)
+        found.update(cache.get_many(missing))
+    return tuple(found.get(key) for key in keys)
+
+
+def bump_versions(*names):
+    """Invalidate everything cached against these versions"""
+    stamp = time.time_ns()
+    cache.set_many({VERSION_KEY.format(name=name): stamp for name in names}, None)
+
+
+def derive_content_version():
+    """
+    Content version computed from the database, for when none is cached.
+
+    One query covers every content model: the newest updated_at plus the
+    total row count, added in nanoseconds so a deletion that leaves the
+    newest timestamp alone still yields a different version.
+    """
+    qn = connection.ops.quote_name
+    sql = ' UNION ALL '.join(
+        f"SELECT MAX({qn(model._meta.get_field('updated_at').column)}), COUNT(*) "
+        f"FROM {qn(model._meta.db_table)}"
+        for model in (
+            Profile, ProfileImage, Education, Experience, Skill, Project, Testimonial, SiteSettings
+        )
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql)
+        rows = cursor.fetchall()
+
+    newest = 0
+    for timestamp, count in rows:
+        if isinstance(timestamp, str):
+            # SQLite hands raw cursors text
+            timestamp = parse_datetime(timestamp)
+        if timestamp is not None:
+            if timestamp.tzinfo is None:
+                timestamp = timestamp.replace(tzinfo=dt_timezone.utc)
+            newest = max(newest, int(timestamp.timestamp() * 1_000_000) * 1000)
+    return newest + sum(count for timestamp, count in rows)
+
+
+def get_content_version():
+    key = VERSION_KEY.format(name=CONTENT_VERSION)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, derive_content_version(), None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_content_version():
+    key = VERSION_KEY.format(name=CONTENT_VERSION)
+    version = await cache.aget(key)
+    if version is None:
+        # Rare (cold cache), and the derivation is a raw cursor query
+        version = await sync_to_async(get_content_version)()
+    return version
+
+
+def content_last_modified(version):
+    return datetime.fromtimestamp(version // 1_000_000_000, tz=dt_timezone.utc)
+
+
+def bump_content_version():
+    """Invalidate every page rendered from the previous content"""
+    bump_versions(CONTENT_VERSION)
+
+
+def get_cached_home_page(version):
+    return cache.get(HOME_PAGE_KEY.format(version=version))
+
+
+def set_cached_home_page(html, version):
+    cache.set(HOME_PAGE_KEY.format(version=version), html, HOME_PAGE_TIMEOUT)
+
+
+async def aget_cached_home_page(version):
+    return await cache.aget(HOME_PAGE_KEY.format(version=version))
+
+
+async def aset_cached_home_page(html, version):
+    await cache.aset(HOME_PAGE_KEY.format(version=version), html, HOME_PAGE_TIMEOUT)
+
+
+def get_cached_fragments():
+    """
+    {section: (cache key, html or None)} for every fragment of the page.
+
+    Each key is built from the versions of the models its section shows,
+    so a save re-renders only the sections that display that model. Costs
+    two cache reads whatever the number of sections.
+    """
+    labels = sorted({model._meta.label_lower for models in FRAGMENT_SECTIONS.values() for model in models})
+    versions = dict(zip(labels, get_versions(*labels)))
+    keys = {
+        section: FRAGMENT_KEY.format(
+            section=section,
+            versions='-'.join(str(versions[model._meta.label_lower]) for model in models),
+        )
+        for section, models in FRAGMENT_SECTIONS.items()
+    }
+    found = cache.get_many(keys.values())
+    return {section: (key, found.get(key)) for section, key in keys.items()}
+
+
+def stale_sections(fragments):
+    return [section for section, (key, html) in fragments.items() if html is None]
+
+
+def set_cached_fragment(key, html):
+    cache.set(key, html, HOME_PAGE_TIMEOUT)
+
+
+def get_cached_api_body(version, fields_key):
+    return cache.get(API_BODY_KEY.format(version=version, fields=fields_key))
+
+
+def set_cached_api_body(body, version, fields_key):
+    cache.set(API_BODY_KEY.format(version=version, fields=fields_key), body, HOME_PAGE_TIMEOUT)
+
+
+def cached_singleton(name, loader, models):
+    """
+    Return loader()'s result, reloading only when one of the models changed.
+
+    The instance lives in this process; only the version stamps are read
+    from the shared cache, so the steady state costs no queries and a save
+    in any worker is picked up by all of them. A reload after a recent save
+    reads the primary, so a replica's old row is never kept under the new
+    stamp.
+    """
+    versions = get_versions(*(model._meta.label_lower for model in models))
+    cached = _singletons.get(name)
+    if cached is not None and cached[0] == versions:
+        return cached[1]
+    # Versions are read before loading, so a concurrent save makes the
+    # stored copy stale and it is reloaded on the next call.
+    with fresh_content_reads(max(versions)):
+        instance = loader()
+    _singletons[name] = (versions, instance)
+    return instance
+
+
+async def acached_singleton(name, aloader, models):
+    """cached_singleton() for async code; both share the same process-local copies"""
+    versions = await sync_to_async(get_versions, thread_sensitive=False)(
+        *(model._meta.label_lower for model in models)
+    )
+    cached = _singletons.get(name)
+    if cached is not None and cached[0] == versions:
+        return cached[1]
+    with fresh_content_reads(max(versions)):
+        instance = await aloader()
+    _singletons[name] = (versions, instance)
+    return instance
+
+
+def get_profile():
+    """The Profile (with slider images prefetched), or None"""
+    return cached_singleton('profile', Profile.load, [Profile, ProfileImage])
+
+
+def get_site_settings():
+    return cached_singleton('site_settings', SiteSettings.load, [SiteSettings])
+
+
+async def aget_profile():
+    return await acached_singleton('profile', Profile.aload, [Profile, ProfileImage])
+
+
+async def aget_site_settings():
+    return await acached_singleton('site_settings', SiteSettings.aload, [SiteSettings])
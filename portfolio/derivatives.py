@@ -0,0 +1,141 @@
+"""
+Responsive image derivatives for uploaded media.
+
+After an upload is committed, a background thread hands the original to
+a process pool that resizes it with Pillow (see imaging.py). The results
+are stored under the source's content hash and recorded as
+ImageDerivative rows, which templates and the admin turn into srcset and
+thumbnail URLs.
+"""
+import hashlib
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections
+
+from .caching import CONTENT_VERSION, bump_versions
+from .imaging import resize_image
+from .models import Profile, ProfileImage, Project, Testimonial, ImageDerivative
+from .tasks import BoundedExecutor
+
+logger = logging.getLogger(__name__)
+
+# Image fields that get derivatives
+IMAGE_FIELDS = {
+    Profile: ['profile_image'],
+    ProfileImage: ['image'],
+    Project: ['image'],
+    Testimonial: ['avatar'],
+}
+
+derivative_executor = BoundedExecutor('image-derivatives', max_workers=1, max_queue=50)
+_pool = None
+
+
+def get_pool():
+    # Created lazily so a pool is never inherited across a fork; spawned
+    # children only import imaging.py, never Django
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.IMAGE_DERIVATIVE_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+        )
+    return _pool
+
+
+def resize(content):
+    widths = settings.IMAGE_DERIVATIVE_WIDTHS
+    formats = settings.IMAGE_DERIVATIVE_FORMATS
+    if not settings.IMAGE_DERIVATIVE_WORKERS:
+        return resize_image(content, widths, formats)
+    return get_pool().submit(resize_image, content, widths, formats).result()
+
+
+def image_sources(instance):
+    """Storage names of the instance's uploaded images"""
+    names = []
+    for field_name in IMAGE_FIELDS.get(type(instance), ()):
+        field_file = getattr(instance, field_name)
+        if field_file:
+            names.append(field_file.name)
+    return names
+
+
+def generate_derivatives(name):
+    """Create derivatives for one stored image; returns how many were made"""
+    if ImageDerivative.objects.filter(source=name).exists():
+        # Upload names are unique, so an existing set is never stale
+        return 0
+    if not default_storage.exists(name):
+        logger.warning("Image derivatives: %s not found in storage", name)
+        return 0
+    with default_storage.open(name, 'rb') as f:
+        content = f.read()
+
+    source_hash = hashlib.sha256(content).hexdigest()
+    stem = os.path.splitext(os.path.basename(name))[0]
+    derivatives = []
+    for width, height, fmt, data in resize(content):
+        extension = 'jpg' if fmt == 'jpeg' else fmt
+        derivative = ImageDerivative(
+            source=name, source_hash=source_hash, width=width, height=height, format=fmt,
+        )
+        derivative.file.save(
+            f"{source_hash[:16]}/{stem}-{width}.{extension}", ContentFile(data), save=False,
+        )
+        derivatives.append(derivative)
+    # A concurrent run for the same upload loses quietly
+    ImageDerivative.objects.bulk_create(derivatives, ignore_conflicts=True)
+    return len(derivatives)
+
+
+def derivatives_changed():
+    # Pages and sections rendered before now lack the new srcsets
+    bump_versions(CONTENT_VERSION, ImageDerivative._meta.label_lower)
+
+
+def build_derivatives(names):
+    try:
+        if sum(generate_derivatives(name) for name in names):
+            derivatives_changed()
+    finally:
+        # Worker threads must not keep their own connections open
+        connections.close_all()
+
+
+def schedule_derivatives(instance):
+    """Generate derivatives for the instance's images in the background"""
+    names = image_sources(instance)
+    if names:
+        return derivative_executor.submit(build_derivatives, names)
+    return None
+
+
+def add_derivative(derivatives, derivative):
+    formats = derivatives.setdefault(derivative.source, {})
+    formats.setdefault(derivative.format, []).append((derivative.width, derivative.file.url))
+
+
+def derivative_map(names):
+    """{source name: {format: [(width, url), ...]}} for the given images, in one query"""
+    derivatives = {}
+    names = [name for name in names if name]
+    if names:
+        for derivative in ImageDerivative.objects.filter(source__in=names):
+            add_derivative(derivatives, derivative)
+    return derivatives
+
+
+async def aderivative_map(names):
+    derivatives = {}
+    names = [name for name in names if name]
+    if names:
+        async for derivative in ImageDerivative.objects.filter(source__in=names):
+            add_derivative(derivatives, derivative)
+    return derivatives
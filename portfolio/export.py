@@ -0,0 +1,52 @@
+"""
+Streaming export of contact messages as CSV or JSONL.
+
+Rows are read with .iterator(chunk_size=...) and encoded one at a time,
+so memory stays flat however many messages are exported and the first
+bytes go out as soon as the first chunk is read. Records have the same
+shape as the retention archives (see archive.py).
+"""
+import csv
+import json
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .archive import RECORD_FIELDS, message_record
+
+EXPORT_CHUNK_SIZE = 2000
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+
+class Echo:
+    """File-like object that hands back what csv.writer writes to it"""
+
+    def write(self, value):
+        return value
+
+
+def export_lines(queryset, fmt, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield the export one line at a time"""
+    rows = queryset.values(*RECORD_FIELDS).iterator(chunk_size=chunk_size)
+    if fmt == 'jsonl':
+        for values in rows:
+            yield json.dumps(message_record(values), ensure_ascii=False) + '\n'
+        return
+
+    writer = csv.writer(Echo())
+    yield writer.writerow(RECORD_FIELDS)
+    for values in rows:
+        record = message_record(values)
+        yield writer.writerow([record[field] for field in RECORD_FIELDS])
+
+
+def export_response(queryset, fmt):
+    """Download of the queryset that starts sending before the query finishes"""
+    response = StreamingHttpResponse(export_lines(queryset, fmt), content_type=CONTENT_TYPES[fmt])
+    stamp = timezone.now().strftime('%Y%m%dT%H%M%S')
+    response['Content-Disposition'] = f'attachment; filename="contact-messages-{stamp}.{fmt}"'
+    return response
@@ -0,0 +1,41 @@
+"""
+Pillow resizing for uploaded images.
+
+Runs inside process pool workers, so this module must stay importable
+without Django being configured.
+"""
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+SAVE_OPTIONS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpeg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+
+
+def resize_image(content, widths, formats):
+    """
+    Return [(width, height, format, bytes), ...] for each requested width
+    narrower than the original, plus the original width when it is narrower
+    than the largest requested one. Images are never upscaled.
+    """
+    with Image.open(BytesIO(content)) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+
+        targets = sorted({width for width in widths if width < image.width})
+        if image.width <= max(widths):
+            targets.append(image.width)
+
+        results = []
+        for width in targets:
+            height = max(1, round(image.height * width / image.width))
+            resized = image.resize((width, height), Image.Resampling.LANCZOS)
+            for fmt in formats:
+                frame = resized.convert('RGB') if fmt == 'jpeg' else resized
+                buffer = BytesIO()
+                frame.save(buffer, **SAVE_OPTIONS[fmt])
+                results.append((width, height, fmt, buffer.getvalue()))
+        return results
@@ -0,0 +1,46 @@
+"""
+Shared pieces of the bench_* and stress_* commands.
+"""
+import math
+import os
+import tempfile
+from contextlib import contextmanager
+
+from django.db import connection
+
+# Every cache alias, in memory, so a run never touches the real cache directory
+LOCMEM_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'counters': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'counters'},
+    'metrics': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'metrics'},
+}
+
+
+def percentile(samples, pct):
+    """pct-th percentile of the samples, nearest rank"""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))]
+
+
+@contextmanager
+def throwaway_database(filename=None):
+    """
+    Point the default connection at a fresh test database for the block,
+    and drop it afterwards.
+
+    With a filename, SQLite's copy is that file in the temp directory
+    rather than in memory (other processes can open it, and in memory
+    would flatter every number); its path is yielded, None otherwise.
+    """
+    old_name = connection.settings_dict['NAME']
+    test_settings = connection.settings_dict['TEST']
+    old_test_name = test_settings.get('NAME')
+    path = None
+    if filename and connection.vendor == 'sqlite':
+        path = test_settings['NAME'] = os.path.join(tempfile.gettempdir(), filename)
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield path
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        test_settings['NAME'] = old_test_name
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+
+from portfolio.archive import archive_messages, archive_queryset
+
+
+class Command(BaseCommand):
+    help = "Move old contact messages into a gzipped JSONL archive and delete them"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than', type=int, default=None, metavar='DAYS',
+            help="Archive messages older than this many days (default: CONTACT_RETENTION_DAYS)",
+        )
+        parser.add_argument(
+            '--replied-only', action='store_true', default=None,
+            help="Only archive messages marked as replied (default: CONTACT_ARCHIVE_REPLIED_ONLY)",
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help="Messages per read and delete (default: CONTACT_ARCHIVE_BATCH_SIZE)",
+        )
+        parser.add_argument(
+            '--output-dir', default=None,
+            help="Directory for the archive file (default: CONTACT_ARCHIVE_DIR)",
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Only report how many messages would be archived",
+        )
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            count = archive_queryset(options['older_than'], options['replied_only']).count()
+            self.stdout.write(f"{count} messages would be archived")
+            return
+
+        count, path = archive_messages(
+            older_than_days=options['older_than'],
+            replied_only=options['replied_only'],
+            batch_size=options['batch_size'],
+            output_dir=options['output_dir'],
+        )
+        if path:
+            self.stdout.write(self.style.SUCCESS(f"Archived {count} messages to {path}"))
+        else:
+            self.stdout.write("No messages to archive")
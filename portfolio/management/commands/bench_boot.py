@@ -0,0 +1,121 @@
+import http.client
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+
+from portfolio.management.bench import LOCMEM_CACHES, throwaway_database
+
+from .bench_portfolio import seed_content
+
+VOLUMES = {'projects': 200, 'skills': 200, 'testimonials': 200, 'messages': 1000}
+
+# Extra gunicorn arguments per profile. 'default' runs from an empty
+# directory, so gunicorn doesn't find gunicorn.conf.py and uses its own defaults.
+PROFILES = {
+    'default': ['nischit_portfolio.wsgi:application'],
+    'shipped': ['-c', os.path.join(settings.BASE_DIR, 'gunicorn.conf.py')],
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def get_home(port):
+    """Seconds taken by GET / on a fresh connection"""
+    started = time.perf_counter()
+    client = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        client.request('GET', '/')
+        response = client.getresponse()
+        response.read()
+    finally:
+        client.close()
+    if response.status != 200:
+        raise CommandError(f"GET / returned {response.status}")
+    return time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = (
+        "Start gunicorn with its defaults and with gunicorn.conf.py against a throwaway "
+        "SQLite file, and report boot time and first request latency"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--settle', type=float, default=3,
+            help="Seconds between the port opening and the first request (default: 3)",
+        )
+        parser.add_argument('--requests', type=int, default=20, help="Requests after the first (default: 20)")
+        parser.add_argument(
+            '--profiles', nargs='+', choices=list(PROFILES), default=list(PROFILES),
+            help="Profiles to run (default: default shipped)",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("The default database is not SQLite")
+
+        with throwaway_database('bench_boot.sqlite3') as path:
+            with override_settings(CACHES=LOCMEM_CACHES):
+                seed_content(VOLUMES, random.Random(0))
+            connection.close()
+            rows = [(name, self.run(name, path, options)) for name in options['profiles']]
+
+        self.stdout.write(f"{'profile':<8} {'boot s':>7} {'first ms':>9} {'p50 ms':>7}")
+        for name, r in rows:
+            self.stdout.write(f"{name:<8} {r['boot']:>7.2f} {r['first'] * 1000:>9.1f} {r['p50'] * 1000:>7.1f}")
+
+    def run(self, name, path, options):
+        port = free_port()
+        with tempfile.TemporaryDirectory() as cache_dir, tempfile.TemporaryDirectory() as cwd, \
+                tempfile.TemporaryFile() as log:
+            env = {
+                **os.environ,
+                'DATABASE_URL': f'sqlite:///{path}',
+                # Cold, as after a deploy
+                'CACHE_DIR': cache_dir,
+            }
+            command = [
+                sys.executable, '-m', 'gunicorn', '-b', f'127.0.0.1:{port}',
+                '--pythonpath', str(settings.BASE_DIR), *PROFILES[name],
+            ]
+            started = time.perf_counter()
+            process = subprocess.Popen(command, cwd=cwd, env=env, stdout=log, stderr=subprocess.STDOUT)
+            try:
+                # Boot ends when the port accepts connections, which is
+                # when a platform health check would first pass
+                while True:
+                    if process.poll() is not None:
+                        log.seek(0)
+                        raise CommandError(f"gunicorn ({name}) exited:\n{log.read().decode()[-2000:]}")
+                    try:
+                        socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                        break
+                    except OSError:
+                        time.sleep(0.01)
+                boot = time.perf_counter() - started
+                time.sleep(options['settle'])
+                first = get_home(port)
+                timings = [get_home(port) for _ in range(options['requests'])]
+            finally:
+                process.terminate()
+                try:
+                    process.wait(timeout=30)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                    process.wait()
+        return {'boot': boot, 'first': first, 'p50': statistics.median(timings) if timings else 0.0}
@@ -0,0 +1,100 @@
+import random
+import statistics
+import string
+import time
+from functools import reduce
+from operator import or_
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from portfolio.management.bench import throwaway_database
+from portfolio.models import ContactMessage
+from portfolio.search import search_messages
+
+SEARCH_FIELDS = ['name', 'email', 'subject', 'message']
+COMMON_WORDS = ['project', 'website', 'django', 'hello', 'work', 'design', 'budget', 'help']
+
+
+def make_vocabulary(rng, size=5000):
+    return [
+        ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10))) for _ in range(size)
+    ]
+
+
+def make_messages(rng, vocabulary, start, count):
+    for i in range(start, start + count):
+        words = rng.choices(vocabulary, k=40) + rng.sample(COMMON_WORDS, 3)
+        rng.shuffle(words)
+        yield ContactMessage(
+            name=f"Visitor {i}",
+            email=f"visitor{i}@example.com",
+            subject=' '.join(words[:5]),
+            message=' '.join(words),
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare LIKE and full-text search over contact messages at several "
+        "inbox sizes, in a throwaway test database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+            help="Message counts to measure at (default: 10000 100000 1000000)",
+        )
+        parser.add_argument('--repeat', type=int, default=5, help="Runs per query (default: 5)")
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            self.run(sorted(options['sizes']), options['repeat'])
+
+    def run(self, sizes, repeat):
+        rng = random.Random(0)
+        vocabulary = make_vocabulary(rng)
+        terms = {
+            'common word': COMMON_WORDS[0],
+            'rare word': vocabulary[0],
+            'two words': f"{COMMON_WORDS[1]} {vocabulary[1]}",
+            'email': "visitor42@",
+        }
+
+        count = 0
+        for size in sizes:
+            while count < size:
+                batch = min(5000, size - count)
+                ContactMessage.objects.bulk_create(make_messages(rng, vocabulary, count, batch))
+                count += batch
+
+            self.stdout.write(f"\n{size} messages")
+            for label, term in terms.items():
+                like = self.time_search(self.like_search, term, repeat)
+                indexed = self.time_search(self.indexed_search, term, repeat)
+                self.stdout.write(
+                    f"  {label:<12} LIKE {like:8.1f} ms   full-text {indexed:8.1f} ms"
+                )
+
+    def like_search(self, term):
+        # What the admin does without the index: every word in any field
+        queryset = ContactMessage.objects.all()
+        for word in term.split():
+            queryset = queryset.filter(
+                reduce(or_, (Q(**{f'{field}__icontains': word}) for field in SEARCH_FIELDS))
+            )
+        return queryset.order_by('-created_at')
+
+    def indexed_search(self, term):
+        return search_messages(ContactMessage.objects.all(), term).order_by('search_rank', '-created_at')
+
+    def time_search(self, search, term, repeat):
+        """Median ms for the admin's first page plus its result count"""
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            queryset = search(term)
+            list(queryset[:100])
+            queryset.count()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
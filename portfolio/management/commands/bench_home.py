@@ -0,0 +1,129 @@
+import asyncio
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client, override_settings
+from django.urls import include, path
+
+from portfolio import views
+from portfolio.caching import HOME_PAGE_KEY
+from portfolio.management.bench import LOCMEM_CACHES, percentile, throwaway_database
+
+from .bench_portfolio import seed_content
+
+# The benchmark's own URLconf: both views side by side, plus the site's
+# own routes for the page's {% url %} tags
+urlpatterns = [
+    path('sync/', views.home),
+    path('async/', views.home_async),
+    path('', include('nischit_portfolio.urls')),
+]
+
+# What is measured: (client, path). 'asgi-sync' is the current view served
+# by an ASGI server, which runs it in a thread like any sync view.
+TARGETS = {
+    'wsgi': ('sync', 'sync/'),
+    'asgi-sync': ('async', 'sync/'),
+    'asgi': ('async', 'async/'),
+}
+
+
+class PageBypassCache(LocMemCache):
+    """Cache that never stores the rendered page, so every request renders it"""
+
+    def add(self, key, *args, **kwargs):
+        return key.startswith(HOME_PAGE_KEY.format(version='')) or super().add(key, *args, **kwargs)
+
+    def set(self, key, *args, **kwargs):
+        if not key.startswith(HOME_PAGE_KEY.format(version='')):
+            super().set(key, *args, **kwargs)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the sync home view under WSGI with the async one under ASGI "
+        "at several concurrency levels, in a throwaway test database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, nargs='+', default=[1, 10, 50],
+            help="Requests in flight at once (default: 1 10 50)",
+        )
+        parser.add_argument(
+            '--requests', type=int, default=200, help="Requests per run (default: 200)",
+        )
+        parser.add_argument(
+            '--rows', type=int, default=10,
+            help="Projects, skills and testimonials to seed (default: 10)",
+        )
+        parser.add_argument(
+            '--cached', action='store_true',
+            help="Serve from the page cache instead of rendering every request",
+        )
+
+    def handle(self, *args, **options):
+        backend = 'django.core.cache.backends.locmem.LocMemCache'
+        if not options['cached']:
+            backend = f'{__name__}.PageBypassCache'
+        with throwaway_database(), override_settings(
+            ROOT_URLCONF=__name__,
+            ALLOWED_HOSTS=['*'],
+            CACHES={**LOCMEM_CACHES, 'default': {'BACKEND': backend}},
+        ):
+            rows = options['rows']
+            volumes = {'projects': rows, 'skills': rows, 'testimonials': rows, 'messages': 0}
+            seed_content(volumes, random.Random(0))
+            self.run(options['concurrency'], options['requests'])
+
+    def run(self, concurrency_levels, total):
+        # Warm up both paths (templates, singletons, content version)
+        for target in TARGETS:
+            self.measure(target, 1, 5)
+
+        self.stdout.write(f"{'target':<10} {'conc':>5} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9}")
+        for concurrency in concurrency_levels:
+            for target in TARGETS:
+                elapsed, timings = self.measure(target, concurrency, total)
+                self.stdout.write(
+                    f"{target:<10} {concurrency:>5} {total / elapsed:>9.1f} "
+                    f"{statistics.median(timings):>9.1f} {percentile(timings, 95):>9.1f}"
+                )
+
+    def measure(self, target, concurrency, total):
+        """(wall seconds, per-request ms) for total requests, concurrency at a time"""
+        client, url = TARGETS[target]
+        started = time.perf_counter()
+        if client == 'sync':
+            timings = self.measure_sync(url, concurrency, total)
+        else:
+            timings = asyncio.run(self.measure_async(url, concurrency, total))
+        return time.perf_counter() - started, timings
+
+    def measure_sync(self, url, concurrency, total):
+        # A thread per in-flight request, as a threaded WSGI worker would use
+        def fetch(_):
+            started = time.perf_counter()
+            response = Client().get(f'/{url}')
+            assert response.status_code == 200, response.status_code
+            return (time.perf_counter() - started) * 1000
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return list(executor.map(fetch, range(total)))
+
+    async def measure_async(self, url, concurrency, total):
+        client = AsyncClient()
+        in_flight = asyncio.Semaphore(concurrency)
+
+        async def fetch():
+            async with in_flight:
+                started = time.perf_counter()
+                response = await client.get(f'/{url}')
+                assert response.status_code == 200, response.status_code
+                return (time.perf_counter() - started) * 1000
+
+        return list(await asyncio.gather(*(fetch() for _ in range(total))))
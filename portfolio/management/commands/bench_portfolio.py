@@ -0,0 +1,235 @@
+import json
+import random
+import statistics
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from portfolio.api import technology_key
+from portfolio.management.bench import LOCMEM_CACHES, percentile, throwaway_database
+from portfolio.caching import API_BODY_KEY, HOME_PAGE_KEY, get_cached_fragments, get_content_version
+from portfolio.models import (
+    Profile, ProfileImage, Education, Experience, Skill, Project, Testimonial, ContactMessage
+)
+
+from portfolio.technologies import rebuild_technologies
+
+from .bench_contact_search import make_messages, make_vocabulary
+
+SEED_BATCH_SIZE = 5000
+
+TECHNOLOGIES = [
+    "Django", "Python", "React", "TypeScript", "PostgreSQL", "SQLite", "Docker", "Redis",
+    "Celery", "HTMX", "Go", "Rust", "Kubernetes", "AWS", "Tailwind", "Vue", "Flask", "FastAPI",
+]
+
+
+def compare_results(baseline, results, threshold):
+    """Regressions of results against baseline, as readable lines"""
+    regressions = []
+    for name, before in baseline['endpoints'].items():
+        after = results['endpoints'].get(name)
+        if after is None:
+            continue
+        if after['p95_ms'] > before['p95_ms'] * (1 + threshold):
+            regressions.append(f"{name}: p95 {before['p95_ms']:.1f} -> {after['p95_ms']:.1f} ms")
+        if after['queries'] > before['queries']:
+            regressions.append(f"{name}: queries {before['queries']} -> {after['queries']}")
+        if after['peak_memory_kb'] > before['peak_memory_kb'] * (1 + threshold):
+            regressions.append(
+                f"{name}: peak memory {before['peak_memory_kb']} -> {after['peak_memory_kb']} KiB"
+            )
+    return regressions
+
+
+def bulk_seed(model, objects):
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) >= SEED_BATCH_SIZE:
+            model.objects.bulk_create(batch)
+            batch = []
+    model.objects.bulk_create(batch)
+
+
+def seed_content(volumes, rng):
+    # bulk_create() skips the save signals: nothing is invalidated or queued
+    profile = Profile.objects.create(name="Bench Person", email="bench@example.com")
+    ProfileImage.objects.bulk_create(
+        ProfileImage(profile=profile, image=f'profile/slider/{i}.jpg', order=i) for i in range(5)
+    )
+    Education.objects.bulk_create(
+        Education(institution=f"School {i}", degree="BSc", order=i) for i in range(5)
+    )
+    Experience.objects.bulk_create(
+        Experience(title=f"Role {i}", description="Work " * 40, order=i) for i in range(10)
+    )
+    categories = [choice for choice, label in Skill.CATEGORY_CHOICES]
+    bulk_seed(Skill, (
+        Skill(category=rng.choice(categories), name=f"Skill {i}", proficiency=rng.randint(1, 100), order=i)
+        for i in range(volumes['skills'])
+    ))
+    statuses = [choice for choice, label in Project.STATUS_CHOICES]
+    bulk_seed(Project, (
+        Project(
+            title=f"Project {i}", description="Built it " * 40,
+            technologies=", ".join(rng.sample(TECHNOLOGIES, rng.randint(1, 5))),
+            status=rng.choice(statuses), featured=i % 10 == 0, order=i,
+        )
+        for i in range(volumes['projects'])
+    ))
+    rebuild_technologies()
+    bulk_seed(Testimonial, (
+        Testimonial(name=f"Client {i}", position="CTO", testimonial="Great " * 30, order=i)
+        for i in range(volumes['testimonials'])
+    ))
+    bulk_seed(ContactMessage, make_messages(rng, make_vocabulary(rng), 0, volumes['messages']))
+
+
+def drop_cached_page():
+    # The section fragments too, or the "render" would only stitch cached HTML
+    keys = [key for key, html in get_cached_fragments().values()]
+    cache.delete_many([HOME_PAGE_KEY.format(version=get_content_version()), *keys])
+
+
+def drop_cached_projects():
+    cache.delete(API_BODY_KEY.format(version=get_content_version(), fields=technology_key('django')))
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the public and admin endpoints against large synthetic data "
+        "in a throwaway test database, optionally failing on regressions"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projects', type=int, default=2000, help="Projects to seed (default: 2000)")
+        parser.add_argument('--skills', type=int, default=2000, help="Skills to seed (default: 2000)")
+        parser.add_argument(
+            '--testimonials', type=int, default=2000, help="Testimonials to seed (default: 2000)",
+        )
+        parser.add_argument(
+            '--messages', type=int, default=1_000_000, help="Contact messages to seed (default: 1000000)",
+        )
+        parser.add_argument('--requests', type=int, default=50, help="Requests per endpoint (default: 50)")
+        parser.add_argument('--output', help="Write the results to this JSON file")
+        parser.add_argument('--baseline', help="Earlier --output file to compare against")
+        parser.add_argument(
+            '--threshold', type=float, default=0.2,
+            help="Allowed p95 and memory growth over the baseline (default: 0.2 = 20%%)",
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+        volumes = {name: options[name] for name in ('projects', 'skills', 'testimonials', 'messages')}
+
+        # On disk like the real database
+        with throwaway_database('bench_portfolio.sqlite3'), override_settings(
+            ALLOWED_HOSTS=['*'],
+            CACHES=LOCMEM_CACHES,
+            EMAIL_BACKEND='django.core.mail.backends.dummy.EmailBackend',
+            # Every contact POST is measured, none shed
+            CONTACT_RATE_LIMITS={},
+        ):
+            started = time.perf_counter()
+            seed_content(volumes, random.Random(0))
+            self.stdout.write(f"Seeded in {time.perf_counter() - started:.1f}s")
+            endpoints = self.run(options['requests'])
+
+        results = {
+            'created_at': timezone.now().isoformat(),
+            'vendor': connection.vendor,
+            'volumes': volumes,
+            'requests': options['requests'],
+            'endpoints': endpoints,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if baseline is not None:
+            regressions = compare_results(baseline, results, options['threshold'])
+            if regressions:
+                raise CommandError("Regressions against the baseline:\n  " + "\n  ".join(regressions))
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline"))
+
+    def endpoints(self):
+        """name -> (method, url, data, called before each request)"""
+        contact = {'name': "Visitor", 'email': "visitor@example.com", 'message': "Hello there"}
+        return {
+            'home': ('get', reverse('home'), None, None),
+            'home (render)': ('get', reverse('home'), None, drop_cached_page),
+            'api': ('get', reverse('portfolio-api'), None, None),
+            'projects by tech': ('get', reverse('projects'), {'tech': 'django'}, drop_cached_projects),
+            'contact POST': ('post', reverse('contact'), contact, None),
+            'admin messages': ('get', reverse('admin:portfolio_contactmessage_changelist'), None, None),
+            'admin messages search': (
+                'get', reverse('admin:portfolio_contactmessage_changelist'), {'q': 'project'}, None,
+            ),
+            'admin messages unread': (
+                'get', reverse('admin:portfolio_contactmessage_changelist'), {'is_read__exact': '0'}, None,
+            ),
+            'admin projects': ('get', reverse('admin:portfolio_project_changelist'), None, None),
+            'admin skills': ('get', reverse('admin:portfolio_skill_changelist'), None, None),
+        }
+
+    def run(self, requests):
+        client = Client()
+        client.force_login(get_user_model().objects.create_superuser('bench', 'bench@example.com', 'bench'))
+
+        self.stdout.write(
+            f"{'endpoint':<24} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8} "
+            f"{'peak KiB':>9} {'bytes':>9}"
+        )
+        results = {}
+        for name, (method, url, data, prepare) in self.endpoints().items():
+            send = getattr(client, method)
+
+            # One traced request for the query count and peak memory; tracing
+            # slows everything down, so it stays out of the timings
+            if prepare:
+                prepare()
+            tracemalloc.start()
+            with CaptureQueriesContext(connection) as queries:
+                response = send(url, data)
+            # Read now: the next request clears the connection's query log
+            query_count = len(queries)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            timings = []
+            for _ in range(requests):
+                if prepare:
+                    prepare()
+                started = time.perf_counter()
+                send(url, data)
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+
+            results[name] = {
+                'status': response.status_code,
+                'p50_ms': round(statistics.median(timings), 2),
+                'p95_ms': round(percentile(timings, 95), 2),
+                'p99_ms': round(percentile(timings, 99), 2),
+                'queries': query_count,
+                'peak_memory_kb': peak // 1024,
+                'response_bytes': len(response.content),
+            }
+            r = results[name]
+            self.stdout.write(
+                f"{name:<24} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} "
+                f"{r['queries']:>8} {r['peak_memory_kb']:>9} {r['response_bytes']:>9}"
+            )
+        return results
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from portfolio.assets import build_assets
+
+
+class Command(BaseCommand):
+    help = "Bundle and minify static assets and extract critical CSS (run before collectstatic)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', default=None,
+            help="Output directory (default: the first STATICFILES_DIRS entry)",
+        )
+
+    def handle(self, *args, **options):
+        for name, size in build_assets(options['output']).items():
+            self.stdout.write(f"{name}: {size} bytes")
+        self.stdout.write(self.style.SUCCESS("Assets built"))
@@ -0,0 +1,43 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from portfolio.derivatives import (
+    IMAGE_FIELDS, derivatives_changed, generate_derivatives, image_sources,
+)
+
+
+def generate_in_thread(name):
+    try:
+        return generate_derivatives(name)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Generate responsive image derivatives for every uploaded image that lacks them"
+
+    def handle(self, *args, **options):
+        names = []
+        for model in IMAGE_FIELDS:
+            for instance in model.objects.all():
+                names.extend(image_sources(instance))
+
+        # Threads only wait on the process pool, so keep as many as it has workers
+        created = failed = 0
+        with ThreadPoolExecutor(max_workers=max(settings.IMAGE_DERIVATIVE_WORKERS, 1)) as threads:
+            futures = {name: threads.submit(generate_in_thread, name) for name in names}
+            for name, future in futures.items():
+                try:
+                    created += future.result()
+                except Exception as error:
+                    failed += 1
+                    self.stderr.write(f"{name}: {error}")
+        if created:
+            derivatives_changed()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {created} derivatives for {len(names)} images ({failed} failed)"
+        ))
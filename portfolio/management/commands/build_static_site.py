@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from portfolio.static_site import brotli, build_static_site
+
+
+class Command(BaseCommand):
+    help = "Pre-render the public site from the database into a static directory"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', default=None,
+            help="Output directory (default: STATIC_SITE_ROOT)",
+        )
+
+    def handle(self, *args, **options):
+        if brotli is None:
+            raise CommandError(
+                "Brotli is not installed (pip install -r requirements.txt), so no .br variants would be written"
+            )
+        output_dir = options['output'] or settings.STATIC_SITE_ROOT
+        copied = build_static_site(output_dir)
+        self.stdout.write(self.style.SUCCESS(
+            f"Built static site in {output_dir} ({copied} assets copied)"
+        ))
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_date
+
+from portfolio.export import EXPORT_CHUNK_SIZE, export_lines
+from portfolio.models import ContactMessage
+from portfolio.search import search_messages
+
+
+class Command(BaseCommand):
+    help = "Stream contact messages to a CSV or JSONL file (or stdout)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=['csv', 'jsonl'], default='csv')
+        parser.add_argument('--output', default='-', help="File to write (default: stdout)")
+        parser.add_argument('--since', type=parse_date, default=None, help="Only messages from this date (YYYY-MM-DD)")
+        parser.add_argument('--replied', action='store_true', help="Only messages marked as replied")
+        parser.add_argument('--unread', action='store_true', help="Only messages not yet read")
+        parser.add_argument('--search', default='', help="Only messages matching this full-text search")
+        parser.add_argument(
+            '--chunk-size', type=int, default=EXPORT_CHUNK_SIZE,
+            help=f"Rows fetched per database round trip (default: {EXPORT_CHUNK_SIZE})",
+        )
+
+    def handle(self, *args, **options):
+        queryset = ContactMessage.objects.order_by('pk')
+        if options['since']:
+            queryset = queryset.filter(created_at__date__gte=options['since'])
+        if options['replied']:
+            queryset = queryset.filter(is_replied=True)
+        if options['unread']:
+            queryset = queryset.filter(is_read=False)
+        if options['search']:
+            queryset = search_messages(queryset, options['search'])
+            if queryset is None:
+                self.stderr.write("Nothing to search for in --search, or no full-text index on this database")
+                return
+
+        lines = export_lines(queryset, options['format'], chunk_size=options['chunk_size'])
+        if options['output'] == '-':
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        count = -1 if options['format'] == 'csv' else 0
+        with open(options['output'], 'w', encoding='utf-8', newline='') as f:
+            for line in lines:
+                f.write(line)
+                count += 1
+        self.stdout.write(self.style.SUCCESS(f"Exported {count} messages to {options['output']}"))
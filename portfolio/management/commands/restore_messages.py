@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from portfolio.archive import restore_messages
+
+
+class Command(BaseCommand):
+    help = "Restore contact messages from archives written by archive_messages"
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help="Archive files (.jsonl.gz)")
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help="Messages per insert (default: CONTACT_ARCHIVE_BATCH_SIZE)",
+        )
+
+    def handle(self, *args, **options):
+        for path in options['paths']:
+            count = restore_messages(path, batch_size=options['batch_size'])
+            # Messages that were never deleted are skipped, so re-running is safe
+            self.stdout.write(self.style.SUCCESS(f"Restored {count} messages from {path}"))
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from portfolio.outbox import drain_outbox
+
+
+class Command(BaseCommand):
+    help = "Deliver pending outbox emails in batches over a reused SMTP connection"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help="Emails per SMTP connection (default: OUTBOX_BATCH_SIZE)",
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help="Keep running and poll the outbox instead of exiting when it is empty",
+        )
+        parser.add_argument(
+            '--interval', type=float, default=10,
+            help="Seconds to sleep between polls with --loop (default: 10)",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            counts = drain_outbox(batch_size=options['batch_size'])
+            if counts['sent'] or counts['failed'] or options['verbosity'] > 1:
+                self.stdout.write(f"Sent {counts['sent']}, failed {counts['failed']}")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
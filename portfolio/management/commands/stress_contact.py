@@ -0,0 +1,87 @@
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError
+from urllib.parse import urlencode, urljoin
+from urllib.request import HTTPCookieProcessor, Request, build_opener
+
+from django.core.management.base import BaseCommand
+
+from portfolio.management.bench import percentile
+
+
+class Command(BaseCommand):
+    help = (
+        "Flood a running site's contact form with POSTs and report home page "
+        "latency before and during the flood"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help="Base URL of the running site, e.g. http://127.0.0.1:8000/")
+        parser.add_argument('--flooders', type=int, default=8, help="Concurrent POST threads (default: 8)")
+        parser.add_argument('--duration', type=float, default=10, help="Flood length in seconds (default: 10)")
+        parser.add_argument('--samples', type=int, default=50, help="Page views per phase (default: 50)")
+
+    def handle(self, *args, **options):
+        base_url = options['url']
+        opener = build_opener(HTTPCookieProcessor(CookieJar()))
+        with opener.open(urljoin(base_url, 'contact/')) as response:
+            token = json.load(response)['csrfToken']
+
+        baseline = self.measure_page_views(opener, base_url, options['samples'])
+
+        stop = threading.Event()
+        statuses = {}
+        lock = threading.Lock()
+
+        def flood(worker):
+            sent = 0
+            while not stop.is_set():
+                data = urlencode({
+                    'name': "Stress", 'email': f"stress{worker}-{sent}@example.com", 'message': "flood",
+                }).encode()
+                request = Request(urljoin(base_url, 'contact/'), data=data, headers={
+                    'X-CSRFToken': token, 'Referer': base_url,
+                })
+                try:
+                    with opener.open(request) as response:
+                        status = response.status
+                except HTTPError as e:
+                    status = e.code
+                sent += 1
+                with lock:
+                    statuses[status] = statuses.get(status, 0) + 1
+
+        with ThreadPoolExecutor(max_workers=options['flooders']) as pool:
+            for worker in range(options['flooders']):
+                pool.submit(flood, worker)
+            try:
+                started = time.monotonic()
+                under_flood = self.measure_page_views(opener, base_url, options['samples'])
+                time.sleep(max(0, options['duration'] - (time.monotonic() - started)))
+            finally:
+                stop.set()
+
+        self.report("Baseline", baseline)
+        self.report("Under flood", under_flood)
+        self.stdout.write("POST responses: " + ", ".join(
+            f"{status}: {count}" for status, count in sorted(statuses.items())
+        ))
+
+    def measure_page_views(self, opener, base_url, samples):
+        timings = []
+        for _ in range(samples):
+            started = time.perf_counter()
+            with opener.open(base_url) as response:
+                response.read()
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
+
+    def report(self, label, timings):
+        self.stdout.write(
+            f"{label}: p50 {statistics.median(timings):.1f} ms, "
+            f"p95 {percentile(timings, 95):.1f} ms, max {max(timings):.1f} ms"
+        )
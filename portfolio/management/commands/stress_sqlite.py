@@ -0,0 +1,148 @@
+import multiprocessing
+import random
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connection, connections, transaction
+from django.test import override_settings
+
+from portfolio.caching import get_site_settings
+from portfolio.models import ContactMessage
+from portfolio.notifications import enqueue_contact_notification
+from portfolio.snapshot import load_portfolio_snapshot
+
+from portfolio.management.bench import LOCMEM_CACHES, percentile, throwaway_database
+
+from .bench_portfolio import seed_content
+
+# Connection OPTIONS per mode; 'tuned' is what SQLITE_TUNING=1 sets
+MODES = {
+    'stock': {},
+    'tuned': {'transaction_mode': 'IMMEDIATE', 'timeout': settings.SQLITE_BUSY_TIMEOUT},
+}
+
+VOLUMES = {'projects': 200, 'skills': 200, 'testimonials': 200, 'messages': 20_000}
+
+
+def read_page(rng):
+    # What a page render reads (the singletons come from the cache), plus
+    # the unread count an editor's inbox shows
+    load_portfolio_snapshot()
+    ContactMessage.objects.filter(is_read=False).count()
+
+
+def write_message(rng):
+    if rng.random() < 0.5:
+        # A contact submission, as the contact view saves it
+        with transaction.atomic():
+            message = ContactMessage.objects.create(
+                name="Visitor", email="visitor@example.com", message="Hello there " * 20,
+            )
+            enqueue_contact_notification(message, get_site_settings().contact_email)
+    else:
+        # An admin edit: the change view reads the row, then saves it, in one transaction
+        with transaction.atomic():
+            message = ContactMessage.objects.order_by('?').first()
+            message.is_read = not message.is_read
+            message.save(update_fields=['is_read'])
+
+
+def worker(mode, role, seconds, seed, results):
+    """Run one role in a loop for seconds; runs in a forked process"""
+    connections[DEFAULT_DB_ALIAS].settings_dict['OPTIONS'] = dict(MODES[mode])
+    operation = read_page if role == 'read' else write_message
+    rng = random.Random(seed)
+    done, failures, errors, timings = 0, 0, {}, []
+    with override_settings(SQLITE_TUNING=mode == 'tuned'):
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                operation(rng)
+            except OperationalError as e:
+                failures += 1
+                errors[str(e)] = errors.get(str(e), 0) + 1
+                continue
+            timings.append((time.perf_counter() - started) * 1000)
+            done += 1
+    connections.close_all()
+    results.put({'role': role, 'done': done, 'failures': failures, 'errors': errors, 'timings': timings})
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer a throwaway SQLite file with reader and writer processes, "
+        "with and without SQLITE_TUNING, and report throughput and failed writes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4, help="Reader processes (default: 4)")
+        parser.add_argument('--writers', type=int, default=4, help="Writer processes (default: 4)")
+        parser.add_argument('--seconds', type=float, default=10, help="Length of each run (default: 10)")
+        parser.add_argument(
+            '--modes', nargs='+', choices=list(MODES), default=list(MODES),
+            help="Modes to run (default: stock tuned)",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("The default database is not SQLite")
+
+        with throwaway_database('stress_sqlite.sqlite3') as path, override_settings(CACHES=LOCMEM_CACHES):
+            seed_content(VOLUMES, random.Random(0))
+            # Warm the singletons in the parent, so every fork inherits them
+            get_site_settings()
+            load_portfolio_snapshot()
+            rows = []
+            for mode in options['modes']:
+                rows.append((mode, self.run(mode, path, options)))
+
+        self.stdout.write(
+            f"{'mode':<6} {'reads/s':>9} {'read p95':>9} {'writes/s':>9} {'write p95':>10} "
+            f"{'failed r':>9} {'failed w':>9}"
+        )
+        for mode, r in rows:
+            self.stdout.write(
+                f"{mode:<6} {r['reads/s']:>9.1f} {r['read p95']:>9.1f} {r['writes/s']:>9.1f} "
+                f"{r['write p95']:>10.1f} {r['failed reads']:>9} {r['failed writes']:>9}"
+            )
+            for error, count in sorted(r['errors'].items()):
+                self.stdout.write(f"       {count} x {error}")
+
+        tuned = dict(rows).get('tuned')
+        if tuned and (tuned['failed writes'] or tuned['failed reads']):
+            raise CommandError("Operations failed with SQLITE_TUNING on")
+
+    def run(self, mode, path, options):
+        # The journal mode is stored in the file: put back the default for the stock run
+        raw = sqlite3.connect(path)
+        raw.execute('PRAGMA journal_mode = WAL' if mode == 'tuned' else 'PRAGMA journal_mode = DELETE')
+        raw.close()
+        connections.close_all()
+
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        roles = ['read'] * options['readers'] + ['write'] * options['writers']
+        processes = [
+            context.Process(target=worker, args=(mode, role, options['seconds'], i, results))
+            for i, role in enumerate(roles)
+        ]
+        for process in processes:
+            process.start()
+        reports = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+        summary = {'errors': {}}
+        for role, name in (('read', 'reads'), ('write', 'writes')):
+            mine = [report for report in reports if report['role'] == role]
+            timings = sorted(t for report in mine for t in report['timings'])
+            summary[f'{name}/s'] = sum(report['done'] for report in mine) / options['seconds']
+            summary[f'{role} p95'] = percentile(timings, 95) if timings else 0.0
+            summary[f'failed {name}'] = sum(report['failures'] for report in mine)
+            for report in mine:
+                for error, count in report['errors'].items():
+                    summary['errors'][error] = summary['errors'].get(error, 0) + count
+        return summary
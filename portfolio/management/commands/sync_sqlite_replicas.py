@@ -0,0 +1,37 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the SQLite primary over every SQLite replica, to try replica "
+        "routing locally (real replicas are kept in sync by the database server)"
+    )
+
+    def handle(self, *args, **options):
+        primary = connections[DEFAULT_DB_ALIAS].settings_dict
+        if primary['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError("The primary is not SQLite")
+        if not settings.REPLICA_DATABASES:
+            raise CommandError("No replicas configured (DATABASE_REPLICA_URLS)")
+
+        source = sqlite3.connect(primary['NAME'])
+        try:
+            for alias in settings.REPLICA_DATABASES:
+                replica = connections[alias].settings_dict
+                if replica['ENGINE'] != 'django.db.backends.sqlite3':
+                    self.stderr.write(f"{alias}: not SQLite, skipped")
+                    continue
+                connections[alias].close()
+                # The backup API gives a consistent copy even while the primary is in use
+                target = sqlite3.connect(replica['NAME'])
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f"{alias}: copied to {replica['NAME']}")
+        finally:
+            source.close()
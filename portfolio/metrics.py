@@ -0,0 +1,317 @@
+"""
+Request metrics: Server-Timing headers and a Prometheus text endpoint.
+
+RequestMetricsMiddleware times each request and the phases inside it:
+database time and query count (an execute wrapper on every connection),
+and template rendering (wrapped around the page renders in views.py).
+Staff users get the breakdown in a Server-Timing header on every
+response.
+
+Totals are kept in a per-process registry. Every METRICS_FLUSH_SECONDS
+each worker writes a copy of its totals to the shared "metrics" cache
+under its own key, and /metrics sums the copies of the live workers, in
+the way prometheus_client's multiprocess mode sums per-process files.
+Nothing else writes to that cache, so it never culls them. When a
+scrape finds a worker's process gone (recycled after max_requests, or
+killed), its last copy is folded into one running total of retired
+workers and its key deleted. The summed counters only go up, and the
+keys stay as many as the live workers. Pids are checked with
+os.kill(pid, 0), so the cache must be per host, as the file cache is.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .caching import metrics_cache
+
+WORKERS_KEY = 'portfolio:metrics:workers'
+WORKER_KEY = 'portfolio:metrics:worker:{worker}'
+RETIRED_KEY = 'portfolio:metrics:retired'
+
+# Upper bounds, in seconds, of the latency histogram buckets
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# name -> (type, help)
+METRICS = {
+    'portfolio_request_duration_seconds': ('histogram', "Time spent serving requests"),
+    'portfolio_request_db_seconds_total': ('counter', "Time spent in database queries"),
+    'portfolio_request_db_queries_total': ('counter', "Database queries run by requests"),
+    'portfolio_request_template_seconds_total': ('counter', "Time spent rendering page templates"),
+    'portfolio_fragment_renders_total': ('counter', "Page sections served from the fragment cache (hit) or rendered (miss)"),
+    'portfolio_mail_send_seconds': ('histogram', "Time spent sending one email"),
+    'portfolio_executor_jobs_total': ('counter', "Background executor jobs, by outcome"),
+    'portfolio_executor_queue_depth': ('gauge', "Jobs waiting in the scraped worker's background executor"),
+    'portfolio_contact_shed_total': ('counter', "Contact submissions turned away by rate limits"),
+}
+
+# Phase timings of the request being served, or None outside a request
+current_request = ContextVar('portfolio_request_metrics', default=None)
+
+
+class Registry:
+    """Counters and histograms of this process, keyed by (name, labels)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def inc(self, name, labels, amount=1):
+        key = (name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        key = (name, labels)
+        with self._lock:
+            # Per-bucket counts (the last one is +Inf), then the sum
+            histogram = self.histograms.setdefault(key, [0] * (len(BUCKETS) + 1) + [0.0])
+            for i, bound in enumerate(BUCKETS):
+                if value <= bound:
+                    break
+            else:
+                i = len(BUCKETS)
+            histogram[i] += 1
+            histogram[-1] += value
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': dict(self.counters),
+                'histograms': {key: list(value) for key, value in self.histograms.items()},
+            }
+
+
+registry = Registry()
+_worker = {'pid': None, 'id': None, 'flushed_at': 0.0}
+
+
+def worker_id():
+    # Checked against the pid: a registry imported before a fork starts
+    # out empty, but the id must differ per worker
+    if _worker['pid'] != os.getpid():
+        _worker.update(pid=os.getpid(), id=f'{os.getpid()}-{time.time_ns()}', flushed_at=0.0)
+    return _worker['id']
+
+
+def merge(totals, snapshot):
+    """Add a snapshot's counters and histograms into totals, in place"""
+    for key, value in snapshot['counters'].items():
+        totals['counters'][key] = totals['counters'].get(key, 0) + value
+    for key, value in snapshot['histograms'].items():
+        merged = totals['histograms'].get(key, [0] * len(value))
+        totals['histograms'][key] = [a + b for a, b in zip(merged, value)]
+    return totals
+
+
+def is_running(worker):
+    pid = int(worker.split('-')[0])
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Someone else's process
+        return True
+    return True
+
+
+def retire_exited_workers():
+    """Fold the copies of workers whose process is gone into the retired total"""
+    workers = metrics_cache.get(WORKERS_KEY, [])
+    exited = [worker for worker in workers if not is_running(worker)]
+    if not exited:
+        return
+    keys = [WORKER_KEY.format(worker=worker) for worker in exited]
+    retired = metrics_cache.get(RETIRED_KEY) or {'counters': {}, 'histograms': {}}
+    for snapshot in metrics_cache.get_many(keys).values():
+        merge(retired, snapshot)
+    metrics_cache.set(RETIRED_KEY, retired, None)
+    metrics_cache.set(WORKERS_KEY, [worker for worker in workers if worker not in exited], None)
+    metrics_cache.delete_many(keys)
+
+
+def flush_due():
+    # worker_id() first, so a freshly forked worker counts as never flushed
+    worker_id()
+    return time.monotonic() - _worker['flushed_at'] >= settings.METRICS_FLUSH_SECONDS
+
+
+def flush(force=False):
+    """Copy this worker's totals to the shared cache, at most every METRICS_FLUSH_SECONDS"""
+    if not force and not flush_due():
+        return
+    worker = worker_id()
+    _worker['flushed_at'] = time.monotonic()
+    metrics_cache.set(WORKER_KEY.format(worker=worker), registry.snapshot(), None)
+    workers = metrics_cache.get(WORKERS_KEY, [])
+    if worker not in workers:
+        # Read-modify-write: two workers registering at once can race, so
+        # check again on the next flush
+        metrics_cache.set(WORKERS_KEY, workers + [worker], None)
+        _worker['flushed_at'] = 0.0
+
+
+@contextmanager
+def timed_phase(phase):
+    """Add the time spent in the block to a phase of the current request"""
+    timings = current_request.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings[phase] = timings.get(phase, 0.0) + time.perf_counter() - started
+
+
+def record_query(execute, sql, params, many, context):
+    timings = current_request.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings['db'] = timings.get('db', 0.0) + time.perf_counter() - started
+        timings['queries'] = timings.get('queries', 0) + 1
+
+
+def install_query_timer(sender, connection, **kwargs):
+    # connection_created fires again on every reconnect of the same wrapper
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def observe_mail(seconds, result):
+    registry.observe('portfolio_mail_send_seconds', (('result', result),), seconds)
+
+
+def server_timing(timings, total):
+    parts = []
+    if 'db' in timings:
+        parts.append(f'db;dur={timings["db"] * 1000:.1f};desc="{timings["queries"]} queries"')
+    if 'template' in timings:
+        parts.append(f'template;dur={timings["template"] * 1000:.1f}')
+    parts.append(f'total;dur={total * 1000:.1f}')
+    return ', '.join(parts)
+
+
+class RequestMetricsMiddleware:
+    """
+    Times every request; goes first in MIDDLEWARE so the total covers the rest.
+
+    Runs in the server's own mode, like Django's middleware: under ASGI it
+    is a coroutine, so the async view is reached without a thread hop.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timings = {}
+        token = current_request.set(timings)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_request.reset(token)
+        total = time.perf_counter() - started
+        self.record(request, response, timings, total, getattr(request, 'user', None))
+        flush()
+        return response
+
+    async def __acall__(self, request):
+        timings = {}
+        token = current_request.set(timings)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_request.reset(token)
+        total = time.perf_counter() - started
+        user = await request.auser() if hasattr(request, 'auser') else None
+        self.record(request, response, timings, total, user)
+        # The flush writes files: off the event loop, and only when one is due
+        if flush_due():
+            await sync_to_async(flush, thread_sensitive=False)()
+        return response
+
+    def record(self, request, response, timings, total, user):
+        match = request.resolver_match
+        # Unmatched URLs share one label, so scanners can't grow the series
+        labels = (('view', match.view_name if match else 'unmatched'), ('status', str(response.status_code)))
+        registry.observe('portfolio_request_duration_seconds', labels, total)
+        if 'db' in timings:
+            registry.inc('portfolio_request_db_seconds_total', labels[:1], timings['db'])
+            registry.inc('portfolio_request_db_queries_total', labels[:1], timings['queries'])
+        if 'template' in timings:
+            registry.inc('portfolio_request_template_seconds_total', labels[:1], timings['template'])
+
+        if user is not None and user.is_staff:
+            response['Server-Timing'] = server_timing(timings, total)
+
+
+def format_labels(labels):
+    return '{' + ','.join(f'{name}="{value}"' for name, value in labels) + '}' if labels else ''
+
+
+def collect():
+    """Totals of the live workers and the retired ones, plus this worker's gauges"""
+    from .notifications import notification_executor
+    from .ratelimit import shed_counts
+
+    flush(force=True)
+    retire_exited_workers()
+    workers = metrics_cache.get(WORKERS_KEY, [])
+    keys = [RETIRED_KEY] + [WORKER_KEY.format(worker=worker) for worker in workers]
+    found = metrics_cache.get_many(keys)
+    totals = {'counters': {}, 'histograms': {}}
+    for snapshot in found.values():
+        merge(totals, snapshot)
+    values = totals['counters']
+
+    # Executor stats are this worker's own; shed counts already live in the cache
+    stats = notification_executor.stats()
+    for outcome in ('submitted', 'completed', 'failed', 'dropped'):
+        labels = (('executor', notification_executor.name), ('outcome', outcome))
+        values[('portfolio_executor_jobs_total', labels)] = stats[outcome]
+    values[('portfolio_executor_queue_depth', (('executor', notification_executor.name),))] = stats['queue_depth']
+    for scope, count in shed_counts().items():
+        values[('portfolio_contact_shed_total', (('scope', scope),))] = count
+    return values, totals['histograms']
+
+
+def render_metrics():
+    """Prometheus text exposition format"""
+    counters, histograms = collect()
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+        for (metric, labels), value in sorted(counters.items()):
+            if metric == name:
+                lines.append(f'{name}{format_labels(labels)} {value}')
+        for (metric, labels), value in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(BUCKETS + ('+Inf',), value[:-1]):
+                cumulative += count
+                lines.append(f'{name}_bucket{format_labels(labels + (("le", str(bound)),))} {cumulative}')
+            lines.append(f'{name}_sum{format_labels(labels)} {value[-1]:.6f}')
+            lines.append(f'{name}_count{format_labels(labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
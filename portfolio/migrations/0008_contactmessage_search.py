@@ -0,0 +1,80 @@
+from django.db import migrations
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE portfolio_contactmessage_fts USING fts5(
+        name, email, subject, message,
+        content='portfolio_contactmessage', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER portfolio_contactmessage_fts_insert AFTER INSERT ON portfolio_contactmessage BEGIN
+        INSERT INTO portfolio_contactmessage_fts(rowid, name, email, subject, message)
+        VALUES (new.id, new.name, new.email, new.subject, new.message);
+    END
+    """,
+    """
+    CREATE TRIGGER portfolio_contactmessage_fts_delete AFTER DELETE ON portfolio_contactmessage BEGIN
+        INSERT INTO portfolio_contactmessage_fts(portfolio_contactmessage_fts, rowid, name, email, subject, message)
+        VALUES ('delete', old.id, old.name, old.email, old.subject, old.message);
+    END
+    """,
+    # Only text changes touch the index; marking a message read does not
+    """
+    CREATE TRIGGER portfolio_contactmessage_fts_update
+    AFTER UPDATE OF name, email, subject, message ON portfolio_contactmessage BEGIN
+        INSERT INTO portfolio_contactmessage_fts(portfolio_contactmessage_fts, rowid, name, email, subject, message)
+        VALUES ('delete', old.id, old.name, old.email, old.subject, old.message);
+        INSERT INTO portfolio_contactmessage_fts(rowid, name, email, subject, message)
+        VALUES (new.id, new.name, new.email, new.subject, new.message);
+    END
+    """,
+    # Index the messages that already exist
+    "INSERT INTO portfolio_contactmessage_fts(portfolio_contactmessage_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS portfolio_contactmessage_fts_insert",
+    "DROP TRIGGER IF EXISTS portfolio_contactmessage_fts_delete",
+    "DROP TRIGGER IF EXISTS portfolio_contactmessage_fts_update",
+    "DROP TABLE IF EXISTS portfolio_contactmessage_fts",
+]
+
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE portfolio_contactmessage ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(email, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(subject, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(message, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX portfolio_contactmessage_search ON portfolio_contactmessage USING GIN (search_vector)",
+]
+
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS portfolio_contactmessage_search",
+    "ALTER TABLE portfolio_contactmessage DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def run_for_vendor(sqlite, postgres):
+    def run(apps, schema_editor):
+        # Other backends keep the admin's LIKE search
+        statements = {'sqlite': sqlite, 'postgresql': postgres}.get(schema_editor.connection.vendor, [])
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0007_imagederivative'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor(SQLITE_FORWARD, POSTGRES_FORWARD),
+            run_for_vendor(SQLITE_BACKWARD, POSTGRES_BACKWARD),
+        ),
+    ]
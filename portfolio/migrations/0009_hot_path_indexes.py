@@ -0,0 +1,61 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0008_contactmessage_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contactmessage',
+            index=models.Index(fields=['-created_at', '-id'], name='portfolio_c_created_4aef9f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contactmessage',
+            index=models.Index(fields=['is_read', '-created_at', '-id'], name='portfolio_c_is_read_982089_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contactmessage',
+            index=models.Index(fields=['is_replied', '-created_at', '-id'], name='portfolio_c_is_repl_662dc4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='education',
+            index=models.Index(fields=['order', '-start_date', '-id'], name='portfolio_e_order_c4d7ef_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='experience',
+            index=models.Index(fields=['order', '-start_date', '-id'], name='portfolio_e_order_798786_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='profileimage',
+            index=models.Index(fields=['profile', 'order', 'created_at'], name='portfolio_p_profile_118a82_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['order', '-created_at', '-id', 'status'], name='portfolio_p_order_155b67_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='skill',
+            index=models.Index(fields=['category', 'order', '-id'], name='portfolio_s_categor_7a5dcb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='skill',
+            index=models.Index(fields=['order', 'category'], name='portfolio_s_order_8a4ce7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testimonial',
+            index=models.Index(fields=['order', '-created_at', '-id'], name='portfolio_t_order_4b208b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testimonial',
+            index=models.Index(fields=['is_active', 'order', '-created_at', '-id'], name='portfolio_t_is_acti_7b70f3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testimonial',
+            index=models.Index(fields=['rating'], name='portfolio_t_rating_c4c549_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0009_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Technology',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('slug', models.CharField(help_text='Lowercase name, as in /projects/?tech=', max_length=50, unique=True)),
+                ('project_count', models.PositiveIntegerField(default=0, editable=False, help_text='Public projects using it')),
+            ],
+            options={
+                'verbose_name': 'Technology',
+                'verbose_name_plural': 'Technologies',
+                'ordering': ['-project_count', 'name'],
+                'indexes': [models.Index(fields=['-project_count', 'name'], name='portfolio_t_project_d6f518_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='tags',
+            field=models.ManyToManyField(blank=True, editable=False, related_name='projects', to='portfolio.technology'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+from django.db import migrations
+
+PUBLIC_STATUSES = ['completed', 'in_progress']
+
+
+def parse_technologies(apps, schema_editor):
+    # A copy of technologies.py as it was, since migrations run against
+    # historical models
+    Project = apps.get_model('portfolio', 'Project')
+    Technology = apps.get_model('portfolio', 'Technology')
+    Through = Project.tags.through
+
+    technologies = {}
+    links = []
+    counts = {}
+    for project in Project.objects.order_by('pk').iterator():
+        seen = set()
+        for name in (project.technologies or '').split(','):
+            name = ' '.join(name.split())
+            slug = '-'.join(name.lower().split())
+            if not slug or slug in seen:
+                continue
+            seen.add(slug)
+            technologies.setdefault(slug, name[:50])
+            links.append((project.pk, slug))
+            if project.status in PUBLIC_STATUSES:
+                counts[slug] = counts.get(slug, 0) + 1
+
+    Technology.objects.bulk_create(
+        Technology(slug=slug, name=name, project_count=counts.get(slug, 0))
+        for slug, name in technologies.items()
+    )
+    by_slug = dict(Technology.objects.values_list('slug', 'pk'))
+    Through.objects.bulk_create(
+        (Through(project_id=pk, technology_id=by_slug[slug]) for pk, slug in links),
+        batch_size=5000,
+    )
+
+
+def clear_technologies(apps, schema_editor):
+    apps.get_model('portfolio', 'Technology').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0010_technology'),
+    ]
+
+    operations = [
+        migrations.RunPython(parse_technologies, clear_technologies),
+    ]
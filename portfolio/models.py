@@ -1,5 +1,6 @@
 from django.db import models
 from django.core.validators import URLValidator
+from django.utils import timezone
 
 # Create your models here.
 
@@ -31,6 +32,15 @@ class Profile(models.Model):
     def __str__(self):
         return self.name
 
+    @classmethod
+    def load(cls):
+        # Only one profile is expected; the admin blocks adding a second
+        return cls.objects.prefetch_related('images').first()
+
+    @classmethod
+    async def aload(cls):
+        return await cls.objects.prefetch_related('images').afirst()
+
 
 class ProfileImage(models.Model):
     """Additional profile images for slider"""
@@ -39,9 +49,11 @@ class ProfileImage(models.Model):
     order = models.IntegerField(default=0, help_text="Order in slider (after the main profile image)")
     
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['order', 'created_at']
+        indexes = [models.Index(fields=['profile', 'order', 'created_at'])]
         verbose_name = "Profile Image"
         verbose_name_plural = "Profile Images"
         
@@ -61,9 +73,12 @@ class Education(models.Model):
     order = models.IntegerField(default=0, help_text="Display order")
     
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['order', '-start_date']
+        # The admin changelist adds -id to make the order total
+        indexes = [models.Index(fields=['order', '-start_date', '-id'])]
         verbose_name = "Education"
         verbose_name_plural = "Education"
     
@@ -87,6 +102,8 @@ class Experience(models.Model):
     
     class Meta:
         ordering = ['order', '-start_date']
+        # The admin changelist adds -id to make the order total
+        indexes = [models.Index(fields=['order', '-start_date', '-id'])]
         verbose_name = "Experience"
         verbose_name_plural = "Experiences"
     
@@ -116,6 +133,11 @@ class Skill(models.Model):
     
     class Meta:
         ordering = ['category', 'order']
+        indexes = [
+            models.Index(fields=['category', 'order', '-id']),
+            # The page lists skills by order
+            models.Index(fields=['order', 'category']),
+        ]
         verbose_name = "Skill"
         verbose_name_plural = "Skills"
     
@@ -123,6 +145,26 @@ class Skill(models.Model):
         return f"{self.get_category_display()}: {self.name}"
 
 
+class Technology(models.Model):
+    """A technology projects are tagged with, parsed from Project.technologies"""
+    name = models.CharField(max_length=50)
+    slug = models.CharField(max_length=50, unique=True, help_text="Lowercase name, as in /projects/?tech=")
+    project_count = models.PositiveIntegerField(default=0, editable=False, help_text="Public projects using it")
+
+    class Meta:
+        ordering = ['-project_count', 'name']
+        indexes = [models.Index(fields=['-project_count', 'name'])]
+        verbose_name = "Technology"
+        verbose_name_plural = "Technologies"
+
+    def __str__(self):
+        return self.name
+
+    @staticmethod
+    def slug_for(name):
+        return '-'.join(name.lower().split())
+
+
 class Project(models.Model):
     """Portfolio projects"""
     STATUS_CHOICES = [
@@ -130,6 +172,8 @@ class Project(models.Model):
         ('in_progress', 'In Progress'),
         ('planned', 'Planned'),
     ]
+    # Shown on the page; planned projects are not
+    PUBLIC_STATUSES = ['completed', 'in_progress']
     
     title = models.CharField(max_length=200)
     description = models.TextField()
@@ -138,6 +182,8 @@ class Project(models.Model):
     github_url = models.URLField(blank=True, help_text="GitHub repository URL")
     
     technologies = models.CharField(max_length=300, help_text="Comma-separated list of technologies used")
+    # Kept in step with technologies on every save (see technologies.py)
+    tags = models.ManyToManyField(Technology, related_name='projects', blank=True, editable=False)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='completed')
     
     featured = models.BooleanField(default=False, help_text="Show in featured projects section")
@@ -151,6 +197,9 @@ class Project(models.Model):
     
     class Meta:
         ordering = ['order', '-created_at']
+        # Status last: the page shows most statuses, so reading in order and
+        # skipping the rest beats collecting them by status and sorting
+        indexes = [models.Index(fields=['order', '-created_at', '-id', 'status'])]
         verbose_name = "Project"
         verbose_name_plural = "Projects"
     
@@ -171,9 +220,16 @@ class Testimonial(models.Model):
     order = models.IntegerField(default=0)
     
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['order', '-created_at']
+        indexes = [
+            models.Index(fields=['order', '-created_at', '-id']),
+            models.Index(fields=['is_active', 'order', '-created_at', '-id']),
+            # The admin's rating filter lists the distinct ratings
+            models.Index(fields=['rating']),
+        ]
         verbose_name = "Testimonial"
         verbose_name_plural = "Testimonials"
     
@@ -195,6 +251,11 @@ class ContactMessage(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['is_read', '-created_at', '-id']),
+            models.Index(fields=['is_replied', '-created_at', '-id']),
+        ]
         verbose_name = "Contact Message"
         verbose_name_plural = "Contact Messages"
     
@@ -202,6 +263,75 @@ class ContactMessage(models.Model):
         return f"Message from {self.name} - {self.created_at.strftime('%Y-%m-%d')}"
 
 
+class OutboxEmail(models.Model):
+    """Notification emails waiting to be delivered by the outbox worker"""
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_DEAD = 'dead'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_DEAD, 'Dead Letter'),
+    ]
+
+    contact_message = models.ForeignKey(
+        ContactMessage, on_delete=models.SET_NULL, blank=True, null=True, related_name='emails'
+    )
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    recipients = models.TextField(help_text="One address per line")
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['status', 'next_attempt_at'])]
+        verbose_name = "Outbox Email"
+        verbose_name_plural = "Outbox Emails"
+
+    def __str__(self):
+        return f"{self.subject} ({self.get_status_display()})"
+
+    @property
+    def recipient_list(self):
+        return [address for address in self.recipients.splitlines() if address]
+
+
+class ImageDerivative(models.Model):
+    """Resized copy of an uploaded image, generated outside the request"""
+    FORMAT_CHOICES = [
+        ('webp', 'WebP'),
+        ('jpeg', 'JPEG'),
+    ]
+
+    source = models.CharField(max_length=255, db_index=True, help_text="Storage name of the original upload")
+    source_hash = models.CharField(max_length=64)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    file = models.FileField(upload_to='derivatives/')
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['source', 'format', 'width']
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'format', 'width'], name='unique_image_derivative'),
+        ]
+        verbose_name = "Image Derivative"
+        verbose_name_plural = "Image Derivatives"
+
+    def __str__(self):
+        return f"{self.source} @ {self.width}w ({self.format})"
+
+
 class SiteSettings(models.Model):
     """Global site settings"""
     site_title = models.CharField(max_length=100, default="N:PORTFOLIO")
@@ -238,5 +368,9 @@ class SiteSettings(models.Model):
     
     @classmethod
     def load(cls):
-        obj, created = cls.objects.get_or_create(pk=1)
-        return obj
+        # Read-only: fall back to unsaved defaults until the admin saves the row
+        return cls.objects.filter(pk=1).first() or cls(pk=1)
+
+    @classmethod
+    async def aload(cls):
+        return await cls.objects.filter(pk=1).afirst() or cls(pk=1)
@@ -0,0 +1,42 @@
+"""
+Email notifications for contact form submissions.
+
+The notification is stored in the outbox together with the message, then
+delivered on a bounded background executor so a slow or hung mail server
+never holds up the request. Anything the executor drops or fails to send
+stays in the outbox for the send_outbox worker.
+"""
+from django.conf import settings
+from django.db import connections
+
+from .outbox import drain_outbox, enqueue_email
+from .tasks import BoundedExecutor
+
+notification_executor = BoundedExecutor(
+    'contact-mail',
+    max_workers=getattr(settings, 'CONTACT_NOTIFY_WORKERS', 2),
+    max_queue=getattr(settings, 'CONTACT_NOTIFY_QUEUE_SIZE', 100),
+)
+
+
+def enqueue_contact_notification(contact_message, recipient):
+    """Write the notification to the outbox; call inside the saving transaction"""
+    subject = f"New Contact from Portfolio: {contact_message.name}"
+    email_body = (
+        f"Name: {contact_message.name}\nEmail: {contact_message.email}\n\n"
+        f"Message:\n{contact_message.message}"
+    )
+    return enqueue_email(subject, email_body, [recipient], contact_message=contact_message)
+
+
+def deliver_outbox_email(pk):
+    try:
+        drain_outbox(pks=[pk], max_batches=1)
+    finally:
+        # Worker threads must not keep their own connections open
+        connections.close_all()
+
+
+def queue_outbox_delivery(outbox_email):
+    """Try delivery right away in the background; returns None if dropped"""
+    return notification_executor.submit(deliver_outbox_email, outbox_email.pk)
@@ -0,0 +1,131 @@
+"""
+Durable email outbox.
+
+Emails are written to OutboxEmail in the same transaction as the row
+that caused them, then delivered in batches over a single SMTP
+connection. Failed sends are retried with exponential backoff and end up
+in the dead-letter state after OUTBOX_MAX_ATTEMPTS.
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+
+from .metrics import observe_mail
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+# How long a worker may hold a claimed email before another may retry it
+CLAIM_LEASE = timedelta(minutes=5)
+
+
+def enqueue_email(subject, body, recipients, from_email='noreply@portfolio.local', contact_message=None):
+    """Add an email to the outbox; call inside the caller's transaction"""
+    return OutboxEmail.objects.create(
+        contact_message=contact_message,
+        subject=subject,
+        body=body,
+        from_email=from_email,
+        recipients='\n'.join(recipients),
+    )
+
+
+def retry_delay(attempts):
+    """Exponential backoff: base, 2x base, 4x base, ... capped at one day"""
+    base = getattr(settings, 'OUTBOX_RETRY_BASE_SECONDS', 60)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), 60 * 60 * 24))
+
+
+def claim_batch(batch_size, pks=None):
+    """
+    Lease up to batch_size due emails to this worker.
+
+    Claiming pushes next_attempt_at forward by CLAIM_LEASE, so concurrent
+    workers skip the rows and a crashed worker's rows become due again.
+    """
+    now = timezone.now()
+    due = OutboxEmail.objects.filter(status=OutboxEmail.STATUS_PENDING, next_attempt_at__lte=now)
+    if pks is not None:
+        due = due.filter(pk__in=pks)
+    candidates = list(due.order_by('next_attempt_at').values_list('pk', flat=True)[:batch_size])
+    if not candidates:
+        return []
+
+    lease_until = now + CLAIM_LEASE
+    OutboxEmail.objects.filter(pk__in=candidates, next_attempt_at__lte=now).update(
+        next_attempt_at=lease_until
+    )
+    return list(OutboxEmail.objects.filter(pk__in=candidates, next_attempt_at=lease_until))
+
+
+def record_failure(email, error):
+    max_attempts = getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 5)
+    email.attempts += 1
+    email.last_error = str(error)
+    if email.attempts >= max_attempts:
+        email.status = OutboxEmail.STATUS_DEAD
+        logger.error("Outbox email %s moved to dead letter: %s", email.pk, error)
+    else:
+        email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+        logger.warning("Outbox email %s failed (attempt %d): %s", email.pk, email.attempts, error)
+    email.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
+
+
+def send_batch(emails):
+    """Send claimed emails over one reused connection; returns counts"""
+    counts = {'sent': 0, 'failed': 0}
+    if not emails:
+        return counts
+
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as error:
+        for email in emails:
+            record_failure(email, error)
+        counts['failed'] = len(emails)
+        return counts
+
+    try:
+        for email in emails:
+            message = EmailMessage(
+                email.subject, email.body, email.from_email, email.recipient_list,
+                connection=connection,
+            )
+            started = time.perf_counter()
+            try:
+                message.send()
+            except Exception as error:
+                observe_mail(time.perf_counter() - started, 'failed')
+                record_failure(email, error)
+                counts['failed'] += 1
+                continue
+            observe_mail(time.perf_counter() - started, 'sent')
+            email.status = OutboxEmail.STATUS_SENT
+            email.attempts += 1
+            email.sent_at = timezone.now()
+            email.save(update_fields=['status', 'attempts', 'sent_at'])
+            counts['sent'] += 1
+    finally:
+        connection.close()
+    return counts
+
+
+def drain_outbox(batch_size=None, pks=None, max_batches=None):
+    """Send due emails batch by batch until none are left; returns counts"""
+    batch_size = batch_size or getattr(settings, 'OUTBOX_BATCH_SIZE', 50)
+    totals = {'sent': 0, 'failed': 0}
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        emails = claim_batch(batch_size, pks=pks)
+        if not emails:
+            break
+        counts = send_batch(emails)
+        totals['sent'] += counts['sent']
+        totals['failed'] += counts['failed']
+        batches += 1
+    return totals
@@ -0,0 +1,63 @@
+"""
+Keyset (cursor) pagination on (order, created_at, id).
+
+Projects and testimonials are listed by order, newest first within an
+order, then by id. A cursor names the last row of a page; the next page
+is the rows after it in that ordering, which the (order, -created_at,
+-id) indexes find with a range scan. Unlike OFFSET, nothing before the
+cursor is read, so the thousandth page costs what the first does.
+"""
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+
+from django.db.models import Q
+
+KEYSET_ORDERING = ('order', '-created_at', '-id')
+
+
+def encode_cursor(obj):
+    raw = json.dumps([obj.order, obj.created_at.isoformat(), obj.pk], separators=(',', ':'))
+    return urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(order, created_at, id) of a cursor; ValueError if it isn't one"""
+    try:
+        raw = urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        order, created_at, pk = json.loads(raw)
+        return int(order), datetime.fromisoformat(created_at), int(pk)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+def after_cursor(queryset, cursor):
+    order, created_at, pk = decode_cursor(cursor)
+    # The plain order__gte bound lets the index seek straight to the cursor
+    return queryset.filter(order__gte=order).filter(
+        Q(order__gt=order)
+        | Q(order=order, created_at__lt=created_at)
+        | Q(order=order, created_at=created_at, pk__lt=pk)
+    )
+
+
+def page_queryset(queryset, size, cursor=None):
+    # One row more than a page, to tell whether another page follows
+    if cursor:
+        queryset = after_cursor(queryset, cursor)
+    return queryset.order_by(*KEYSET_ORDERING)[:size + 1]
+
+
+def split_page(rows, size):
+    """(the page's rows, cursor of the next page or None)"""
+    if len(rows) > size:
+        return tuple(rows[:size]), encode_cursor(rows[size - 1])
+    return tuple(rows), None
+
+
+def keyset_page(queryset, size, cursor=None):
+    return split_page(list(page_queryset(queryset, size, cursor)), size)
+
+
+async def akeyset_page(queryset, size, cursor=None):
+    return split_page([obj async for obj in page_queryset(queryset, size, cursor)], size)
@@ -0,0 +1,86 @@
+"""
+Token-bucket rate limiting for contact form submissions.
+
+Buckets live in the shared "counters" cache, so every worker on the host
+draws from the same ones: one per client IP and one per submitted email
+address.
+Checks touch only the cache, never the database, so a rejected flood
+costs no more than a cache read and write per request.
+
+The counts of shed requests are kept with the metrics totals instead:
+a flood of new IPs fills the bucket cache until it culls, and the counts
+must survive exactly that.
+
+Bucket updates are read-modify-write and not atomic across workers; a
+race can let a request or two more through than the limit, never fewer.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+
+from .caching import counters, metrics_cache
+
+BUCKET_KEY = 'portfolio:ratelimit:{scope}:{ident}'
+SHED_KEY = 'portfolio:ratelimit:shed:{scope}'
+SCOPES = ('ip', 'email')
+
+
+def client_ip(request):
+    """Client address, taken from X-Forwarded-For when behind trusted proxies"""
+    proxies = settings.RATE_LIMIT_TRUSTED_PROXIES
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if proxies and forwarded:
+        # Each proxy appends the address it saw; entries further left are
+        # whatever the client chose to send
+        hops = [hop.strip() for hop in forwarded.split(',') if hop.strip()]
+        if hops:
+            return hops[-min(proxies, len(hops))]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def take_token(scope, ident, capacity, refill_seconds):
+    """Spend one token from a bucket; returns 0, or seconds until one is available"""
+    # Hashed so arbitrary input makes a safe, fixed-length cache key
+    key = BUCKET_KEY.format(scope=scope, ident=hashlib.sha256(ident.encode()).hexdigest()[:32])
+    now = time.time()
+    tokens, stamp = counters.get(key, (capacity, now))
+    tokens = min(capacity, tokens + (now - stamp) / refill_seconds)
+
+    if tokens < 1:
+        counters.set(key, (tokens, now), int(capacity * refill_seconds) + 1)
+        return (1 - tokens) * refill_seconds
+    counters.set(key, (tokens - 1, now), int(capacity * refill_seconds) + 1)
+    return 0
+
+
+def record_shed(scope):
+    key = SHED_KEY.format(scope=scope)
+    metrics_cache.add(key, 0, None)
+    try:
+        metrics_cache.incr(key)
+    except ValueError:
+        # Cleared between add() and incr()
+        metrics_cache.add(key, 1, None)
+
+
+def shed_counts():
+    """{scope: requests rejected so far}"""
+    found = metrics_cache.get_many([SHED_KEY.format(scope=scope) for scope in SCOPES])
+    return {scope: found.get(SHED_KEY.format(scope=scope), 0) for scope in SCOPES}
+
+
+def check_contact_rate(request):
+    """0 if the submission may go ahead, else seconds the client should wait"""
+    idents = {
+        'ip': client_ip(request),
+        'email': request.POST.get('email', '').strip().lower(),
+    }
+    for scope, (capacity, refill_seconds) in settings.CONTACT_RATE_LIMITS.items():
+        if not idents.get(scope):
+            continue
+        retry_after = take_token(scope, idents[scope], capacity, refill_seconds)
+        if retry_after:
+            record_shed(scope)
+            return retry_after
+    return 0
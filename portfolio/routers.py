@@ -0,0 +1,131 @@
+"""
+Primary/replica database routing.
+
+With REPLICA_DATABASES configured, reads of the models the public page
+and the API show go to a random replica. Everything else goes to
+default, the primary: every write, contact messages, the outbox,
+sessions and users.
+
+Replicas trail the primary, so some reads are pinned to it:
+- the admin, and every non-GET request;
+- an editor's requests for DATABASE_REPLICA_LAG_SECONDS after they
+  save something (the PIN_COOKIE), so they see their own changes;
+- page and API renders of a content version younger than that lag
+  (fresh_content_reads), so a stale copy never gets cached under the
+  new version.
+"""
+import random
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.urls import reverse
+
+PIN_COOKIE = 'db_primary_pin'
+
+_pinned = ContextVar('portfolio_primary_pinned', default=False)
+
+
+def replica_models():
+    from .models import ImageDerivative
+    from .signals import CONTENT_MODELS
+    return (*CONTENT_MODELS, ImageDerivative)
+
+
+@contextmanager
+def primary_reads():
+    """Send every read in the block to the primary"""
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+def fresh_content_reads(version):
+    """primary_reads() while the replicas may not have caught up with a content version"""
+    if time.time_ns() - version < settings.DATABASE_REPLICA_LAG_SECONDS * 1_000_000_000:
+        return primary_reads()
+    return nullcontext()
+
+
+class PrimaryReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.REPLICA_DATABASES
+        if replicas and not _pinned.get() and model in replica_models():
+            return random.choice(replicas)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Explicit, otherwise saving a row read from a replica would write there
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        pool = {DEFAULT_DB_ALIAS, *settings.REPLICA_DATABASES}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary
+        if db in settings.REPLICA_DATABASES:
+            return False
+        return None
+
+
+class PrimaryPinMiddleware:
+    """Pins reads to the primary where a replica could show stale rows; see the module docstring"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not settings.REPLICA_DATABASES or not self.pinned(request):
+            return self.get_response(request)
+
+        with primary_reads():
+            response = self.get_response(request)
+        if not self.safe(request) and request.user.is_staff:
+            self.pin_editor(request, response)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.REPLICA_DATABASES or not self.pinned(request):
+            return await self.get_response(request)
+
+        with primary_reads():
+            response = await self.get_response(request)
+        if not self.safe(request) and (await request.auser()).is_staff:
+            self.pin_editor(request, response)
+        return response
+
+    def pinned(self, request):
+        return (
+            not self.safe(request)
+            or PIN_COOKIE in request.COOKIES
+            or request.path.startswith(reverse('admin:index'))
+        )
+
+    @staticmethod
+    def safe(request):
+        return request.method in ('GET', 'HEAD', 'OPTIONS')
+
+    @staticmethod
+    def pin_editor(request, response):
+        # Read-your-writes for the editor until the replicas catch up
+        response.set_cookie(
+            PIN_COOKIE, '1', max_age=settings.DATABASE_REPLICA_LAG_SECONDS,
+            secure=request.is_secure(), httponly=True, samesite='Lax',
+        )
@@ -0,0 +1,58 @@
+"""
+Full-text search over contact messages.
+
+The index is maintained by the database itself (migration 0008): an FTS5
+table kept in sync by triggers on SQLite, and a generated tsvector column
+with a GIN index on PostgreSQL. Any other backend falls back to the
+admin's LIKE search.
+
+SQLite drops triggers with their table, so a future migration that makes
+Django rebuild portfolio_contactmessage (e.g. AlterField) must recreate
+them and rebuild the index.
+"""
+import re
+
+from django.db import connection
+
+FTS_TABLE = 'portfolio_contactmessage_fts'
+
+# Relative weight of name, email, subject and message in the ranking
+SQLITE_RANK_SQL = f"bm25({FTS_TABLE}, 10.0, 10.0, 5.0, 1.0)"
+POSTGRES_MATCH_SQL = "portfolio_contactmessage.search_vector @@ to_tsquery('simple', %s)"
+# Negated so that, as with bm25(), lower sorts first
+POSTGRES_RANK_SQL = "-ts_rank(portfolio_contactmessage.search_vector, to_tsquery('simple', %s))"
+
+
+def match_query(term):
+    """Backend query for a search box term, or None if the index can't serve it"""
+    words = re.findall(r'\w+', term)
+    if not words:
+        return None
+    # Every word must match, each as a prefix ("inter" finds "internship")
+    if connection.vendor == 'sqlite':
+        return ' '.join(f'"{word}"*' for word in words)
+    if connection.vendor == 'postgresql':
+        return ' & '.join(f'{word}:*' for word in words)
+    return None
+
+
+def search_messages(queryset, term):
+    """queryset narrowed to the matches and annotated with search_rank, or None"""
+    query = match_query(term)
+    if query is None:
+        return None
+    if connection.vendor == 'sqlite':
+        # A join, so the index is scanned once for the matches and their
+        # ranks together; bm25() is only available inside that scan
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f"{FTS_TABLE}.rowid = portfolio_contactmessage.id", f"{FTS_TABLE} MATCH %s"],
+            params=[query],
+            select={'search_rank': SQLITE_RANK_SQL},
+        )
+    return queryset.extra(
+        where=[POSTGRES_MATCH_SQL],
+        params=[query],
+        select={'search_rank': POSTGRES_RANK_SQL},
+        select_params=[query],
+    )
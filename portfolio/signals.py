@@ -0,0 +1,74 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+
+from .caching import CONTENT_VERSION, bump_versions
+from .models import (
+    Profile, ProfileImage, Education, Experience, Skill, Project,
+    Technology, Testimonial, SiteSettings
+)
+from .technologies import recount_technologies, sync_project_technologies
+
+# Models behind the public page and its JSON. ContactMessage is left out on purpose:
+# it never appears on the page, and invalidating on every submission would
+# let the contact form flush the cache.
+CONTENT_MODELS = (
+    Profile, ProfileImage, Education, Experience, Skill, Project,
+    Technology, Testimonial, SiteSettings,
+)
+
+
+def content_changed(model):
+    bump_versions(CONTENT_VERSION, model._meta.label_lower)
+    if settings.STATIC_SITE_AUTO_REBUILD:
+        from .static_site import schedule_rebuild
+        schedule_rebuild()
+
+
+def invalidate_content_cache(sender, using=None, **kwargs):
+    # Wait for the commit, otherwise a request in another worker could
+    # re-cache the old rows under the new version before they are visible.
+    transaction.on_commit(lambda: content_changed(sender), using=using)
+
+
+def generate_image_derivatives(sender, instance, using=None, **kwargs):
+    from .derivatives import schedule_derivatives
+    transaction.on_commit(lambda: schedule_derivatives(instance), using=using)
+
+
+def sync_technologies(sender, instance, raw=False, **kwargs):
+    # Loaddata rows come with their tags already
+    if not raw:
+        sync_project_technologies(instance)
+
+
+def remember_technologies(sender, instance, **kwargs):
+    # The links are gone by post_delete
+    instance._technology_pks = list(instance.tags.values_list('pk', flat=True))
+
+
+def recount_deleted_technologies(sender, instance, **kwargs):
+    recount_technologies(getattr(instance, '_technology_pks', []))
+
+
+for model in CONTENT_MODELS:
+    post_save.connect(
+        invalidate_content_cache, sender=model,
+        dispatch_uid=f'portfolio_invalidate_save_{model._meta.model_name}',
+    )
+    post_delete.connect(
+        invalidate_content_cache, sender=model,
+        dispatch_uid=f'portfolio_invalidate_delete_{model._meta.model_name}',
+    )
+
+for model in (Profile, ProfileImage, Project, Testimonial):
+    post_save.connect(
+        generate_image_derivatives, sender=model,
+        dispatch_uid=f'portfolio_derivatives_{model._meta.model_name}',
+    )
+
+post_save.connect(sync_technologies, sender=Project, dispatch_uid='portfolio_technologies_save')
+pre_delete.connect(remember_technologies, sender=Project, dispatch_uid='portfolio_technologies_pre_delete')
+post_delete.connect(
+    recount_deleted_technologies, sender=Project, dispatch_uid='portfolio_technologies_delete',
+)
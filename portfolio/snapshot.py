@@ -0,0 +1,170 @@
+"""
+Single-pass loader for everything the public page renders.
+
+The number of queries is fixed regardless of how many rows each section
+has: one per section, one prefetch for the profile slider images and one
+lookup for the responsive image derivatives. Profile and SiteSettings
+come from the process-local singleton cache, so once warm they cost
+nothing.
+
+aload_portfolio_snapshot() is the same for async views, with the
+independent section queries awaited together.
+
+Page renders pass page_size= to load only the first page of the paged
+sections (PAGED_SECTIONS); the rest are loaded a page at a time by
+load_section_page() as the visitor scrolls.
+"""
+import asyncio
+from dataclasses import dataclass, fields
+from types import MappingProxyType
+
+from .caching import aget_profile, aget_site_settings, get_profile, get_site_settings
+from .derivatives import aderivative_map, derivative_map
+from .models import (
+    Profile, Education, Experience, Skill, Project, Testimonial, SiteSettings
+)
+from .pagination import KEYSET_ORDERING, akeyset_page, keyset_page
+
+# Upper bound on queries issued by load_portfolio_snapshot(): with a cold
+# singleton cache, and once Profile and SiteSettings are cached
+SNAPSHOT_QUERY_BUDGET = 9
+SNAPSHOT_WARM_QUERY_BUDGET = 6
+
+# Sections that can grow without bound, shown a page at a time
+PAGED_SECTIONS = ('projects', 'testimonials')
+
+
+@dataclass(frozen=True)
+class PortfolioSnapshot:
+    """Immutable view of the portfolio content for one render"""
+    profile: Profile
+    profile_images: tuple
+    settings: SiteSettings
+    experiences: tuple
+    education: tuple
+    skills: tuple
+    projects: tuple
+    testimonials: tuple
+    image_derivatives: MappingProxyType
+    # Cursors of the second pages, when paged and there is more
+    projects_next: str = None
+    testimonials_next: str = None
+
+    def as_context(self):
+        return {field.name: getattr(self, field.name) for field in fields(self)}
+
+
+def section_querysets():
+    """The list sections of the page, by snapshot field name"""
+    return {
+        'experiences': Experience.objects.all(),
+        'education': Education.objects.all(),
+        'skills': Skill.objects.order_by('order', 'category'),
+        'projects': Project.objects.filter(status__in=Project.PUBLIC_STATUSES).order_by(*KEYSET_ORDERING),
+        'testimonials': Testimonial.objects.filter(is_active=True).order_by(*KEYSET_ORDERING),
+    }
+
+
+def section_querysets_for(only):
+    querysets = section_querysets()
+    if only is None:
+        return querysets
+    return {name: queryset for name, queryset in querysets.items() if name in only}
+
+
+def image_names(profile, profile_images, sections, only=None):
+    # Every image on the page, so srcsets cost one query in total
+    names = []
+    if only is None or 'hero' in only:
+        names.append(profile.profile_image.name if profile else None)
+        names += [img.image.name for img in profile_images]
+    names += [project.image.name for project in sections.get('projects', ())]
+    names += [test.avatar.name for test in sections.get('testimonials', ())]
+    return names
+
+
+def load_section(name, queryset, page_size):
+    """(rows, next page cursor) of one section"""
+    if page_size and name in PAGED_SECTIONS:
+        return keyset_page(queryset, page_size)
+    return tuple(queryset), None
+
+
+async def aload_section(name, queryset, page_size):
+    if page_size and name in PAGED_SECTIONS:
+        return await akeyset_page(queryset, page_size)
+    return await alist(queryset), None
+
+
+def build_sections(loaded):
+    """Snapshot fields for the loaded {name: (rows, cursor)}; sections not loaded are empty"""
+    sections = {}
+    for name in section_querysets():
+        sections[name], cursor = loaded.get(name, ((), None))
+        if name in PAGED_SECTIONS:
+            sections[f'{name}_next'] = cursor
+    return sections
+
+
+def load_portfolio_snapshot(only=None, page_size=None):
+    """
+    The page content. only= names the sections to load (see
+    FRAGMENT_SECTIONS); the others are left empty, for renders that take
+    them from the fragment cache. page_size= limits the PAGED_SECTIONS to
+    their first page.
+    """
+    # Profile and SiteSettings are singletons, cached between requests
+    profile = get_profile()
+    profile_images = tuple(profile.images.all()) if profile else ()
+    settings = get_site_settings()
+
+    querysets = section_querysets_for(only)
+    sections = build_sections({
+        name: load_section(name, queryset, page_size) for name, queryset in querysets.items()
+    })
+
+    return PortfolioSnapshot(
+        profile=profile,
+        profile_images=profile_images,
+        settings=settings,
+        image_derivatives=MappingProxyType(
+            derivative_map(image_names(profile, profile_images, sections, only))
+        ),
+        **sections,
+    )
+
+
+def load_section_page(name, cursor, page_size):
+    """
+    Template context for the page of a paged section after cursor: the
+    rows, the next cursor and their image derivatives. Raises ValueError
+    on a malformed cursor.
+    """
+    rows, next_cursor = keyset_page(section_querysets()[name], page_size, cursor)
+    derivatives = derivative_map(image_names(None, (), {name: rows}, only=(name,)))
+    return {name: rows, f'{name}_next': next_cursor, 'image_derivatives': MappingProxyType(derivatives)}
+
+
+async def alist(queryset):
+    return tuple([obj async for obj in queryset])
+
+
+async def aload_portfolio_snapshot(only=None, page_size=None):
+    querysets = section_querysets_for(only)
+    profile, settings, *rows = await asyncio.gather(
+        aget_profile(), aget_site_settings(),
+        *(aload_section(name, queryset, page_size) for name, queryset in querysets.items()),
+    )
+    # Prefetched by Profile.aload(), so no query here
+    profile_images = tuple(profile.images.all()) if profile else ()
+    sections = build_sections(dict(zip(querysets, rows)))
+
+    return PortfolioSnapshot(
+        profile=profile,
+        profile_images=profile_images,
+        settings=settings,
+        image_derivatives=MappingProxyType(
+            await aderivative_map(image_names(profile, profile_images, sections, only))
+        ),
+        **sections,
+    )
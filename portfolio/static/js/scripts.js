@@ -1,18 +1,82 @@
 // -----------------------------
-// Scroll Progress Indicator
+// Frame scheduler
 // -----------------------------
+// Scroll and mouse listeners only record their input; the DOM work runs
+// once per animation frame, all reads before all writes, and stops while
+// the tab is hidden.
+const frameTasks = [];
+let frameRequested = false;
+
+function requestFrame() {
+  if (frameRequested || document.hidden) return;
+  frameRequested = true;
+  requestAnimationFrame(runFrame);
+}
+
+function runFrame() {
+  frameRequested = false;
+  const reads = frameTasks.map(task => task.read ? task.read() : null);
+  let again = false;
+  frameTasks.forEach((task, i) => {
+    // A task returns true while it is still animating
+    if (task.write(reads[i])) again = true;
+  });
+  if (again) requestFrame();
+}
+
+function onFrame(task) {
+  frameTasks.push(task);
+}
+
+document.addEventListener('visibilitychange', requestFrame);
+
+let scrollDirty = true;
 window.addEventListener('scroll', () => {
-  const scrollProgress = document.getElementById('scroll-progress');
-  if (!scrollProgress) {
-    const progressBar = document.createElement('div');
-    progressBar.id = 'scroll-progress';
-    document.body.appendChild(progressBar);
+  scrollDirty = true;
+  requestFrame();
+}, { passive: true });
+
+// Effects are skipped while their element is off-screen
+const onScreen = new WeakMap();
+const visibilityObserver = new IntersectionObserver((entries) => {
+  entries.forEach(entry => onScreen.set(entry.target, entry.isIntersecting));
+});
+
+function isOnScreen(el) {
+  return onScreen.get(el) !== false;
+}
+
+// -----------------------------
+// Scroll Progress Indicator and Parallax
+// -----------------------------
+let scrollProgress = document.getElementById('scroll-progress');
+if (!scrollProgress) {
+  scrollProgress = document.createElement('div');
+  scrollProgress.id = 'scroll-progress';
+  document.body.appendChild(scrollProgress);
+}
+const parallaxElements = document.querySelectorAll('.hero-text');
+parallaxElements.forEach(el => visibilityObserver.observe(el));
+
+onFrame({
+  read() {
+    if (!scrollDirty) return null;
+    scrollDirty = false;
+    return {
+      scrolled: window.pageYOffset,
+      height: document.documentElement.scrollHeight - document.documentElement.clientHeight
+    };
+  },
+  write(state) {
+    if (!state) return false;
+    scrollProgress.style.width = (state.height > 0 ? state.scrolled / state.height * 100 : 0) + '%';
+    parallaxElements.forEach((el, index) => {
+      if (!isOnScreen(el)) return;
+      const speed = index === 0 ? 0.3 : 0.5;
+      el.style.transform = `translateY(${-(state.scrolled * speed)}px)`;
+    });
+    return false;
   }
-  
-  const winScroll = document.body.scrollTop || document.documentElement.scrollTop;
-  const height = document.documentElement.scrollHeight - document.documentElement.clientHeight;
-  const scrolled = (winScroll / height) * 100;
-  document.getElementById('scroll-progress').style.width = scrolled + '%';
 });
 
 // -----------------------------
@@ -33,22 +97,27 @@ if (window.innerWidth > 768) {
   document.addEventListener('mousemove', (e) => {
     mouseX = e.clientX;
     mouseY = e.clientY;
-    
-    cursorDot.style.left = mouseX + 'px';
-    cursorDot.style.top = mouseY + 'px';
-  });
+    requestFrame();
+  }, { passive: true });
   
-  // Smooth follow for outline
-  function animateOutline() {
-    outlineX += (mouseX - outlineX) * 0.15;
-    outlineY += (mouseY - outlineY) * 0.15;
-    
-    cursorOutline.style.left = outlineX + 'px';
-    cursorOutline.style.top = outlineY + 'px';
-    
-    requestAnimationFrame(animateOutline);
-  }
-  animateOutline();
+  // Dot follows the mouse, the outline eases after it until it catches up
+  onFrame({
+    write() {
+      cursorDot.style.left = mouseX + 'px';
+      cursorDot.style.top = mouseY + 'px';
+
+      outlineX += (mouseX - outlineX) * 0.15;
+      outlineY += (mouseY - outlineY) * 0.15;
+      const settled = Math.abs(mouseX - outlineX) < 0.5 && Math.abs(mouseY - outlineY) < 0.5;
+      if (settled) {
+        outlineX = mouseX;
+        outlineY = mouseY;
+      }
+      cursorOutline.style.left = outlineX + 'px';
+      cursorOutline.style.top = outlineY + 'px';
+      return !settled;
+    }
+  });
   
   // Expand cursor on hover over interactive elements
   const interactiveElements = document.querySelectorAll('a, button, input, textarea');
@@ -93,19 +162,6 @@ document.addEventListener('DOMContentLoaded', () => {
   });
 });
 
-// Legacy scroll-based fade-in (backup)
-document.addEventListener("scroll", () => {
-  const elements = document.querySelectorAll(".fade-in");
-  const triggerBottom = window.innerHeight * 0.85;
-
-  elements.forEach((el) => {
-    const boxTop = el.getBoundingClientRect().top;
-    if (boxTop < triggerBottom) {
-      el.classList.add("visible");
-    }
-  });
-});
-
 // -----------------------------
 // Smooth scroll for navbar
 // -----------------------------
@@ -341,49 +397,60 @@ if (langToggle) {
     const next = current === 'en' ? 'ne' : 'en';
     setLanguage(next);
     // re-render date/time localized
-    renderDateTime(currentTimeData);
+    renderDateTime();
   });
 }
 
 // -----------------------------
-// Date & Time (worldtimeapi fallback to local)
+// Date & Time
 // -----------------------------
+// Rendered locally; the page may name a time zone in data-time-zone,
+// otherwise the visitor's own is used. Only the seconds tick, and not
+// while the widget is off-screen or the tab is hidden.
 const dateTimeEl = document.getElementById('date-time');
-let currentTimeData = null; // store fetched timezone info
+const timeZone = (dateTimeEl && dateTimeEl.dataset.timeZone) || undefined;
+let clockTimer = null;
 
-function renderDateTime(info) {
+function renderDateTime() {
+  if (!dateTimeEl) return;
   const lang = localStorage.getItem('lang') || 'en';
+  const locale = lang === 'ne' ? 'ne-NP' : undefined;
+  const now = new Date();
+  let timeStr, dateStr;
   try {
-    let now = info && info.datetime ? new Date(info.datetime) : new Date();
-    const dateFormatter = new Intl.DateTimeFormat(lang === 'ne' ? 'ne-NP' : undefined, { dateStyle: 'full' });
-    const timeFormatter = new Intl.DateTimeFormat(lang === 'ne' ? 'ne-NP' : undefined, { timeStyle: 'medium' });
-    const timeStr = timeFormatter.format(now);
-    const dateStr = dateFormatter.format(now);
-    if (dateTimeEl) dateTimeEl.innerHTML = `<span class="time">${timeStr}</span><span class="date">${dateStr}</span>`;
+    timeStr = new Intl.DateTimeFormat(locale, { timeStyle: 'medium', timeZone }).format(now);
+    dateStr = new Intl.DateTimeFormat(locale, { dateStyle: 'full', timeZone }).format(now);
   } catch (e) {
-    if (dateTimeEl) dateTimeEl.innerHTML = `<span class="time">${new Date().toLocaleTimeString()}</span><span class="date">${new Date().toLocaleDateString()}</span>`;
+    timeStr = now.toLocaleTimeString();
+    dateStr = now.toLocaleDateString();
+  }
+  if (!dateTimeEl.firstChild) {
+    dateTimeEl.innerHTML = '<span class="time"></span><span class="date"></span>';
   }
+  const [timeEl, dateEl] = dateTimeEl.children;
+  if (timeEl.textContent !== timeStr) timeEl.textContent = timeStr;
+  if (dateEl.textContent !== dateStr) dateEl.textContent = dateStr;
 }
 
-// fetch from worldtimeapi.org; if it fails gracefully fallback to local Date
-fetch('https://worldtimeapi.org/api/ip')
-  .then(res => res.ok ? res.json() : Promise.reject(res))
-  .then(data => {
-    currentTimeData = data;
-    renderDateTime(data);
-    // update every second using the base datetime and incremental seconds
-    setInterval(() => {
-      if (currentTimeData && currentTimeData.datetime) {
-        currentTimeData.datetime = new Date(new Date(currentTimeData.datetime).getTime() + 1000).toISOString();
-      }
-      renderDateTime(currentTimeData);
-    }, 1000);
-  })
-  .catch(() => {
-    currentTimeData = null;
-    renderDateTime(null);
-    setInterval(() => renderDateTime(null), 1000);
-  });
+function updateClock() {
+  const running = !document.hidden && isOnScreen(dateTimeEl);
+  if (running && clockTimer === null) {
+    renderDateTime();
+    clockTimer = setInterval(renderDateTime, 1000);
+  } else if (!running && clockTimer !== null) {
+    clearInterval(clockTimer);
+    clockTimer = null;
+  }
+}
+
+if (dateTimeEl) {
+  new IntersectionObserver((entries) => {
+    entries.forEach(entry => onScreen.set(entry.target, entry.isIntersecting));
+    updateClock();
+  }).observe(dateTimeEl);
+  document.addEventListener('visibilitychange', updateClock);
+  updateClock();
+}
 
 // -----------------------------
 // Typing Animation for Hero Section
@@ -412,40 +479,46 @@ document.addEventListener('DOMContentLoaded', () => {
 });
 
 // -----------------------------
-// Parallax Effect on Scroll
+// Add Tilt Effect to Cards
 // -----------------------------
-window.addEventListener('scroll', () => {
-  const scrolled = window.pageYOffset;
-  const parallaxElements = document.querySelectorAll('.hero-text');
+let tiltCard = null;
+let tiltX = 0, tiltY = 0;
+
+// Also called on the cards the lazy loader adds further down
+function addTilt(card) {
+  card.addEventListener('mousemove', (e) => {
+    tiltCard = card;
+    tiltX = e.clientX;
+    tiltY = e.clientY;
+    requestFrame();
+  }, { passive: true });
   
-  parallaxElements.forEach((el, index) => {
-    const speed = index === 0 ? 0.3 : 0.5;
-    const yPos = -(scrolled * speed);
-    el.style.transform = `translateY(${yPos}px)`;
+  card.addEventListener('mouseleave', () => {
+    if (tiltCard === card) tiltCard = null;
+    card.style.transform = '';
   });
-});
+}
 
-// -----------------------------
-// Add Tilt Effect to Cards
-// -----------------------------
-document.querySelectorAll('.exp-card, .skill-category, .project-card').forEach(card => {
-  card.addEventListener('mousemove', (e) => {
-    const rect = card.getBoundingClientRect();
-    const x = e.clientX - rect.left;
-    const y = e.clientY - rect.top;
+document.querySelectorAll('.exp-card, .skill-category, .project-card').forEach(addTilt);
+
+onFrame({
+  read() {
+    return tiltCard ? { card: tiltCard, rect: tiltCard.getBoundingClientRect() } : null;
+  },
+  write(state) {
+    if (!state) return false;
+    const x = tiltX - state.rect.left;
+    const y = tiltY - state.rect.top;
     
-    const centerX = rect.width / 2;
-    const centerY = rect.height / 2;
+    const centerX = state.rect.width / 2;
+    const centerY = state.rect.height / 2;
     
     const rotateX = (y - centerY) / 10;
     const rotateY = (centerX - x) / 10;
     
-    card.style.transform = `perspective(1000px) rotateX(${rotateX}deg) rotateY(${rotateY}deg) translateY(-10px) scale(1.02)`;
-  });
-  
-  card.addEventListener('mouseleave', () => {
-    card.style.transform = '';
-  });
+    state.card.style.transform = `perspective(1000px) rotateX(${rotateX}deg) rotateY(${rotateY}deg) translateY(-10px) scale(1.02)`;
+    return false;
+  }
 });
 
 // -----------------------------
@@ -617,4 +690,51 @@ window.addEventListener('click', (e) => {
 window.openExpModal = openExpModal;
 window.closeExpModal = closeExpModal;
 
+// -----------------------------
+// Lazy-loaded Projects and Testimonials
+// -----------------------------
+// The page comes with the first cards of each list. The "More" link after
+// them fetches the next page as it nears the viewport, and is replaced by
+// those cards plus the link to the page after (absent on the last page).
+const loadMoreObserver = new IntersectionObserver((entries) => {
+  entries.forEach(entry => {
+    if (entry.isIntersecting) loadMore(entry.target);
+  });
+}, { rootMargin: '600px 0px' });
+
+function loadMore(link) {
+  if (link.dataset.loading) return;
+  link.dataset.loading = '1';
+  loadMoreObserver.unobserve(link);
+
+  fetch(link.href, { credentials: 'same-origin' })
+    .then(response => {
+      if (!response.ok) throw new Error(`HTTP ${response.status}`);
+      return response.text();
+    })
+    .then(html => {
+      const fragment = document.createRange().createContextualFragment(html);
+      fragment.querySelectorAll('.exp-card, .project-card').forEach(card => {
+        card.classList.add('fade-in');
+        observer.observe(card);
+        addTilt(card);
+      });
+      fragment.querySelectorAll('[data-load-more]').forEach(watchLoadMore);
+      link.replaceWith(fragment);
+    })
+    .catch(err => {
+      // Left in place: a click retries
+      console.error(err);
+      delete link.dataset.loading;
+    });
+}
+
+function watchLoadMore(link) {
+  link.addEventListener('click', (e) => {
+    e.preventDefault();
+    loadMore(link);
+  });
+  loadMoreObserver.observe(link);
+}
 
+document.querySelectorAll('[data-load-more]').forEach(watchLoadMore);
@@ -0,0 +1,136 @@
+"""
+Pre-rendered static copy of the public site.
+
+build_static_site() renders index.html from the current database into
+STATIC_SITE_ROOT, together with every static and media file the page
+references. Referenced files are copied under content-hashed names so
+they can be cached forever, and every text file gets precompressed .gz
+and .br variants for WhiteNoise or any other static file server.
+"""
+import gzip
+import hashlib
+import logging
+import os
+import re
+from urllib.parse import unquote
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.files.storage import default_storage
+from django.db import connections
+from django.template.loader import render_to_string
+
+from .caching import CSRF_PLACEHOLDER
+from .routers import primary_reads
+from .snapshot import load_portfolio_snapshot
+from .tasks import BoundedExecutor
+
+try:
+    import brotli
+except ImportError:  # in requirements.txt; build_static_site refuses to run without it
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_EXTENSIONS = ('.html', '.css', '.js', '.svg', '.txt', '.json')
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.\w+$')
+
+# One rebuild at a time and at most one waiting: a queued rebuild has not
+# read the database yet, so any further saves are covered by it.
+rebuild_executor = BoundedExecutor('static-site', max_workers=1, max_queue=1)
+
+
+def hashed_name(name, content):
+    """css/style.css -> css/style.1a2b3c4d5e6f.css, like ManifestStaticFilesStorage"""
+    if HASHED_NAME_RE.search(name):
+        # Already hashed by collectstatic
+        return name
+    root, ext = os.path.splitext(name)
+    return f"{root}.{hashlib.md5(content).hexdigest()[:12]}{ext}"
+
+
+def write_file(path, content):
+    """Write atomically, with precompressed variants for text files"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    variants = [(path, content)]
+    if path.endswith(COMPRESSIBLE_EXTENSIONS):
+        variants.append((path + '.gz', gzip.compress(content, compresslevel=9, mtime=0)))
+        if brotli is not None:
+            variants.append((path + '.br', brotli.compress(content)))
+    for variant_path, data in variants:
+        tmp_path = f"{variant_path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, variant_path)
+
+
+def read_static(name):
+    path = finders.find(name)
+    if path is None:
+        # Hashed names from the manifest only exist among the collected files
+        if not staticfiles_storage.exists(name):
+            return None
+        path = staticfiles_storage.path(name)
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def read_media(name):
+    if not default_storage.exists(name):
+        return None
+    with default_storage.open(name, 'rb') as f:
+        return f.read()
+
+
+def rewrite_urls(html, url_prefix, read, output_dir):
+    """Copy every file under url_prefix referenced by html to a hashed name"""
+    pattern = re.compile(re.escape(url_prefix) + r'([^"\'?#\s)]+)(\?[^"\'#\s)]*)?')
+    rewritten = {}
+
+    def replace(match):
+        name = unquote(match.group(1))
+        if name not in rewritten:
+            content = read(name)
+            if content is None:
+                logger.warning("Static site: %s%s not found, URL left as is", url_prefix, name)
+                rewritten[name] = None
+            else:
+                target = hashed_name(name, content)
+                write_file(os.path.join(output_dir, url_prefix.strip('/'), target), content)
+                rewritten[name] = url_prefix + target
+        # The query string was only a cache buster; hashed names replace it
+        return rewritten[name] or match.group(0)
+
+    return pattern.sub(replace, html), sum(1 for url in rewritten.values() if url)
+
+
+def build_static_site(output_dir=None):
+    """Render the site into output_dir; returns the number of files copied"""
+    output_dir = output_dir or settings.STATIC_SITE_ROOT
+
+    context = load_portfolio_snapshot(page_size=settings.SECTION_PAGE_SIZE).as_context()
+    context['csrf_token'] = CSRF_PLACEHOLDER
+    # No token in the static copy: the contact form fetches one on submit
+    html = render_to_string('index.html', context).replace(CSRF_PLACEHOLDER, '')
+
+    html, static_count = rewrite_urls(html, settings.STATIC_URL, read_static, output_dir)
+    html, media_count = rewrite_urls(html, settings.MEDIA_URL, read_media, output_dir)
+
+    write_file(os.path.join(output_dir, 'index.html'), html.encode())
+    return static_count + media_count
+
+
+def rebuild_static_site():
+    try:
+        # Runs right after a save, before replicas can be relied on
+        with primary_reads():
+            build_static_site()
+    finally:
+        # Worker threads must not keep their own connections open
+        connections.close_all()
+
+
+def schedule_rebuild():
+    """Rebuild in the background after an admin save"""
+    return rebuild_executor.submit(rebuild_static_site)
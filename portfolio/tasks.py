@@ -0,0 +1,91 @@
+"""
+Small in-process background executor.
+
+Used for work that must not hold up a request, such as sending email.
+The queue is bounded: when it is full, new jobs are dropped and counted
+rather than piling up in memory behind a stuck backend.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class BoundedExecutor:
+    """Thread pool with a hard cap on queued jobs"""
+
+    def __init__(self, name, max_workers=2, max_queue=100):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = None
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._queued = 0
+        self._running = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+
+    def _get_executor(self):
+        # Created lazily so a pool is never inherited across a fork
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix=self.name,
+            )
+        return self._executor
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue fn, or drop it and return None when the queue is full"""
+        with self._lock:
+            if self._queued + self._running >= self.max_workers + self.max_queue:
+                self.dropped += 1
+                logger.warning(
+                    "%s executor full (%d queued), dropped %s",
+                    self.name, self._queued, getattr(fn, '__name__', fn),
+                )
+                return None
+            self._queued += 1
+            self.submitted += 1
+            executor = self._get_executor()
+        return executor.submit(self._run, fn, args, kwargs)
+
+    def _run(self, fn, args, kwargs):
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        failed = False
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            failed = True
+            logger.exception("%s job %s failed", self.name, getattr(fn, '__name__', fn))
+        finally:
+            with self._lock:
+                self._running -= 1
+                if failed:
+                    self.failed += 1
+                else:
+                    self.completed += 1
+                self._idle.notify_all()
+
+    def wait(self, timeout=None):
+        """Block until every queued job has finished; False on timeout"""
+        with self._lock:
+            return self._idle.wait_for(
+                lambda: self._queued == 0 and self._running == 0, timeout,
+            )
+
+    def stats(self):
+        with self._lock:
+            return {
+                'queue_depth': self._queued,
+                'running': self._running,
+                'max_queue': self.max_queue,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'dropped': self.dropped,
+            }
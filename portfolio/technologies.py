@@ -0,0 +1,75 @@
+"""
+Technology tags of projects.
+
+Editors keep typing Project.technologies as free text ("Django, Python").
+Every save parses it into Technology rows and the Project.tags link, so
+finding projects by technology is an indexed join instead of a LIKE
+scan, and each Technology carries a precomputed count of the public
+projects using it.
+"""
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Project, Technology
+
+
+def parse_technologies(value):
+    """{slug: name} of a comma-separated list, first spelling of each kept"""
+    parsed = {}
+    for name in (value or '').split(','):
+        name = ' '.join(name.split())
+        slug = Technology.slug_for(name)
+        if slug and slug not in parsed:
+            parsed[slug] = name[:50]
+    return parsed
+
+
+def get_or_create_technologies(parsed):
+    """Technology rows for {slug: name}, creating the missing ones"""
+    existing = {tech.slug: tech for tech in Technology.objects.filter(slug__in=parsed)}
+    missing = [Technology(slug=slug, name=name) for slug, name in parsed.items() if slug not in existing]
+    if missing:
+        # Another save may create the same slug at the same time
+        Technology.objects.bulk_create(missing, ignore_conflicts=True)
+        existing = {tech.slug: tech for tech in Technology.objects.filter(slug__in=parsed)}
+    return list(existing.values())
+
+
+def recount_technologies(pks=None):
+    """Refresh project_count of the given technologies, or of all of them"""
+    counts = (
+        Project.tags.through.objects
+        .filter(technology=OuterRef('pk'), project__status__in=Project.PUBLIC_STATUSES)
+        .order_by().values('technology').annotate(count=Count('pk')).values('count')
+    )
+    technologies = Technology.objects.all() if pks is None else Technology.objects.filter(pk__in=pks)
+    technologies.update(project_count=Coalesce(Subquery(counts), Value(0)))
+
+
+def sync_project_technologies(project):
+    """Point project.tags at its technologies text and recount what changed"""
+    technologies = get_or_create_technologies(parse_technologies(project.technologies))
+    old = set(project.tags.values_list('pk', flat=True))
+    project.tags.set(technologies)
+    # Status changes move a project in or out of the counts too
+    recount_technologies(old | {tech.pk for tech in technologies})
+
+
+def rebuild_technologies():
+    """Tag every project from scratch, e.g. after a bulk_create() or update()"""
+    Through = Project.tags.through
+    links = []
+    for pk, value in Project.objects.values_list('pk', 'technologies').iterator():
+        parsed = parse_technologies(value)
+        if parsed:
+            links.append((pk, parsed))
+    technologies = get_or_create_technologies(
+        {slug: name for pk, parsed in links for slug, name in parsed.items()}
+    )
+    by_slug = {tech.slug: tech.pk for tech in technologies}
+    Through.objects.all().delete()
+    Through.objects.bulk_create(
+        (Through(project_id=pk, technology_id=by_slug[slug]) for pk, parsed in links for slug in parsed),
+        batch_size=5000,
+    )
+    recount_technologies()
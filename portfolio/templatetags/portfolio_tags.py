@@ -0,0 +1,86 @@
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.safestring import mark_safe
+
+from portfolio.assets import CRITICAL_CSS, bundle_sources, read_asset
+from portfolio.caching import set_cached_fragment
+from portfolio.metrics import registry
+
+register = template.Library()
+
+
+@register.simple_tag
+def bundle_urls(name):
+    """Hashed URL of a built asset bundle, or its source URLs when it is not built"""
+    return [static(source) for source in bundle_sources(name)]
+
+
+@register.simple_tag
+def critical_css():
+    """Above-the-fold CSS for inlining, or '' when the assets are not built"""
+    return mark_safe(read_asset(CRITICAL_CSS) or '')
+
+
+@register.simple_tag
+def clock_time_zone():
+    """Time zone for the home page clock; the browser only formats it, nothing is fetched"""
+    return settings.CLOCK_TIME_ZONE
+
+
+@register.simple_tag
+def image_srcset(derivatives, image, fmt):
+    """srcset value ("url 320w, url 640w") for an image's derivatives in one format"""
+    if not image:
+        return ''
+    entries = derivatives.get(image.name, {}).get(fmt, ())
+    return ', '.join(f'{url} {width}w' for width, url in entries)
+
+
+@register.simple_tag
+def image_thumbnail(derivatives, image, fmt='jpeg'):
+    """URL of the smallest derivative, falling back to the original upload"""
+    if not image:
+        return ''
+    entries = derivatives.get(image.name, {}).get(fmt)
+    return entries[0][1] if entries else image.url
+
+
+class CachedSectionNode(template.Node):
+
+    def __init__(self, section, nodelist):
+        self.section = section
+        self.nodelist = nodelist
+
+    def render(self, context):
+        section = self.section.resolve(context)
+        fragments = context.get('fragments')
+        if not fragments or section not in fragments:
+            # Renders that don't go through the fragment cache (static site, tests)
+            return self.nodelist.render(context)
+
+        key, html = fragments[section]
+        result = 'hit'
+        if html is None:
+            result = 'miss'
+            html = self.nodelist.render(context)
+            set_cached_fragment(key, html)
+        registry.inc('portfolio_fragment_renders_total', (('section', section), ('result', result)))
+        return html
+
+
+@register.tag
+def cached_section(parser, token):
+    """
+    {% cached_section 'skills' %}...{% endcached_section %}
+
+    Output the section from the fragment cache when the view found it there
+    (context['fragments'], see caching.get_cached_fragments), otherwise
+    render it and store it.
+    """
+    bits = token.split_contents()
+    if len(bits) != 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' takes one argument, the section name")
+    nodelist = parser.parse(('endcached_section',))
+    parser.delete_first_token()
+    return CachedSectionNode(parser.compile_filter(bits[1]), nodelist)
@@ -1,3 +1,1424 @@
-from django.test import TestCase
+import csv
+import gzip
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import brotli
+from PIL import Image
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core import mail
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIHandler
+from django.core.mail.backends.locmem import EmailBackend as LocmemEmailBackend
+from django.core.management import call_command
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.test import (
+    AsyncRequestFactory, RequestFactory, TestCase, TransactionTestCase, override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .api import fields_key, parse_fields
+from .archive import RECORD_FIELDS, archive_messages, read_archive, restore_messages
+from .assets import CRITICAL_CSS, build_assets, bundle_sources, extract_critical_css, minify_css
+from .caching import (
+    CSRF_PLACEHOLDER, VERSION_KEY, _singletons, aget_cached_home_page, aget_content_version,
+    bump_versions, cached_singleton, counters, derive_content_version, get_cached_api_body,
+    get_cached_fragments, get_content_version, get_profile, get_site_settings, metrics_cache,
+    stale_sections,
+)
+from .management.bench import percentile
+from .management.commands.bench_portfolio import compare_results
+from .metrics import BUCKETS, WORKER_KEY, WORKERS_KEY, Registry, collect, registry, worker_id
+from .models import (
+    Profile, ProfileImage, Education, Experience, Skill, Project, Technology, Testimonial,
+    ContactMessage, OutboxEmail, ImageDerivative, SiteSettings
+)
+from .notifications import notification_executor
+from .outbox import claim_batch, drain_outbox, enqueue_email
+from .ratelimit import shed_counts, take_token
+from .export import export_lines
+from .derivatives import build_derivatives, derivatives_changed, generate_derivatives
+from .storage import ManifestStaticFilesStorage
+from .search import search_messages
+from .sqlite import PRAGMAS
+from .snapshot import SNAPSHOT_QUERY_BUDGET, SNAPSHOT_WARM_QUERY_BUDGET, load_portfolio_snapshot
+from .routers import PIN_COOKIE, PrimaryPinMiddleware, PrimaryReplicaRouter, fresh_content_reads
+from .pagination import decode_cursor, keyset_page
+from .tasks import BoundedExecutor
+from .technologies import parse_technologies, rebuild_technologies
+from .views import home_async, render_home_page
+from .warmup import warm_process, warm_worker
+
+TEST_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'counters': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'counters'},
+    'metrics': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'metrics'},
+}
+
+# Every test in the module gets in-memory caches, not just PortfolioTestCase:
+# any request goes through the metrics middleware, whose flush() would
+# otherwise write into the real cache directory
+module_caches = override_settings(CACHES=TEST_CACHES)
+
+
+def setUpModule():
+    module_caches.enable()
+
+
+def tearDownModule():
+    module_caches.disable()
+
+
+# The manifest only exists after collectstatic
+TEST_STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+
+@override_settings(CACHES=TEST_CACHES, STORAGES=TEST_STORAGES)
+class PortfolioTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        counters.clear()
+        metrics_cache.clear()
+
+
+class HomePageCacheTests(PortfolioTestCase):
+
+    def setUp(self):
+        super().setUp()
+        Profile.objects.create(name="Test Person", email="test@example.com")
+        Skill.objects.create(category='backend', name="Wagtail")
+
+    def test_cache_hit_skips_database(self):
+        self.client.get(reverse('home'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('home'))
+        self.assertContains(response, "Wagtail")
+
+    def test_save_invalidates_page(self):
+        self.client.get(reverse('home'))
+        with self.captureOnCommitCallbacks(execute=True):
+            Skill.objects.create(category='frontend', name="Svelte")
+        self.assertContains(self.client.get(reverse('home')), "Svelte")
+
+    def test_delete_invalidates_page(self):
+        self.client.get(reverse('home'))
+        with self.captureOnCommitCallbacks(execute=True):
+            Skill.objects.filter(name="Wagtail").delete()
+        self.assertNotContains(self.client.get(reverse('home')), "Wagtail")
+
+    def test_site_settings_invalidate_page(self):
+        self.client.get(reverse('home'))
+        with self.captureOnCommitCallbacks(execute=True):
+            site_settings = SiteSettings.load()
+            site_settings.site_title = "Renamed Site"
+            site_settings.save()
+        self.assertContains(self.client.get(reverse('home')), "Renamed Site")
+
+    @override_settings(CLOCK_TIME_ZONE='Asia/Kathmandu')
+    def test_clock_time_zone_is_rendered(self):
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, 'data-time-zone="Asia/Kathmandu"')
+
+    def test_csrf_token_is_per_visitor(self):
+        first = self.client.get(reverse('home'))
+        second = self.client_class().get(reverse('home'))
+        self.assertNotContains(second, CSRF_PLACEHOLDER)
+        self.assertNotEqual(first.cookies['csrftoken'].value, second.cookies['csrftoken'].value)
+
+    def test_post_is_not_cached(self):
+        self.client.get(reverse('home'))
+        response = self.client.post(reverse('home'), {
+            'name': "Visitor", 'email': "visitor@example.com", 'message': "Hello",
+        })
+        self.assertEqual(response.json()['status'], 'success')
+
+
+class ConditionalGetTests(PortfolioTestCase):
+
+    def setUp(self):
+        super().setUp()
+        Profile.objects.create(name="Test Person", email="test@example.com")
+        self.skill = Skill.objects.create(category='backend', name="Wagtail")
+
+    def test_validators_present(self):
+        response = self.client.get(reverse('home'))
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        self.assertIn('Last-Modified', response)
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_matching_etag_returns_304_without_queries(self):
+        etag = self.client.get(reverse('home'))['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('home'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_if_modified_since_returns_304(self):
+        last_modified = self.client.get(reverse('home'))['Last-Modified']
+        response = self.client.get(reverse('home'), HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_content_change_invalidates_etag(self):
+        etag = self.client.get(reverse('home'))['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.skill.name = "Wagtail CMS"
+            self.skill.save()
+        response = self.client.get(reverse('home'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Wagtail CMS")
+
+    def test_deploy_invalidates_etag(self):
+        etag = self.client.get(reverse('home'))['ETag']
+        with override_settings(BUILD_ID='next-release'):
+            response = self.client.get(reverse('home'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_derived_version_is_one_query(self):
+        with self.assertNumQueries(1):
+            version = derive_content_version()
+        self.assertGreater(version, 0)
+
+    def test_derived_version_changes_on_delete(self):
+        Skill.objects.create(category='backend', name="Older", order=1)
+        # Deleting a row that is not the newest leaves MAX(updated_at) alone
+        Skill.objects.filter(name="Older").update(updated_at=self.skill.updated_at)
+        before = derive_content_version()
+        Skill.objects.filter(name="Older").delete()
+        self.assertNotEqual(derive_content_version(), before)
+
+
+class AsyncHomeTests(PortfolioTestCase):
+
+    def setUp(self):
+        super().setUp()
+        profile = Profile.objects.create(name="Test Person", email="test@example.com")
+        ProfileImage.objects.create(profile=profile, image='profile/slider/1.jpg')
+        Skill.objects.create(category='backend', name="Wagtail")
+        Project.objects.create(title="Site Builder", description="Static", technologies="Django")
+
+    async def test_renders_same_page_as_sync_view(self):
+        response = await home_async(AsyncRequestFactory().get('/'))
+        sync_html = await sync_to_async(render_home_page)()
+        self.assertContains(response, "Wagtail")
+        self.assertContains(response, "Site Builder")
+        self.assertNotContains(response, CSRF_PLACEHOLDER)
+        self.assertEqual(await aget_cached_home_page(await aget_content_version()), sync_html)
+
+    async def test_matching_etag_returns_304(self):
+        response = await home_async(AsyncRequestFactory().get('/'))
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn('Last-Modified', response)
+        repeat = await home_async(
+            AsyncRequestFactory().get('/', headers={'If-None-Match': response['ETag']})
+        )
+        self.assertEqual(repeat.status_code, 304)
+
+    async def test_post_is_handled_as_contact(self):
+        request = AsyncRequestFactory().post('/', {
+            'name': "Visitor", 'email': "visitor@example.com", 'message': "Hello",
+        })
+        response = await home_async(request)
+        self.assertEqual(json.loads(response.content)['status'], 'success')
+        self.assertTrue(await ContactMessage.objects.filter(name="Visitor").aexists())
+
+    def test_asgi_middleware_chain_stays_async(self):
+        # With DEBUG on, Django logs each sync middleware it has to wrap for an async chain
+        with override_settings(DEBUG=True), self.assertNoLogs('django.request', 'DEBUG'):
+            ASGIHandler().load_middleware(is_async=True)
+
+
+class HomePageQueryBudgetTests(PortfolioTestCase):
+    """The home page must cost the same number of queries at any data volume"""
+
+    def populate(self, count):
+        profile = Profile.objects.create(name="Test Person", email="test@example.com")
+        for i in range(count):
+            ProfileImage.objects.create(profile=profile, image=f'profile/slider/{i}.jpg', order=i)
+            Education.objects.create(institution=f"School {i}", degree="BSc", order=i)
+            Experience.objects.create(title=f"Role {i}", description="Work", order=i)
+            Skill.objects.create(category='backend', name=f"Skill {i}", order=i)
+            Project.objects.create(title=f"Project {i}", description="Built it", technologies="Django", order=i)
+            Testimonial.objects.create(name=f"Client {i}", position="CTO", testimonial="Great", order=i)
+
+    def assertHomeWithinBudget(self):
+        cache.clear()
+        get_content_version()
+        with self.assertNumQueries(SNAPSHOT_QUERY_BUDGET):
+            response = self.client.get(reverse('home'))
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_empty_database(self):
+        # No profile and no images: the slider prefetch and derivative lookup are skipped
+        with self.assertNumQueries(SNAPSHOT_QUERY_BUDGET - 2):
+            snapshot = load_portfolio_snapshot()
+        self.assertIsNone(snapshot.profile)
+
+    def test_budget_with_few_rows(self):
+        self.populate(1)
+        self.assertHomeWithinBudget()
+
+    def test_budget_with_many_rows(self):
+        self.populate(25)
+        response = self.assertHomeWithinBudget()
+        self.assertContains(response, 'class="slider-controls"')
+        # Projects past the first page are left to the scroll loader
+        size = settings.SECTION_PAGE_SIZE
+        self.assertContains(response, f"Project {size - 1}")
+        self.assertNotContains(response, f"Project {size}")
+        self.assertContains(response, 'data-load-more')
+
+    def test_warm_snapshot_skips_singletons(self):
+        self.populate(3)
+        load_portfolio_snapshot()
+        with self.assertNumQueries(SNAPSHOT_WARM_QUERY_BUDGET):
+            snapshot = load_portfolio_snapshot()
+        self.assertEqual(len(snapshot.profile_images), 3)
+
+    def test_snapshot_is_immutable(self):
+        self.populate(1)
+        snapshot = load_portfolio_snapshot()
+        self.assertEqual(len(snapshot.profile_images), 1)
+        with self.assertRaises(AttributeError):
+            snapshot.projects = ()
+
+    def test_render_does_not_create_settings(self):
+        self.populate(1)
+        self.client.get(reverse('home'))
+        self.assertFalse(SiteSettings.objects.exists())
+
+
+class FragmentCacheTests(PortfolioTestCase):
+
+    def setUp(self):
+        super().setUp()
+        profile = Profile.objects.create(name="Test Person", email="test@example.com")
+        ProfileImage.objects.create(profile=profile, image='profile/slider/1.jpg')
+        Skill.objects.create(category='backend', name="Wagtail")
+        Project.objects.create(title="Site Builder", description="Static", technologies="Django")
+        self.client.get(reverse('home'))
+
+    def renders(self, section, result):
+        return registry.snapshot()['counters'].get(
+            ('portfolio_fragment_renders_total', (('section', section), ('result', result))), 0
+        )
+
+    def test_skill_edit_rerenders_only_skills(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Skill.objects.create(category='frontend', name="Svelte")
+        self.assertEqual(stale_sections(get_cached_fragments()), ['skills'])
+        skill_misses, project_hits = self.renders('skills', 'miss'), self.renders('projects', 'hit')
+        # Just the skills query: the other sections come from the fragment cache
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('home'))
+        self.assertContains(response, "Svelte")
+        self.assertContains(response, "Site Builder")
+        self.assertEqual(self.renders('skills', 'miss'), skill_misses + 1)
+        self.assertEqual(self.renders('projects', 'hit'), project_hits + 1)
+
+    def test_site_settings_rerender_testimonials(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            SiteSettings.objects.create(pk=1, enable_testimonials=False)
+        self.assertEqual(stale_sections(get_cached_fragments()), ['testimonials'])
+
+    def test_new_derivatives_rerender_image_sections(self):
+        derivatives_changed()
+        self.assertEqual(stale_sections(get_cached_fragments()), ['hero', 'projects', 'testimonials'])
+
+    def test_assembled_page_matches_full_render(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Skill.objects.create(category='frontend', name="Svelte")
+        assembled = render_home_page()
+        cache.clear()
+        self.assertEqual(render_home_page(), assembled)
+
+
+class SingletonCacheTests(PortfolioTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.profile = Profile.objects.create(name="Test Person", email="test@example.com")
+
+    def test_steady_state_makes_no_queries(self):
+        get_profile()
+        get_site_settings()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_profile().name, "Test Person")
+            get_site_settings()
+
+    def test_save_invalidates_copy(self):
+        get_profile()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.name = "Renamed"
+            self.profile.save()
+        self.assertEqual(get_profile().name, "Renamed")
+
+    def test_version_bump_from_another_worker_reloads(self):
+        get_site_settings()
+        # A save in another worker only reaches this one through the shared version
+        SiteSettings.objects.filter(pk=1).delete()
+        SiteSettings.objects.bulk_create([SiteSettings(pk=1, site_title="Elsewhere")])
+        self.assertEqual(get_site_settings().site_title, "N:PORTFOLIO")
+        bump_versions(SiteSettings._meta.label_lower)
+        self.assertEqual(get_site_settings().site_title, "Elsewhere")
+
+    @mock.patch('portfolio.derivatives.schedule_derivatives')
+    def test_slider_images_invalidate_profile(self, schedule_derivatives):
+        get_profile()
+        with self.captureOnCommitCallbacks(execute=True):
+            ProfileImage.objects.create(profile=self.profile, image='profile/slider/new.jpg')
+        profile = get_profile()
+        with self.assertNumQueries(0):
+            self.assertEqual(len(profile.images.all()), 1)
+
+    def test_load_does_not_write(self):
+        with self.assertNumQueries(1):
+            site_settings = SiteSettings.load()
+        self.assertIsNone(site_settings.updated_at)
+        self.assertFalse(SiteSettings.objects.exists())
+
+
+class BlockingEmailBackend(LocmemEmailBackend):
+    """Mail backend that hangs until the test releases it, like a stuck SMTP server"""
+    release = threading.Event()
+
+    def send_messages(self, messages):
+        self.release.wait(timeout=5)
+        return super().send_messages(messages)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ContactEndpointTests(TransactionTestCase):
+    # Real commits, so the background delivery thread can see the outbox row
+    data = {'name': "Visitor", 'email': "visitor@example.com", 'message': "Hello"}
+
+    def setUp(self):
+        cache.clear()
+        counters.clear()
+        metrics_cache.clear()
+
+    def post_contact(self):
+        return self.client.post(reverse('contact'), self.data)
+
+    def test_saves_message_and_sends_notification(self):
+        response = self.post_contact()
+        self.assertEqual(response.json()['status'], 'success')
+        self.assertTrue(notification_executor.wait(timeout=5))
+        contact_message = ContactMessage.objects.get()
+        self.assertEqual(contact_message.email, "visitor@example.com")
+        self.assertEqual(contact_message.emails.get().status, OutboxEmail.STATUS_SENT)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn("Hello", mail.outbox[0].body)
+
+    @override_settings(EMAIL_BACKEND='portfolio.tests.BlockingEmailBackend')
+    def test_responds_before_smtp_finishes(self):
+        BlockingEmailBackend.release.clear()
+        try:
+            started = time.monotonic()
+            response = self.post_contact()
+            self.assertLess(time.monotonic() - started, 1)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(mail.outbox), 0)
+            self.assertTrue(OutboxEmail.objects.exists())
+        finally:
+            BlockingEmailBackend.release.set()
+        self.assertTrue(notification_executor.wait(timeout=5))
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_get_hands_out_csrf_token(self):
+        response = self.client.get(reverse('contact'))
+        self.assertTrue(response.json()['csrfToken'])
+        self.assertIn('csrftoken', response.cookies)
+
+
+@override_settings(CONTACT_RATE_LIMITS={'ip': (3, 60), 'email': (2, 300)}, RATE_LIMIT_TRUSTED_PROXIES=1)
+class ContactRateLimitTests(PortfolioTestCase):
+
+    def post_contact(self, email="visitor@example.com", forwarded='203.0.113.7'):
+        data = {'name': "Visitor", 'email': email, 'message': "Hello"}
+        with mock.patch('portfolio.views.queue_outbox_delivery'):
+            return self.client.post(reverse('contact'), data, HTTP_X_FORWARDED_FOR=forwarded)
+
+    def test_ip_flood_is_shed_before_the_database(self):
+        for i in range(3):
+            self.assertEqual(self.post_contact(email=f"v{i}@example.com").status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.post_contact(email="v9@example.com")
+        self.assertEqual(response.status_code, 429)
+        self.assertIn(int(response['Retry-After']), range(1, 61))
+        self.assertEqual(ContactMessage.objects.count(), 3)
+        self.assertEqual(shed_counts(), {'ip': 1, 'email': 0})
+
+    def test_email_is_limited_across_addresses(self):
+        self.post_contact(forwarded='203.0.113.1')
+        self.post_contact(forwarded='203.0.113.2')
+        response = self.post_contact(forwarded='203.0.113.3')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(shed_counts()['email'], 1)
+
+    def test_spoofed_forwarded_entries_are_ignored(self):
+        # Only the hop appended by the trusted proxy identifies the client
+        for i in range(3):
+            self.post_contact(email=f"v{i}@example.com", forwarded=f'10.0.0.{i}, 203.0.113.7')
+        response = self.post_contact(email="v9@example.com", forwarded='10.0.0.9, 203.0.113.7')
+        self.assertEqual(response.status_code, 429)
+
+    def test_bucket_refills(self):
+        with mock.patch('portfolio.ratelimit.time.time', return_value=1000.0):
+            for i in range(4):
+                self.post_contact(email=f"v{i}@example.com")
+        with mock.patch('portfolio.ratelimit.time.time', return_value=1060.0):
+            self.assertEqual(self.post_contact(email="v9@example.com").status_code, 200)
+
+    def test_flood_leaves_page_views_untouched(self):
+        Profile.objects.create(name="Test Person", email="test@example.com")
+        self.client.get(reverse('home'))
+        for i in range(20):
+            self.post_contact(email=f"v{i}@example.com")
+        # Shed POSTs change no content, so the cached page is still served as is
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(reverse('home')).status_code, 200)
+        self.assertEqual(shed_counts()['ip'], 17)
+
+    @override_settings(CACHES={
+        **TEST_CACHES,
+        'counters': {**TEST_CACHES['counters'], 'OPTIONS': {'MAX_ENTRIES': 10, 'CULL_FREQUENCY': 2}},
+    })
+    def test_shed_counts_survive_bucket_culling(self):
+        for i in range(3):
+            self.post_contact(email=f"v{i}@example.com")
+        self.post_contact(email="v9@example.com")
+        # A flood from many addresses culls the bucket cache over and over
+        for i in range(50):
+            take_token('ip', f'198.51.100.{i}', 5, 60)
+        self.assertEqual(shed_counts()['ip'], 1)
+
+    def test_buckets_are_kept_out_of_page_cache(self):
+        for i in range(3):
+            self.post_contact(email=f"v{i}@example.com")
+        # Culling or clearing the page cache doesn't refill them
+        cache.clear()
+        self.assertEqual(self.post_contact(email="v9@example.com").status_code, 429)
+
+
+class BoundedExecutorTests(TestCase):
+
+    def test_drops_jobs_when_full(self):
+        release = threading.Event()
+        executor = BoundedExecutor('test', max_workers=1, max_queue=1)
+        self.assertIsNotNone(executor.submit(release.wait, 5))
+        self.assertIsNotNone(executor.submit(release.wait, 5))
+        with self.assertLogs('portfolio.tasks', 'WARNING'):
+            self.assertIsNone(executor.submit(release.wait, 5))
+
+        stats = executor.stats()
+        self.assertEqual(stats['dropped'], 1)
+        self.assertEqual(stats['queue_depth'] + stats['running'], 2)
+
+        release.set()
+        self.assertTrue(executor.wait(timeout=5))
+        self.assertEqual(executor.stats()['completed'], 2)
+
+    def test_counts_failures(self):
+        executor = BoundedExecutor('test', max_workers=1, max_queue=1)
+        with self.assertLogs('portfolio.tasks', 'ERROR'):
+            executor.submit(lambda: 1 / 0)
+            self.assertTrue(executor.wait(timeout=5))
+        self.assertEqual(executor.stats()['failed'], 1)
+
+
+class CountingEmailBackend(LocmemEmailBackend):
+    opened = 0
+
+    def open(self):
+        CountingEmailBackend.opened += 1
+        return super().open()
+
+
+class FailingEmailBackend(LocmemEmailBackend):
+
+    def send_messages(self, messages):
+        raise ConnectionRefusedError("SMTP server unavailable")
+
+
+@override_settings(OUTBOX_MAX_ATTEMPTS=3, OUTBOX_RETRY_BASE_SECONDS=60)
+class OutboxTests(TestCase):
+
+    def enqueue(self, count=1):
+        return [
+            enqueue_email(f"Subject {i}", "Body", ["owner@example.com"])
+            for i in range(count)
+        ]
+
+    @override_settings(EMAIL_BACKEND='portfolio.tests.CountingEmailBackend')
+    def test_batch_reuses_one_connection(self):
+        CountingEmailBackend.opened = 0
+        self.enqueue(5)
+        self.assertEqual(drain_outbox(batch_size=10), {'sent': 5, 'failed': 0})
+        self.assertEqual(CountingEmailBackend.opened, 1)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertFalse(OutboxEmail.objects.exclude(status=OutboxEmail.STATUS_SENT).exists())
+
+    @override_settings(EMAIL_BACKEND='portfolio.tests.FailingEmailBackend')
+    def test_failures_back_off_then_dead_letter(self):
+        email, = self.enqueue()
+        with self.assertLogs('portfolio.outbox', 'WARNING'):
+            drain_outbox()
+        email.refresh_from_db()
+        self.assertEqual(email.attempts, 1)
+        self.assertEqual(email.status, OutboxEmail.STATUS_PENDING)
+        self.assertIn("SMTP server unavailable", email.last_error)
+
+        # Not due again until the backoff has passed
+        self.assertEqual(drain_outbox(), {'sent': 0, 'failed': 0})
+        first_delay = email.next_attempt_at - timezone.now()
+        self.assertGreater(first_delay.total_seconds(), 50)
+
+        with self.assertLogs('portfolio.outbox', 'WARNING'):
+            for _ in range(2):
+                OutboxEmail.objects.update(next_attempt_at=timezone.now())
+                drain_outbox()
+        email.refresh_from_db()
+        self.assertEqual(email.attempts, 3)
+        self.assertEqual(email.status, OutboxEmail.STATUS_DEAD)
+
+    def test_claimed_emails_are_skipped(self):
+        self.enqueue(2)
+        claimed = claim_batch(10)
+        self.assertEqual(len(claimed), 2)
+        self.assertEqual(claim_batch(10), [])
+
+    def test_send_outbox_command(self):
+        self.enqueue(3)
+        out = StringIO()
+        call_command('send_outbox', batch_size=2, stdout=out)
+        self.assertIn("Sent 3", out.getvalue())
+        self.assertEqual(len(mail.outbox), 3)
+
+
+class StaticSiteTests(PortfolioTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.TemporaryDirectory()
+        self.output = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_root.cleanup)
+        self.addCleanup(self.output.cleanup)
+        os.makedirs(os.path.join(self.media_root.name, 'projects'))
+        with open(os.path.join(self.media_root.name, 'projects', 'shot.png'), 'wb') as f:
+            f.write(b'not really a png')
+        Profile.objects.create(name="Test Person", email="test@example.com")
+        Project.objects.create(title="Site Builder", description="Static", technologies="Django",
+                               image='projects/shot.png')
+
+    def build(self):
+        with override_settings(MEDIA_ROOT=self.media_root.name):
+            call_command('build_static_site', output=self.output.name, stdout=StringIO())
+        with open(os.path.join(self.output.name, 'index.html')) as f:
+            return f.read()
+
+    def test_renders_page_with_hashed_urls(self):
+        html = self.build()
+        self.assertIn("Site Builder", html)
+        self.assertNotIn(CSRF_PLACEHOLDER, html)
+        self.assertNotIn('/static/css/style.css', html)
+        self.assertNotIn('/media/projects/shot.png', html)
+        # The minified bundle when build_assets has run, the sources otherwise
+        self.assertRegex(html, r'/static/(css/style|dist/site\.min)\.[0-9a-f]{12}\.css"')
+        self.assertRegex(html, r'/media/projects/shot\.[0-9a-f]{12}\.png"')
+
+    def test_writes_precompressed_variants(self):
+        html = self.build()
+        with gzip.open(os.path.join(self.output.name, 'index.html.gz'), 'rt') as f:
+            self.assertEqual(f.read(), html)
+        with open(os.path.join(self.output.name, 'index.html.br'), 'rb') as f:
+            self.assertEqual(brotli.decompress(f.read()).decode(), html)
+        static_files = [
+            name for _, _, names in os.walk(os.path.join(self.output.name, 'static')) for name in names
+        ]
+        self.assertTrue(any(name.endswith('.css.gz') for name in static_files))
+        self.assertTrue(any(name.endswith('.css.br') for name in static_files))
+
+    def test_serving_refuses_auto_rebuild(self):
+        env = {**os.environ, 'STATIC_SITE_SERVE': '1', 'STATIC_SITE_AUTO_REBUILD': '1'}
+        result = subprocess.run(
+            [sys.executable, '-c', 'import nischit_portfolio.settings'],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn('ImproperlyConfigured', result.stderr)
+
+    @override_settings(STATIC_SITE_AUTO_REBUILD=True)
+    def test_admin_save_schedules_rebuild(self):
+        with mock.patch('portfolio.static_site.schedule_rebuild') as schedule_rebuild:
+            with self.captureOnCommitCallbacks(execute=True):
+                Skill.objects.create(category='backend', name="Wagtail")
+        schedule_rebuild.assert_called_once()
+
+
+@override_settings(IMAGE_DERIVATIVE_WORKERS=0, IMAGE_DERIVATIVE_WIDTHS=(160, 320))
+class ImageDerivativeTests(PortfolioTestCase):
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        override = override_settings(MEDIA_ROOT=media_root.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        os.makedirs(os.path.join(media_root.name, 'projects'))
+        Image.new('RGB', (800, 400), 'teal').save(os.path.join(media_root.name, 'projects', 'shot.png'))
+        self.project = Project.objects.create(
+            title="Gallery", description="Pictures", technologies="Pillow", image='projects/shot.png',
+        )
+
+    def test_generates_resized_webp_and_jpeg(self):
+        self.assertEqual(generate_derivatives('projects/shot.png'), 4)
+        derivatives = ImageDerivative.objects.filter(source='projects/shot.png')
+        self.assertEqual(sorted({d.width for d in derivatives}), [160, 320])
+        self.assertEqual(sorted({d.format for d in derivatives}), ['jpeg', 'webp'])
+        small = derivatives.get(format='webp', width=160)
+        self.assertEqual(small.height, 80)
+        self.assertIn(small.source_hash[:16], small.file.name)
+        with Image.open(small.file.path) as image:
+            self.assertEqual(image.format, 'WEBP')
+        # Already generated: nothing to do
+        self.assertEqual(generate_derivatives('projects/shot.png'), 0)
+
+    def test_upload_schedules_generation(self):
+        with mock.patch('portfolio.derivatives.derivative_executor') as executor:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.project.save()
+        executor.submit.assert_called_once_with(build_derivatives, ['projects/shot.png'])
+
+    def test_missing_source_is_skipped(self):
+        with self.assertLogs('portfolio.derivatives', 'WARNING'):
+            self.assertEqual(generate_derivatives('projects/missing.png'), 0)
+
+    def test_never_upscales(self):
+        with override_settings(IMAGE_DERIVATIVE_WIDTHS=(320, 1600)):
+            generate_derivatives('projects/shot.png')
+        widths = set(ImageDerivative.objects.values_list('width', flat=True))
+        self.assertEqual(widths, {320, 800})
+
+    def test_page_uses_srcset(self):
+        generate_derivatives('projects/shot.png')
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(response, '-160.webp 160w')
+        self.assertContains(response, '-320.jpg 320w')
+
+    def test_admin_thumbnail_uses_smallest_derivative(self):
+        from django.contrib.auth.models import User
+        generate_derivatives('projects/shot.png')
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        with self.assertNumQueries(8):
+            response = self.client.get(reverse('admin:portfolio_project_changelist'))
+        self.assertContains(response, '-160.jpg')
+
+
+class AssetBuildTests(PortfolioTestCase):
+
+    def test_minify_css(self):
+        css = "/* header */\nheader {\n  color: red;\n  margin : 0 ;\n}\na :hover { color: blue; }"
+        self.assertEqual(minify_css(css), "header{color:red;margin :0}a :hover{color:blue}")
+
+    def test_critical_css_keeps_first_screen_rules(self):
+        css = """
+        body { margin: 0; }
+        .hero { animation: fade 1s; }
+        .footer-links { color: red; }
+        @media (max-width: 600px) { .hero { padding: 0; } .modal { top: 0; } }
+        @keyframes fade { from { opacity: 0; } to { opacity: 1; } }
+        @keyframes spin { to { transform: rotate(1turn); } }
+        """
+        critical = extract_critical_css(css, ['.hero*'])
+        self.assertIn('body{margin:0}', critical)
+        self.assertIn('@media (max-width:600px){.hero{padding:0}}', critical)
+        self.assertIn('@keyframes fade', critical)
+        self.assertNotIn('footer-links', critical)
+        self.assertNotIn('modal', critical)
+        self.assertNotIn('spin', critical)
+
+    def test_build_writes_bundles(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            sizes = build_assets(output_dir)
+            for name in list(settings.ASSET_BUNDLES) + [CRITICAL_CSS]:
+                self.assertTrue(os.path.exists(os.path.join(output_dir, name)))
+                self.assertGreater(sizes[name], 0)
+
+    @override_settings(ASSET_BUNDLES={'dist/missing.min.css': ['css/style.css']})
+    def test_unbuilt_bundle_falls_back_to_sources(self):
+        self.assertEqual(bundle_sources('dist/missing.min.css'), ['css/style.css'])
+
+    def test_missing_static_file_keeps_plain_url(self):
+        with tempfile.TemporaryDirectory() as static_root:
+            storage = ManifestStaticFilesStorage(location=static_root)
+            self.assertEqual(storage.url('images/favicon.ico'), '/static/images/favicon.ico')
+
+    def test_page_has_no_timestamp_cache_busters(self):
+        response = self.client.get(reverse('home'))
+        self.assertNotContains(response, '?v=')
+
+
+class ContactSearchTests(TestCase):
+
+    def setUp(self):
+        self.internship = ContactMessage.objects.create(
+            name="Asha", email="asha@example.com", message="Looking for an internship in Kathmandu",
+        )
+        self.mention = ContactMessage.objects.create(
+            name="Bikash", email="bikash@example.com", subject="Internship",
+            message="Any internship openings? I saw the internship post",
+        )
+        ContactMessage.objects.create(name="Chris", email="chris@example.com", message="Website quote")
+
+    def search(self, term):
+        return list(search_messages(ContactMessage.objects.all(), term).order_by('search_rank'))
+
+    def test_matches_prefixes_of_every_word(self):
+        self.assertEqual(self.search("intern kathmandu"), [self.internship])
+        self.assertEqual(self.search("chris@example"), [ContactMessage.objects.get(name="Chris")])
+
+    def test_ranks_better_matches_first(self):
+        self.assertEqual(self.search("internship"), [self.mention, self.internship])
+
+    def test_index_follows_edits_and_deletes(self):
+        self.internship.message = "Freelance work"
+        self.internship.save()
+        self.assertEqual(self.search("freelance"), [self.internship])
+        self.assertEqual(self.search("kathmandu"), [])
+        self.mention.delete()
+        self.assertEqual(self.search("internship"), [])
+
+    def test_punctuation_only_term_uses_default_search(self):
+        self.assertIsNone(search_messages(ContactMessage.objects.all(), '"*'))
+
+    def test_admin_search_uses_index(self):
+        from django.contrib.auth.models import User
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('admin:portfolio_contactmessage_changelist'), {'q': "internship"})
+        self.assertNotContains(response, "Chris")
+        content = response.content.decode()
+        self.assertLess(content.index("Bikash"), content.index("Asha"))
+        self.assertFalse(any('LIKE' in query['sql'] for query in queries))
+
+
+class ArchiveTests(TestCase):
+
+    def setUp(self):
+        self.archive_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.archive_dir.cleanup)
+        old = timezone.now() - timedelta(days=400)
+        for i in range(5):
+            message = ContactMessage.objects.create(
+                name=f"Old {i}", email=f"old{i}@example.com", message="Namaste", is_replied=i % 2 == 0,
+            )
+            ContactMessage.objects.filter(pk=message.pk).update(created_at=old)
+        ContactMessage.objects.create(name="Recent", email="recent@example.com", message="Hi")
+
+    def archive(self, **kwargs):
+        return archive_messages(older_than_days=365, batch_size=2, output_dir=self.archive_dir.name, **kwargs)
+
+    def test_moves_old_messages_in_batches(self):
+        old = ContactMessage.objects.get(name="Old 0")
+        outbox_email = enqueue_email("New message", "Body", ['me@example.com'], contact_message=old)
+        count, path = self.archive()
+        self.assertEqual(count, 5)
+        self.assertEqual(list(ContactMessage.objects.values_list('name', flat=True)), ["Recent"])
+        outbox_email.refresh_from_db()
+        self.assertIsNone(outbox_email.contact_message)
+        # Three batches, three gzip members, one readable file
+        records = list(read_archive(path))
+        self.assertEqual([r['name'] for r in records], [f"Old {i}" for i in range(5)])
+
+    def test_replied_only(self):
+        count, path = self.archive(replied_only=True)
+        self.assertEqual(count, 3)
+        self.assertEqual(ContactMessage.objects.filter(is_replied=True).count(), 0)
+        self.assertEqual(ContactMessage.objects.count(), 3)
+
+    def test_nothing_due_writes_no_file(self):
+        self.assertEqual(archive_messages(older_than_days=1000, output_dir=self.archive_dir.name), (0, None))
+        self.assertEqual(os.listdir(self.archive_dir.name), [])
+
+    def test_restore_round_trip(self):
+        before = list(ContactMessage.objects.order_by('pk').values(*RECORD_FIELDS))
+        count, path = self.archive()
+        out = StringIO()
+        call_command('restore_messages', path, stdout=out)
+        self.assertIn("Restored 5 messages", out.getvalue())
+        self.assertEqual(list(ContactMessage.objects.order_by('pk').values(*RECORD_FIELDS)), before)
+        # Running it again restores nothing twice
+        self.assertEqual(restore_messages(path), 0)
+
+    def test_dry_run_deletes_nothing(self):
+        out = StringIO()
+        call_command('archive_messages', '--older-than', '365', '--dry-run', stdout=out)
+        self.assertIn("5 messages would be archived", out.getvalue())
+        self.assertEqual(ContactMessage.objects.count(), 6)
+
+
+class ExportTests(TestCase):
+
+    def setUp(self):
+        from django.contrib.auth.models import User
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        self.first = ContactMessage.objects.create(
+            name="Asha", email="asha@example.com", message='Line one\nwith "quotes", commas',
+        )
+        self.second = ContactMessage.objects.create(
+            name="Bikash", email="bikash@example.com", message="नमस्ते", is_replied=True,
+        )
+
+    def run_action(self, action, pks):
+        return self.client.post(reverse('admin:portfolio_contactmessage_changelist'), {
+            'action': action, '_selected_action': pks,
+        })
+
+    def test_admin_csv_export_streams(self):
+        response = self.run_action('export_csv', [self.first.pk, self.second.pk])
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment;', response['Content-Disposition'])
+        rows = list(csv.DictReader(StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual({row['name'] for row in rows}, {"Asha", "Bikash"})
+        self.assertIn('"quotes", commas', next(r for r in rows if r['name'] == "Asha")['message'])
+
+    def test_admin_jsonl_export_only_selected(self):
+        response = self.run_action('export_jsonl', [self.second.pk])
+        records = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]['message'], "नमस्ते")
+        self.assertTrue(records[0]['is_replied'])
+
+    def test_streams_from_one_query(self):
+        lines = export_lines(ContactMessage.objects.order_by('pk'), 'jsonl', chunk_size=1)
+        with self.assertNumQueries(1):
+            self.assertEqual(len(list(lines)), 2)
+
+    def test_command_writes_file(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            path = os.path.join(output_dir, 'replied.jsonl')
+            out = StringIO()
+            call_command('export_messages', '--format', 'jsonl', '--replied', '--output', path, stdout=out)
+            self.assertIn("Exported 1 messages", out.getvalue())
+            with open(path, encoding='utf-8') as f:
+                self.assertEqual(json.loads(f.read())['name'], "Bikash")
+
+
+class PortfolioApiTests(PortfolioTestCase):
+
+    def setUp(self):
+        super().setUp()
+        Profile.objects.create(name="Test Person", email="test@example.com", phone="555-0100")
+        Project.objects.create(title="Site Builder", description="Static", technologies="Django",
+                               github_url="https://github.com/example/site")
+        Testimonial.objects.create(name="Hidden", position="CTO", testimonial="No", is_active=False)
+
+    def get(self, **params):
+        return self.client.get(reverse('portfolio-api'), params)
+
+    def test_returns_every_section(self):
+        data = self.get().json()
+        self.assertEqual(data['version'], 1)
+        self.assertEqual(data['profile']['name'], "Test Person")
+        self.assertNotIn('phone', data['profile'])
+        self.assertEqual(data['projects'][0]['github_url'], "https://github.com/example/site")
+        self.assertEqual(data['testimonials'], [])
+        self.assertEqual(data['skills'], [])
+
+    def test_field_selection(self):
+        data = self.get(fields='projects.title,profile.name').json()
+        self.assertEqual(data['profile'], {'name': "Test Person"})
+        self.assertEqual(data['projects'], [{'title': "Site Builder"}])
+        self.assertNotIn('skills', data)
+
+    def test_unknown_field_is_rejected(self):
+        response = self.get(fields='profile.phone')
+        self.assertEqual(response.status_code, 400)
+
+    def test_body_is_cached_and_revalidated(self):
+        response = self.get()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get().content, response.content)
+        not_modified = self.client.get(reverse('portfolio-api'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_selections_are_cut_from_the_full_body(self):
+        full = self.get().json()
+        with self.assertNumQueries(0):
+            data = self.get(fields='projects.title,profile').json()
+        self.assertEqual(data['profile'], full['profile'])
+        self.assertEqual(data['projects'], [{'title': "Site Builder"}])
+        self.assertEqual(list(data), ['version', 'content_version', 'profile', 'projects'])
+        # Only the full body is stored, whatever the selections asked for
+        version = get_content_version()
+        self.assertIsNone(get_cached_api_body(version, fields_key(parse_fields('projects.title,profile'))))
+
+    def test_selections_have_their_own_etags(self):
+        self.assertNotEqual(self.get()['ETag'], self.get(fields='projects')['ETag'])
+        # Order of the requested fields does not matter
+        self.assertEqual(self.get(fields='projects,profile')['ETag'], self.get(fields='profile,projects')['ETag'])
+
+    def test_save_invalidates_body(self):
+        etag = self.get()['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Project.objects.create(title="Second", description="More", technologies="Go")
+        response = self.client.get(reverse('portfolio-api'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['projects']), 2)
+
+    def test_read_only(self):
+        self.assertEqual(self.client.post(reverse('portfolio-api')).status_code, 405)
+
+
+class BenchmarkComparisonTests(TestCase):
+
+    def results(self, p95_ms, queries=7, peak_memory_kb=1000):
+        endpoint = {'p95_ms': p95_ms, 'queries': queries, 'peak_memory_kb': peak_memory_kb}
+        return {'endpoints': {'admin messages': endpoint}}
+
+    def test_within_threshold_passes(self):
+        self.assertEqual(compare_results(self.results(100), self.results(115), 0.2), [])
+
+    def test_slower_p95_is_a_regression(self):
+        regressions = compare_results(self.results(100), self.results(130), 0.2)
+        self.assertEqual(regressions, ["admin messages: p95 100.0 -> 130.0 ms"])
+
+    def test_any_extra_query_is_a_regression(self):
+        regressions = compare_results(self.results(100), self.results(100, queries=8), 0.2)
+        self.assertEqual(regressions, ["admin messages: queries 7 -> 8"])
+
+    def test_percentile_is_nearest_rank(self):
+        timings = list(range(1, 101))
+        self.assertEqual(percentile(timings, 95), 95)
+        self.assertEqual(percentile([5.0], 99), 5.0)
+        # Sorted for the caller, so every command reports the same value
+        self.assertEqual(percentile([30, 10, 20], 50), 20)
+
+
+class RequestMetricsTests(PortfolioTestCase):
+
+    def setUp(self):
+        super().setUp()
+        Profile.objects.create(name="Test Person", email="test@example.com")
+
+    def test_staff_get_server_timing(self):
+        from django.contrib.auth.models import User
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        timing = self.client.get(reverse('home'))['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn('template;dur=', timing)
+        self.assertIn('total;dur=', timing)
+
+    def test_visitors_get_no_server_timing(self):
+        self.assertNotIn('Server-Timing', self.client.get(reverse('home')))
+
+    async def test_staff_get_server_timing_over_asgi(self):
+        from django.contrib.auth.models import User
+        user = await sync_to_async(User.objects.create_superuser)('admin', 'admin@example.com', 'pw')
+        await self.async_client.aforce_login(user)
+        self.assertIn('total;dur=', (await self.async_client.get(reverse('home')))['Server-Timing'])
+
+    def test_metrics_are_hidden_without_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 404)
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer guess')
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(METRICS_TOKEN='s3cret')
+    def test_metrics_exposition(self):
+        self.client.get(reverse('home'))
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer s3cret')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '# TYPE portfolio_request_duration_seconds histogram')
+        self.assertContains(response, 'portfolio_request_duration_seconds_bucket{view="home",status="200",le="+Inf"}')
+        self.assertContains(response, 'portfolio_request_db_queries_total{view="home"}')
+        self.assertContains(response, 'portfolio_contact_shed_total{scope="ip"} 0')
+
+    gone = ('portfolio_request_db_queries_total', (('view', 'gone'),))
+
+    def add_exited_worker(self):
+        """Registers the copy of a worker whose process has exited, with 7 queries counted"""
+        process = subprocess.Popen([sys.executable, '-c', ''])
+        process.wait()
+        exited = f'{process.pid}-1'
+        metrics_cache.set(WORKER_KEY.format(worker=exited), {'counters': {self.gone: 7}, 'histograms': {}})
+        metrics_cache.set(WORKERS_KEY, [exited])
+        return exited
+
+    def test_exited_workers_are_folded_into_one_total(self):
+        exited = self.add_exited_worker()
+        # Still counted once its copy is gone, and only once
+        for _ in range(2):
+            self.assertEqual(collect()[0][self.gone], 7)
+        self.assertNotIn(exited, metrics_cache.get(WORKERS_KEY))
+        self.assertIsNone(metrics_cache.get(WORKER_KEY.format(worker=exited)))
+
+    def test_totals_survive_a_flood_of_rate_limit_buckets(self):
+        self.add_exited_worker()
+        collect()
+        small_buckets = {
+            **TEST_CACHES,
+            'counters': {**TEST_CACHES['counters'], 'OPTIONS': {'MAX_ENTRIES': 10, 'CULL_FREQUENCY': 2}},
+        }
+        with override_settings(CACHES=small_buckets):
+            # Culls the bucket cache several times over
+            for i in range(50):
+                take_token('ip', f'203.0.113.{i}', 5, 60)
+            totals = collect()[0]
+        self.assertEqual(totals[self.gone], 7)
+        self.assertIn(worker_id(), metrics_cache.get(WORKERS_KEY))
+
+    @override_settings(METRICS_TOKEN='s3cret')
+    def test_queue_depth_is_exported(self):
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer s3cret')
+        self.assertContains(response, '# TYPE portfolio_executor_queue_depth gauge')
+        self.assertContains(response, 'portfolio_executor_queue_depth{executor="contact-mail"} 0')
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = Registry()
+        for seconds in (0.001, 0.2, 30):
+            registry.observe('portfolio_mail_send_seconds', (), seconds)
+        histogram = registry.snapshot()['histograms'][('portfolio_mail_send_seconds', ())]
+        self.assertEqual(sum(histogram[:-1]), 3)
+        self.assertEqual(histogram[0], 1)
+        self.assertEqual(histogram[len(BUCKETS)], 1)
+        self.assertAlmostEqual(histogram[-1], 30.201)
+
+
+@override_settings(REPLICA_DATABASES=['replica_0'])
+class ReplicaRoutingTests(TestCase):
+
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+
+    def read_db(self, request):
+        # What a content read would use while the request is being served
+        def get_response(request):
+            response = HttpResponse()
+            response.db = self.router.db_for_read(Skill)
+            return response
+        return PrimaryPinMiddleware(get_response)(request)
+
+    def test_content_reads_go_to_replicas(self):
+        self.assertEqual(self.router.db_for_read(Skill), 'replica_0')
+        self.assertEqual(self.router.db_for_read(ImageDerivative), 'replica_0')
+        self.assertEqual(self.router.db_for_read(ContactMessage), 'default')
+        self.assertEqual(self.router.db_for_write(Skill), 'default')
+
+    def test_fresh_content_is_read_from_primary(self):
+        with fresh_content_reads(time.time_ns()):
+            self.assertEqual(self.router.db_for_read(Skill), 'default')
+        with fresh_content_reads(time.time_ns() - 60 * 1_000_000_000):
+            self.assertEqual(self.router.db_for_read(Skill), 'replica_0')
+
+    def test_singleton_reload_after_save_reads_primary(self):
+        seen = []
+        self.addCleanup(_singletons.pop, 'replica-test', None)
+        cache.clear()
+
+        def loader():
+            seen.append(self.router.db_for_read(SiteSettings))
+
+        # A reload inside the lag window could otherwise keep a replica's old row
+        bump_versions('portfolio.sitesettings')
+        cached_singleton('replica-test', loader, [SiteSettings])
+        cache.set(VERSION_KEY.format(name='portfolio.sitesettings'), time.time_ns() - 60 * 1_000_000_000)
+        cached_singleton('replica-test', loader, [SiteSettings])
+        self.assertEqual(seen, ['default', 'replica_0'])
+
+    def test_replicas_are_not_migrated(self):
+        self.assertFalse(self.router.allow_migrate('replica_0', 'portfolio'))
+        self.assertIsNone(self.router.allow_migrate('default', 'portfolio'))
+
+    def test_staff_write_pins_reads_to_primary(self):
+        from django.contrib.auth.models import User
+        request = RequestFactory().post('/admin/portfolio/skill/add/')
+        request.user = User(is_staff=True)
+        response = self.read_db(request)
+        self.assertEqual(response.db, 'default')
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], settings.DATABASE_REPLICA_LAG_SECONDS)
+
+        request = RequestFactory().get('/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        self.assertEqual(self.read_db(request).db, 'default')
+
+    def test_visitors_read_from_replicas(self):
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        response = self.read_db(request)
+        self.assertEqual(response.db, 'replica_0')
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+
+class SQLiteTuningTests(TestCase):
+
+    def pragmas(self, tuning):
+        """journal_mode and synchronous of a fresh connection to a file database"""
+        with tempfile.TemporaryDirectory() as tmp:
+            settings_dict = {
+                **connection.settings_dict, 'NAME': os.path.join(tmp, 'db.sqlite3'), 'OPTIONS': {},
+            }
+            wrapper = type(connections['default'])(settings_dict, alias='tuning')
+            try:
+                with override_settings(SQLITE_TUNING=tuning), wrapper.cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode')
+                    journal_mode = cursor.fetchone()[0]
+                    cursor.execute('PRAGMA synchronous')
+                    synchronous = cursor.fetchone()[0]
+            finally:
+                wrapper.close()
+        return journal_mode, synchronous
+
+    def test_tuning_applies_pragmas(self):
+        self.assertIn(('journal_mode', 'WAL'), PRAGMAS)
+        # synchronous: 1 is NORMAL
+        self.assertEqual(self.pragmas(tuning=True), ('wal', 1))
+
+    def test_tuning_is_opt_in(self):
+        self.assertEqual(self.pragmas(tuning=False), ('delete', 2))
+
+
+class QueryPlanTests(PortfolioTestCase):
+    """The hot queries read an index in order: no full table scan plus a temporary sort"""
+
+    # Changelists with the filters the admin offers
+    ADMIN_PAGES = {
+        'education': [{}],
+        'experience': [{}],
+        'skill': [{}, {'category__exact': 'backend'}],
+        'project': [{}, {'status__exact': 'completed'}],
+        'testimonial': [{}, {'is_active__exact': '1'}],
+        'contactmessage': [
+            {}, {'is_read__exact': '0'}, {'is_replied__exact': '0'},
+            {'created_at__gte': '2024-01-01', 'created_at__lt': '2024-02-01'},
+        ],
+    }
+
+    def setUp(self):
+        super().setUp()
+        from django.contrib.auth.models import User
+        profile = Profile.objects.create(name="Test Person", email="test@example.com")
+        ProfileImage.objects.create(profile=profile, image='profile/slider/a.jpg')
+        Education.objects.create(institution="School", degree="BSc")
+        Experience.objects.create(title="Role", description="Work")
+        Skill.objects.create(category='backend', name="Django")
+        Project.objects.create(title="Portfolio", description="This site")
+        Testimonial.objects.create(name="Client", position="CTO", testimonial="Great")
+        ContactMessage.objects.create(name="Visitor", email="v@example.com", message="Hi")
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+
+    def query_plan(self, sql):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # On tables this small the planner would rather scan and sort
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute('SET LOCAL enable_sort = off')
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}')
+            return '\n'.join(str(row[-1]) for row in cursor.fetchall())
+
+    def assertIndexed(self, queries):
+        checked = 0
+        for query in queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT') or '"portfolio_' not in sql:
+                continue
+            plan = self.query_plan(sql)
+            # Scanning a whole table is fine when the query wants all of it, in
+            # table order (a plain count, the first profile)
+            if connection.vendor == 'sqlite':
+                scan = re.search(r'^SCAN \S+$', plan, re.MULTILINE)
+                bad = 'USE TEMP B-TREE' in plan or (scan and ' WHERE ' in sql)
+            else:
+                bad = re.search(r'\bSort\b', plan) or ('Seq Scan' in plan and ' WHERE ' in sql)
+            self.assertFalse(bad, f"{sql}\n{plan}")
+            checked += 1
+        return checked
+
+    def test_section_pages_use_indexes(self):
+        for i in range(3):
+            Project.objects.create(title=f"Project {i}", description="Built", order=i)
+        with override_settings(SECTION_PAGE_SIZE=1), CaptureQueriesContext(connection) as queries:
+            first = self.client.get(reverse('home'))
+            cursor = re.search(r'\?after=([\w-]+)', first.content.decode()).group(1)
+            self.client.get(reverse('section-page', args=['projects']), {'after': cursor})
+        self.assertGreaterEqual(self.assertIndexed(queries), 2)
+
+    def test_page_queries_use_indexes(self):
+        with CaptureQueriesContext(connection) as queries:
+            load_portfolio_snapshot()
+        self.assertGreaterEqual(self.assertIndexed(queries), 6)
+
+    def test_admin_changelists_use_indexes(self):
+        for model, filters in self.ADMIN_PAGES.items():
+            url = reverse(f'admin:portfolio_{model}_changelist')
+            for params in filters:
+                with self.subTest(model=model, params=params):
+                    with CaptureQueriesContext(connection) as queries:
+                        self.assertEqual(self.client.get(url, params).status_code, 200)
+                    self.assertGreaterEqual(self.assertIndexed(queries), 1)
+
+
+class TechnologyTests(PortfolioTestCase):
+
+    def counts(self):
+        return dict(Technology.objects.values_list('slug', 'project_count'))
+
+    def test_parse_technologies(self):
+        self.assertEqual(
+            parse_technologies(" Django,python , React  Native,,django"),
+            {'django': "Django", 'python': "python", 'react-native': "React Native"},
+        )
+
+    def test_saving_tags_project_and_counts(self):
+        project = Project.objects.create(title="Site", description="Built", technologies="Django, Python")
+        Project.objects.create(title="Tool", description="Built", technologies="Python")
+        Project.objects.create(title="Idea", description="Later", technologies="Go, Python", status='planned')
+        self.assertEqual(self.counts(), {'django': 1, 'python': 2, 'go': 0})
+        self.assertEqual(sorted(project.tags.values_list('name', flat=True)), ["Django", "Python"])
+
+        project.technologies = "Django, HTMX"
+        project.save()
+        self.assertEqual(self.counts(), {'django': 1, 'python': 1, 'go': 0, 'htmx': 1})
+
+        project.delete()
+        self.assertEqual(self.counts(), {'django': 0, 'python': 1, 'go': 0, 'htmx': 0})
+
+    def test_rebuild_after_bulk_create(self):
+        Project.objects.bulk_create(
+            Project(title=f"Project {i}", description="Built", technologies="Django, Python") for i in range(3)
+        )
+        rebuild_technologies()
+        self.assertEqual(self.counts(), {'django': 3, 'python': 3})
+
+    def test_filter_by_technology(self):
+        Project.objects.create(title="Second", description="Built", technologies="Django", order=2)
+        Project.objects.create(title="First", description="Built", technologies="django, Go", order=1)
+        Project.objects.create(title="Other", description="Built", technologies="Go")
+        Project.objects.create(title="Planned", description="Later", technologies="Django", status='planned')
+
+        # The technology, then its projects, however many there are
+        get_content_version()
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('projects'), {'tech': 'Django'})
+        data = response.json()
+        self.assertEqual([p['title'] for p in data['projects']], ["First", "Second"])
+        self.assertEqual(data['technology']['project_count'], 2)
+
+        # Served from the cache until the content changes
+        with self.assertNumQueries(0):
+            self.client.get(reverse('projects'), {'tech': 'django'})
+
+    def test_filter_reads_link_table_index(self):
+        Project.objects.create(title="Site", description="Built", technologies="Django")
+        technology = Technology.objects.get(slug='django')
+        plan = technology.projects.filter(status__in=Project.PUBLIC_STATUSES).explain()
+        if connection.vendor == 'sqlite':
+            self.assertIn('SEARCH portfolio_project_tags USING', plan)
+            self.assertNotRegex(plan, r'SCAN portfolio_project\b')
+
+    def test_technology_list_and_unknown_technology(self):
+        Project.objects.create(title="Site", description="Built", technologies="Python, Django")
+        Project.objects.create(title="Tool", description="Built", technologies="Python")
+        data = self.client.get(reverse('projects')).json()
+        self.assertEqual(
+            [(tech['slug'], tech['project_count']) for tech in data['technologies']],
+            [('python', 2), ('django', 1)],
+        )
+        self.assertEqual(self.client.get(reverse('projects'), {'tech': 'cobol'}).status_code, 404)
+
+
+@override_settings(SECTION_PAGE_SIZE=2)
+class SectionPaginationTests(PortfolioTestCase):
+
+    def setUp(self):
+        super().setUp()
+        # Ties on order and on created_at, so every column of the key matters
+        created_at = timezone.now()
+        for i in range(5):
+            Project.objects.create(title=f"Project {i}", description="Built", order=i // 2)
+        Project.objects.update(created_at=created_at)
+        Project.objects.create(title="Planned", description="Later", status='planned')
+
+    def test_pages_cover_every_row_once(self):
+        queryset = Project.objects.filter(status__in=Project.PUBLIC_STATUSES)
+        seen, cursor = [], None
+        while True:
+            rows, cursor = keyset_page(queryset, 2, cursor)
+            seen += [project.pk for project in rows]
+            if cursor is None:
+                break
+        expected = queryset.order_by('order', '-created_at', '-id').values_list('pk', flat=True)
+        self.assertEqual(seen, list(expected))
+
+    def test_invalid_cursor(self):
+        for cursor in ('', 'not-a-cursor', 'WzEsMl0'):
+            with self.assertRaises(ValueError):
+                decode_cursor(cursor)
+        response = self.client.get(reverse('section-page', args=['projects']), {'after': 'WzEsMl0'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_home_renders_first_page_only(self):
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, 'class="project-card"', count=2)
+        self.assertContains(response, reverse('section-page', args=['projects']) + '?after=')
+
+    def test_section_page_follows_cursor(self):
+        url = reverse('section-page', args=['projects'])
+        snapshot = load_portfolio_snapshot(page_size=2)
+        titles = [project.title for project in snapshot.projects]
+        cursor = snapshot.projects_next
+        while cursor:
+            get_content_version()
+            # One query for the page of cards at any depth (no images, so no derivative lookup)
+            with self.assertNumQueries(1):
+                response = self.client.get(url, {'after': cursor})
+            html = response.content.decode()
+            titles += re.findall(r'<h3 data-en="[^"]*">([^<]*)</h3>', html)
+            match = re.search(r'\?after=([\w-]+)', html)
+            cursor = match and match.group(1)
+        self.assertEqual(titles, [f"Project {i}" for i in (1, 0, 3, 2, 4)])
+
+    def test_unknown_section(self):
+        self.assertEqual(self.client.get(reverse('section-page', args=['skills'])).status_code, 404)
+
+
+class WarmupTests(PortfolioTestCase):
+
+    def setUp(self):
+        super().setUp()
+        Profile.objects.create(name="Test Person", email="test@example.com")
+
+    def test_warm_worker_fills_page_cache(self):
+        warm_process()
+        warm_worker()
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('home'))
+        self.assertContains(response, "Test Person")
+
+    def test_warm_worker_keeps_cached_page(self):
+        warm_worker()
+        # Later workers find the page already rendered
+        with self.assertNumQueries(0):
+            warm_worker()
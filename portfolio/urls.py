@@ -1,7 +1,13 @@
 # portfolio/urls.py
+from django.conf import settings
 from django.urls import path
 from . import views
 
 urlpatterns = [
-    path('', views.home, name='home'),
+    path('', views.home_async if settings.ASYNC_VIEWS else views.home, name='home'),
+    path('contact/', views.contact, name='contact'),
+    path('api/portfolio/', views.portfolio_api, name='portfolio-api'),
+    path('projects/', views.projects, name='projects'),
+    path('sections/<str:section>/', views.section_page, name='section-page'),
+    path('metrics', views.metrics, name='metrics'),
 ]
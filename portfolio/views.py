@@ -1,74 +1,264 @@
 # portfolio/views.py
-from django.shortcuts import render
-from django.http import JsonResponse
-from .models import Profile, Education, Experience, Skill, Project, Testimonial, ContactMessage, SiteSettings
+import hashlib
+import math
 
-from django.core.mail import send_mail
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, JsonResponse
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.crypto import constant_time_compare
+from django.utils.http import http_date
+from django.views.decorators.http import condition, require_http_methods, require_safe
+from .api import (
+    FULL_SELECTION, build_api_body, build_projects_body, fields_key, parse_fields, select_fields,
+    technology_key,
+)
+from .caching import (
+    CSRF_PLACEHOLDER, aget_cached_home_page, aget_content_version, aset_cached_home_page,
+    content_last_modified, get_cached_api_body, get_cached_fragments, get_cached_home_page,
+    get_content_version, get_site_settings, set_cached_api_body, set_cached_home_page,
+    stale_sections,
+)
+from .metrics import render_metrics, timed_phase
+from .models import ContactMessage, Technology
+from .notifications import enqueue_contact_notification, queue_outbox_delivery
+from .ratelimit import check_contact_rate
+from .routers import fresh_content_reads
+from .snapshot import PAGED_SECTIONS, aload_portfolio_snapshot, load_portfolio_snapshot, load_section_page
 
-def home(request):
-    # Fetch data from database
-    # Since Profile and SiteSettings are singletons (we expect only one), we try to get the first one
-    profile = Profile.objects.first()
-    settings = SiteSettings.load()
-    
-    # Get all active/ordered data
-    experiences = Experience.objects.all()
-    
-    # Education
-    education = Education.objects.all()
-
-    # Organize skills by category for easier display in template
-    # We can do this in the template too, but pre-processing views is often cleaner
-    skills = Skill.objects.all().order_by('order', 'category')
-    
-    # Projects - fetched by order
-    projects = Project.objects.filter(status__in=['completed', 'in_progress']).order_by('order')
-    
-    # Testimonials
-    testimonials = Testimonial.objects.filter(is_active=True)
 
-    if request.method == 'POST':
-        # Handle contact form submission via AJAX
-        try:
-            name = request.POST.get('name')
-            email = request.POST.get('email')
-            message = request.POST.get('message')
-            
-            ContactMessage.objects.create(
+def render_home_page():
+    """Render index.html from the database, with a placeholder CSRF token"""
+    # Only the sections whose fragments are stale are loaded and rendered
+    fragments = get_cached_fragments()
+    snapshot = load_portfolio_snapshot(only=stale_sections(fragments), page_size=settings.SECTION_PAGE_SIZE)
+    context = snapshot.as_context()
+    context['csrf_token'] = CSRF_PLACEHOLDER
+    context['fragments'] = fragments
+
+    # Rendered without the request so nothing visitor-specific ends up in the cache
+    with timed_phase('template'):
+        return render_to_string('index.html', context)
+
+
+async def arender_home_page():
+    fragments = await sync_to_async(get_cached_fragments, thread_sensitive=False)()
+    snapshot = await aload_portfolio_snapshot(
+        only=stale_sections(fragments), page_size=settings.SECTION_PAGE_SIZE,
+    )
+    context = snapshot.as_context()
+    context['csrf_token'] = CSRF_PLACEHOLDER
+    context['fragments'] = fragments
+    with timed_phase('template'):
+        return render_to_string('index.html', context)
+
+
+@require_http_methods(['GET', 'POST'])
+def contact(request):
+    if request.method == 'GET':
+        # Pre-rendered copies of the page carry no CSRF token; hand one out here
+        return JsonResponse({'csrfToken': get_token(request)})
+
+    # Floods are turned away before anything touches the database
+    retry_after = check_contact_rate(request)
+    if retry_after:
+        response = JsonResponse(
+            {'status': 'error', 'message': 'Too many messages, please try again later.'},
+            status=429,
+        )
+        response['Retry-After'] = str(math.ceil(retry_after))
+        return response
+
+    # Handle contact form submission via AJAX
+    try:
+        name = request.POST.get('name')
+        email = request.POST.get('email')
+        message = request.POST.get('message')
+
+        recipient = get_site_settings().contact_email
+
+        # The message and its notification email are saved together, so a
+        # notification is never lost even if the mail server is down
+        with transaction.atomic():
+            contact_message = ContactMessage.objects.create(
                 name=name,
                 email=email,
                 message=message
             )
-            
-            # Send Email Notification
-            try:
-                subject = f"New Contact from Portfolio: {name}"
-                email_body = f"Name: {name}\nEmail: {email}\n\nMessage:\n{message}"
-                recipient = settings.contact_email
-                
-                send_mail(
-                    subject,
-                    email_body,
-                    'noreply@portfolio.local', # Sender
-                    [recipient],
-                    fail_silently=False,
-                )
-            except Exception as mail_error:
-                print(f"Email sending failed: {mail_error}")
-                # We continue success because db save worked
-            
-            return JsonResponse({'status': 'success', 'message': 'Message sent successfully!'})
-        except Exception as e:
-            return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
-
-    context = {
-        'profile': profile,
-        'settings': settings,
-        'experiences': experiences,
-        'education': education,
-        'skills': skills,
-        'projects': projects,
-        'testimonials': testimonials,
-    }
-    
-    return render(request, 'index.html', context)
+            outbox_email = enqueue_contact_notification(contact_message, recipient)
+
+        # Delivery is attempted in the background; the response never waits for SMTP
+        transaction.on_commit(lambda: queue_outbox_delivery(outbox_email))
+
+        return JsonResponse({'status': 'success', 'message': 'Message sent successfully!'})
+    except Exception as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+
+
+def home_etag(request):
+    # Weak: the CSRF token makes each response differ byte for byte. The
+    # build is included so a deploy doesn't revalidate the old release's HTML
+    return f'W/"{settings.BUILD_ID}-{get_content_version()}"'
+
+
+def home_last_modified(request):
+    return content_last_modified(get_content_version())
+
+
+# Revisits with a matching validator get a 304 before any section is loaded
+@condition(etag_func=home_etag, last_modified_func=home_last_modified)
+def home(request):
+    if request.method == 'POST':
+        # Submissions are never served from (or stored in) the page cache
+        return contact(request)
+
+    # Read the version before rendering: if content changes mid-render,
+    # this copy is stored under the old version and never served.
+    version = get_content_version()
+    html = get_cached_home_page(version)
+    if html is None:
+        with fresh_content_reads(version):
+            html = render_home_page()
+        set_cached_home_page(html, version)
+
+    # The CSRF token is the only per-visitor part of the page, so shared caches
+    # must not store it; browsers revalidate with the validators above.
+    response = HttpResponse(html.replace(CSRF_PLACEHOLDER, get_token(request)))
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+async def home_async(request):
+    """home() for ASGI servers: the page is loaded with the async ORM"""
+    if request.method == 'POST':
+        # Mail never blocks here either: it goes through the outbox
+        return await sync_to_async(contact)(request)
+
+    version = await aget_content_version()
+    etag = f'W/"{settings.BUILD_ID}-{version}"'
+    last_modified = int(content_last_modified(version).timestamp())
+    # condition() calls its validator functions synchronously, so the same
+    # checks are done here with the async cache
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        html = await aget_cached_home_page(version)
+        if html is None:
+            with fresh_content_reads(version):
+                html = await arender_home_page()
+            await aset_cached_home_page(html, version)
+        response = HttpResponse(html.replace(CSRF_PLACEHOLDER, get_token(request)))
+        patch_cache_control(response, private=True, no_cache=True)
+
+    response.headers.setdefault('ETag', etag)
+    response.headers.setdefault('Last-Modified', http_date(last_modified))
+    return response
+
+
+def api_etag(request):
+    try:
+        selection = parse_fields(request.GET.get('fields', ''))
+    except ValueError:
+        return None
+    # Strong: the body for a version and selection is always the same bytes
+    return f'"{get_content_version()}-{fields_key(selection)}"'
+
+
+@require_safe
+@condition(etag_func=api_etag, last_modified_func=home_last_modified)
+def portfolio_api(request):
+    try:
+        selection = parse_fields(request.GET.get('fields', ''))
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+
+    version = get_content_version()
+    key = fields_key(FULL_SELECTION)
+    body = get_cached_api_body(version, key)
+    if body is None:
+        with fresh_content_reads(version):
+            body = build_api_body(FULL_SELECTION, version)
+        set_cached_api_body(body, version, key)
+    if selection != FULL_SELECTION:
+        # Cut from the cached full body: caching every combination would let
+        # anyone fill the cache
+        body = select_fields(body, selection)
+
+    response = HttpResponse(body, content_type='application/json')
+    # Nothing per-visitor in here: any cache may keep it, but must revalidate
+    patch_cache_control(response, public=True, no_cache=True)
+    response['Access-Control-Allow-Origin'] = '*'
+    return response
+
+
+# Templates of the cards of each paged section, with the link to the next page
+SECTION_PAGE_TEMPLATES = {
+    'projects': 'partials/project_cards.html',
+    'testimonials': 'partials/testimonial_cards.html',
+}
+
+
+def section_page_etag(request, section):
+    cursor = hashlib.md5(request.GET.get('after', '').encode()).hexdigest()[:12]
+    return f'"{settings.BUILD_ID}-{get_content_version()}-{section}-{cursor}"'
+
+
+@require_safe
+@condition(etag_func=section_page_etag)
+def section_page(request, section):
+    """The next page of project or testimonial cards, as an HTML fragment for the page's scroll loader"""
+    if section not in PAGED_SECTIONS:
+        raise Http404
+
+    version = get_content_version()
+    try:
+        with fresh_content_reads(version):
+            if section == 'testimonials' and not get_site_settings().enable_testimonials:
+                raise Http404
+            context = load_section_page(section, request.GET.get('after'), settings.SECTION_PAGE_SIZE)
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    with timed_phase('template'):
+        response = HttpResponse(render_to_string(SECTION_PAGE_TEMPLATES[section], context))
+    # Not kept in the cache: every valid cursor is a different page
+    patch_cache_control(response, public=True, no_cache=True)
+    return response
+
+
+def projects_etag(request):
+    slug = Technology.slug_for(request.GET.get('tech', ''))
+    return f'"{get_content_version()}-{technology_key(slug)}"'
+
+
+@require_safe
+@condition(etag_func=projects_etag, last_modified_func=home_last_modified)
+def projects(request):
+    slug = Technology.slug_for(request.GET.get('tech', ''))
+    version = get_content_version()
+    key = technology_key(slug)
+    body = get_cached_api_body(version, key)
+    if body is None:
+        with fresh_content_reads(version):
+            body = build_projects_body(slug, version)
+        if body is None:
+            # Not cached: any string is a valid ?tech=, so misses could fill the cache
+            return JsonResponse({'status': 'error', 'message': 'Unknown technology'}, status=404)
+        set_cached_api_body(body, version, key)
+
+    response = HttpResponse(body, content_type='application/json')
+    patch_cache_control(response, public=True, no_cache=True)
+    response['Access-Control-Allow-Origin'] = '*'
+    return response
+
+
+@require_safe
+def metrics(request):
+    token = settings.METRICS_TOKEN
+    authorization = request.headers.get('Authorization', '')
+    allowed = request.user.is_staff or (token and constant_time_compare(authorization, f'Bearer {token}'))
+    # Hidden rather than forbidden: nothing public should know it exists
+    if not settings.METRICS_ENABLED or not allowed:
+        raise Http404
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
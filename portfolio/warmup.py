@@ -0,0 +1,48 @@
+"""
+Boot-time warmup, called from the gunicorn hooks in gunicorn.conf.py.
+
+warm_process() does the work a fork inherits: importing the URLconf and
+compiling the page templates. With preload_app it runs once in the
+master, before the workers are forked.
+
+warm_worker() does the work each worker needs for itself. It loads the
+process-local singletons and fills the shared page cache, which only the
+first worker after a deploy actually renders. A worker runs it before
+taking its first request, so no visitor pays for any of this. Database
+connections are left alone: they are per thread, and the gthread request
+threads open their own.
+"""
+import time
+
+from django.template.loader import get_template
+from django.urls import get_resolver, reverse
+
+from .caching import (
+    get_cached_home_page, get_content_version, get_profile, get_site_settings, set_cached_home_page,
+)
+from .routers import fresh_content_reads
+from .views import SECTION_PAGE_TEMPLATES, render_home_page
+
+
+def warm_process():
+    """Returns the seconds taken, as does warm_worker()"""
+    started = time.perf_counter()
+    # Imports every view module, the admin's included
+    get_resolver().url_patterns
+    reverse('home')
+    for name in ('index.html', *SECTION_PAGE_TEMPLATES.values()):
+        get_template(name)
+    return time.perf_counter() - started
+
+
+def warm_worker():
+    started = time.perf_counter()
+    version = get_content_version()
+    # Pinned like a page render: a recycled worker starting just after a
+    # save must not load a replica's old rows
+    with fresh_content_reads(version):
+        get_profile()
+        get_site_settings()
+        if get_cached_home_page(version) is None:
+            set_cached_home_page(render_home_page(), version)
+    return time.perf_counter() - started
@@ -1 +1,3 @@
-gunicorn nischit_portfolio.wsgi:application
+# Workers, preloading, recycling and warmup are set in gunicorn.conf.py;
+# SERVE_ASGI=1 switches it to the ASGI app under uvicorn workers
+exec gunicorn -c gunicorn.conf.py